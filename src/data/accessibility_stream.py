@@ -0,0 +1,205 @@
+"""Streaming ingestion and per-station diffing of accessibility snapshots.
+
+accessibilityCache.json / lastAccessState.json are ~200 KB objects mapping an
+equipment id ("LEN-05eb02") to its elevator/escalator state. Instead of
+loading two whole snapshots and comparing them, a snapshot is read one entry
+at a time and compared against a compact ``{id: (estado, estacion)}`` state,
+so memory stays bounded by the number of equipment ids, not the snapshot
+text. Changes come out grouped by ``stationsData`` key.
+
+Uses ``ijson`` when it is installed and a small incremental decoder otherwise.
+
+Usage:
+    python accessibility_stream.py diff OLD.json NEW.json
+    python accessibility_stream.py replay SNAPSHOT.json [SNAPSHOT.json ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+try:
+    import ijson
+except ImportError:  # optional: the built-in decoder below is used instead
+    ijson = None
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def _iter_object_items(stream, chunk_size=CHUNK_SIZE):
+    """Yield ``(key, value)`` pairs of a top-level JSON object read in chunks."""
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip(chars):
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in chars:
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    def decode():
+        nonlocal position
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A number at the very end of the buffer may be cut short; make sure it is complete.
+            if end == len(buffer) and not eof and not isinstance(value, (dict, list, str)):
+                fill()
+                continue
+            position = end
+            return value
+
+    fill()
+    skip(" \t\r\n")
+    if buffer[position:position + 1] != "{":
+        raise ValueError("Accessibility snapshot must be a JSON object")
+    position += 1
+
+    while True:
+        skip(" \t\r\n,")
+        if position >= len(buffer):
+            raise ValueError("Unterminated accessibility snapshot")
+        if buffer[position] == "}":
+            return
+        key = decode()
+        skip(" \t\r\n:")
+        yield key, decode()
+
+
+def iter_snapshot(path):
+    """Stream the ``(equipment id, entry)`` pairs of an accessibility snapshot file."""
+    if ijson is not None:
+        with open(path, "rb") as snapshot:
+            yield from ijson.kvitems(snapshot, "")
+        return
+    with open(path, encoding="utf-8") as snapshot:
+        yield from _iter_object_items(snapshot)
+
+
+class AccessibilityDiffer:
+    """Keeps the last known state per equipment id and diffs new snapshots against it.
+
+    ``code_to_key`` maps estadoRed.json station codes to ``stationsData`` keys
+    (see :func:`station_join.station_codes`); unknown codes are grouped under
+    the code itself.
+    """
+
+    def __init__(self, code_to_key=None):
+        self.code_to_key = code_to_key or {}
+        self.state = {}
+
+    def station(self, code):
+        return self.code_to_key.get((code or "").upper(), code)
+
+    def diff(self, items):
+        """Consume ``items`` and return ``{station key: [change, ...]}`` for changed equipment only."""
+        changes = {}
+        seen = set()
+        for equipment_id, entry in items:
+            seen.add(equipment_id)
+            estado, code = entry.get("estado"), entry.get("estacion")
+            previous = self.state.get(equipment_id)
+            if previous is None or previous[0] != estado:
+                changes.setdefault(self.station(code), []).append({
+                    "id": equipment_id,
+                    "tipo": entry.get("tipo"),
+                    "texto": entry.get("texto"),
+                    "from": None if previous is None else previous[0],
+                    "to": estado,
+                    "time": entry.get("time"),
+                })
+            self.state[equipment_id] = (estado, code)
+
+        for equipment_id in [equipment_id for equipment_id in self.state if equipment_id not in seen]:
+            estado, code = self.state.pop(equipment_id)
+            changes.setdefault(self.station(code), []).append({
+                "id": equipment_id, "tipo": None, "texto": None, "from": estado, "to": None, "time": None,
+            })
+        return changes
+
+
+def replay(paths, code_to_key=None):
+    """Feed snapshots through one differ in order; returns one stats dict per snapshot."""
+    differ = AccessibilityDiffer(code_to_key)
+    stats = []
+    for path in paths:
+        start = time.perf_counter()
+        count = 0
+
+        def counted(items):
+            nonlocal count
+            for item in items:
+                count += 1
+                yield item
+
+        changes = differ.diff(counted(iter_snapshot(path)))
+        elapsed = time.perf_counter() - start
+        stats.append({
+            "snapshot": path,
+            "entries": count,
+            "stations": len(changes),
+            "changes": sum(len(items) for items in changes.values()),
+            "seconds": elapsed,
+            "entriesPerSecond": count / elapsed if elapsed else None,
+        })
+    return stats
+
+
+def _code_to_key():
+    import stationsdata
+    from station_join import station_codes
+    from station_records import station_aliases
+
+    keys = set(stationsdata.stationsData)
+    aliases = station_aliases(stationsdata.load_json("stations.json"), keys)
+    codes = station_codes(stationsdata.load_json("estadoRed.json"), keys, aliases)
+    return {code: key for key, (code, _line, _name, _transfer) in codes.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream and diff accessibility snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff_parser = commands.add_parser("diff", help="print the per-station changes between two snapshots")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    replay_parser = commands.add_parser("replay", help="replay stored snapshots and report diff throughput")
+    replay_parser.add_argument("snapshots", nargs="+")
+    args = parser.parse_args()
+
+    code_to_key = _code_to_key()
+    if args.command == "diff":
+        differ = AccessibilityDiffer(code_to_key)
+        differ.diff(iter_snapshot(args.old))
+        print(json.dumps(differ.diff(iter_snapshot(args.new)), indent=2, ensure_ascii=False))
+        return
+
+    for row in replay(args.snapshots, code_to_key):
+        print(
+            f"{row['snapshot']}: {row['entries']} entries, {row['changes']} changes in {row['stations']} stations, "
+            f"{row['seconds'] * 1000:.1f} ms ({row['entriesPerSecond'] or 0:,.0f} entries/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Concurrent validation of station image/PDF URLs with a cached manifest.
+
+Every ``stationsSchematics`` entry and the image slot of ``stationsData`` is
+a remote Discord CDN or metro.cl URL that the bot hands straight to Discord.
+This stage collects and dedupes those URLs, fetches them concurrently
+(bounded by a semaphore) and records status, size, content type and a
+SHA-256 of the body. Entries younger than the TTL are not re-checked;
+stale ones are revalidated with ``If-None-Match``/``If-Modified-Since`` so an
+unchanged asset costs a 304.
+
+Usage: python asset_manifest.py [--manifest PATH] [--ttl SECONDS] [--concurrency N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+from station_records import parse_value
+
+ASSET_SLOTS = ("image", "schematic_image", "schematic_pdf")
+
+DEFAULT_TTL = 24 * 60 * 60
+
+# Broken links are retried sooner than healthy ones.
+DEFAULT_ERROR_TTL = 60 * 60
+
+USER_AGENT = "MetroBot-assets/1.0"
+
+
+def collect_assets(records):
+    """``{url: [[station key, slot], ...]}`` for every asset URL in the compiled records."""
+    assets = {}
+    for key, record in records.items():
+        for slot in ASSET_SLOTS:
+            url = parse_value(getattr(record, slot))
+            if url:
+                assets.setdefault(url, []).append([key, slot])
+    return dict(sorted(assets.items()))
+
+
+def _fetch(url, previous, timeout):
+    """Blocking GET of one asset; runs in a worker thread."""
+    headers = {"User-Agent": USER_AGENT}
+    if previous and previous.get("ok"):
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("lastModified"):
+            headers["If-Modified-Since"] = previous["lastModified"]
+
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            digest = hashlib.sha256()
+            size = 0
+            for chunk in iter(lambda: response.read(64 * 1024), b""):
+                digest.update(chunk)
+                size += len(chunk)
+            return {
+                "status": response.status,
+                "ok": True,
+                "size": size,
+                "sha256": digest.hexdigest(),
+                "contentType": response.headers.get("Content-Type"),
+                "etag": response.headers.get("ETag"),
+                "lastModified": response.headers.get("Last-Modified"),
+                "error": None,
+            }
+    except urllib.error.HTTPError as error:
+        if error.code == 304 and previous:
+            return dict(previous, status=304, ok=True, error=None)
+        return {"status": error.code, "ok": False, "error": f"HTTP {error.code}"}
+    except (urllib.error.URLError, OSError) as error:
+        return {"status": None, "ok": False, "error": str(getattr(error, "reason", error))}
+    except (http.client.HTTPException, ValueError) as error:
+        # A dropped or truncated response, or a URL urllib cannot send (spaces, accents): one broken asset,
+        # not a failed run.
+        return {"status": None, "ok": False, "error": f"{type(error).__name__}: {error}"}
+
+
+def is_fresh(entry, now, ttl=DEFAULT_TTL, error_ttl=DEFAULT_ERROR_TTL):
+    if not entry or "checkedAt" not in entry:
+        return False
+    return now - entry["checkedAt"] < (ttl if entry.get("ok") else error_ttl)
+
+
+async def build_asset_manifest(assets, previous=None, ttl=DEFAULT_TTL, error_ttl=DEFAULT_ERROR_TTL,
+                               concurrency=8, timeout=15, now=None, fetch=_fetch):
+    """Check every asset URL (re-using fresh entries of ``previous``) and return the new manifest."""
+    now = time.time() if now is None else now
+    previous_assets = (previous or {}).get("assets", {})
+    semaphore = asyncio.Semaphore(concurrency)
+    checked = 0
+
+    async def check(url):
+        nonlocal checked
+        entry = previous_assets.get(url)
+        if is_fresh(entry, now, ttl, error_ttl):
+            return url, entry
+        async with semaphore:
+            result = await asyncio.to_thread(fetch, url, entry, timeout)
+        checked += 1
+        return url, dict(result, checkedAt=now)
+
+    results = await asyncio.gather(*(check(url) for url in assets))
+
+    manifest = {}
+    for url, entry in results:
+        manifest[url] = dict(entry, stations=assets[url])
+
+    hashes = {}
+    for url, entry in manifest.items():
+        if entry.get("sha256"):
+            hashes.setdefault(entry["sha256"], []).append(url)
+
+    return {
+        "generatedAt": now,
+        "checked": checked,
+        "assets": manifest,
+        "broken": sorted(url for url, entry in manifest.items() if not entry.get("ok")),
+        # Different URLs serving byte-identical content, usually a copy-pasted schematic.
+        "sameContent": sorted(urls for urls in hashes.values() if len(urls) > 1),
+    }
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as manifest_file:
+        return json.load(manifest_file)
+
+
+def save_manifest(manifest, path):
+    with open(path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4, ensure_ascii=False)
+
+
+def main():
+    import stationsdata
+    from station_records import build_records
+
+    parser = argparse.ArgumentParser(description="Validate station image/PDF URLs into a cached manifest.")
+    parser.add_argument("--manifest", default="assets.manifest.json")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL, help="seconds before a healthy entry is re-checked")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    assets = collect_assets(build_records(stationsdata.stationsData, stationsdata.stationsSchematics))
+    manifest = asyncio.run(build_asset_manifest(
+        assets, load_manifest(args.manifest), ttl=args.ttl, concurrency=args.concurrency,
+    ))
+    save_manifest(manifest, args.manifest)
+
+    print(f"{len(assets)} assets, {manifest['checked']} checked, {len(manifest['broken'])} broken.")
+    for url in manifest["broken"]:
+        entry = manifest["assets"][url]
+        stations = ", ".join(f"{key} ({slot})" for key, slot in entry["stations"])
+        print(f"  {entry['error']}: {url} [{stations}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Size, parse time and memory of each station data format.
+
+Encodes the generated station document and the largest sibling JSON caches in
+every available format, then reports file size, best-of-N load time and the
+peak/retained memory of loading (tracemalloc).
+
+Usage: python src/data/benchmarks/bench_formats.py [--repeat N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import station_formats  # noqa: E402
+from station_indexes import build_indexes, build_vocabulary  # noqa: E402
+from station_records import build_records  # noqa: E402
+from stationsdata import data, load_json, stationsData, stationsSchematics  # noqa: E402
+
+SIBLINGS = ("accessibilityCache.json", "apiChanges.json")
+
+
+def station_document():
+    records = build_records(stationsData, stationsSchematics)
+    return dict(
+        data,
+        stations={key: record.to_dict() for key, record in records.items()},
+        indexes=build_indexes(records),
+        vocabulary=build_vocabulary(records),
+    )
+
+
+def measure(path, fmt, repeat):
+    best = min(_timed_load(path, fmt) for _ in range(repeat))
+    gc.collect()
+    tracemalloc.start()
+    document = station_formats.load(path, fmt)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del document
+    return os.path.getsize(path), best, peak, retained
+
+
+def _timed_load(path, fmt):
+    start = time.perf_counter()
+    station_formats.load(path, fmt)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = {"stationsdata": station_document()}
+    documents.update({name[:-len(".json")]: load_json(name) for name in SIBLINGS})
+    formats = [fmt for fmt in station_formats.FORMATS if fmt != "msgpack" or station_formats.msgpack]
+
+    print(f"{'document':<22}{'format':<10}{'size (KB)':>11}{'load (ms)':>11}{'peak (KB)':>11}{'kept (KB)':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, document in documents.items():
+            for fmt in formats:
+                path = os.path.join(workdir, station_formats.file_name(name, fmt))
+                station_formats.dump(document, path, fmt)
+                size, seconds, peak, retained = measure(path, fmt, args.repeat)
+                print(f"{name:<22}{fmt:<10}{size / 1024:>11.1f}{seconds * 1000:>11.2f}{peak / 1024:>11.1f}{retained / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
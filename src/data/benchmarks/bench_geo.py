@@ -0,0 +1,71 @@
+"""Grid-bucket nearest/radius queries versus a brute-force scan.
+
+The repository ships no station coordinates (they live in metro_stations), so
+points are drawn uniformly over the Santiago metro area. Each run uses the
+real station count and synthetic scale-ups of it.
+
+Usage: python src/data/benchmarks/bench_geo.py [--queries N] [--seed S]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stationsdata  # noqa: E402
+from station_geo import StationGeo, build_geo_index, distance, nearest_brute  # noqa: E402
+
+# Roughly the bounding box of the network.
+LATITUDES = (-33.65, -33.35)
+LONGITUDES = (-70.80, -70.50)
+
+SCALES = (1, 10, 100)
+
+
+class _Record:
+    communes = ()
+
+
+def per_query(function, queries):
+    start = time.perf_counter()
+    for lat, lon in queries:
+        function(lat, lon)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=1500)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stations = len(stationsdata.station_keys())
+    queries = [(rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)) for _ in range(args.queries)]
+
+    print(f"{'points':>8}{'knn grid (us)':>15}{'knn scan (us)':>15}{'radius grid (us)':>18}{'radius scan (us)':>18}")
+    for scale in SCALES:
+        keys = [f"station {index}" for index in range(stations * scale)]
+        coordinates = {key: [rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)] for key in keys}
+        document = build_geo_index(coordinates, dict.fromkeys(keys, _Record()))
+        geo, points = StationGeo(document), document["points"]
+
+        def scan_within(lat, lon):
+            return sorted((meters, key) for key, p_lat, p_lon in points if (meters := distance(lat, lon, p_lat, p_lon)) <= args.radius)
+
+        timings = (
+            per_query(lambda lat, lon: geo.nearest(lat, lon, args.k), queries),
+            per_query(lambda lat, lon: nearest_brute(points, lat, lon, args.k), queries),
+            per_query(lambda lat, lon: geo.within(lat, lon, args.radius), queries),
+            per_query(scan_within, queries),
+        )
+        print(f"{len(points):>8}" + "".join(f"{seconds * 1e6:>{width}.1f}" for seconds, width in zip(timings, (15, 15, 18, 18))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Route table walk versus on-demand shortest-path search.
+
+Builds the network graph and the all-pairs tables once, then answers the same
+random origin/destination pairs both ways for every weight profile and
+reports the table build time, its minified size and per-query latency.
+
+Usage: python src/data/benchmarks/bench_routes.py [--queries N] [--seed S]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stationsdata  # noqa: E402
+from station_records import station_aliases  # noqa: E402
+from station_routes import RouteTable, build_network, build_route_tables, load_profiles, search_route  # noqa: E402
+
+
+def per_query(function, pairs):
+    start = time.perf_counter()
+    for origin, destination in pairs:
+        function(origin, destination)
+    return (time.perf_counter() - start) / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    stations_json = stationsdata.load_json("stations.json")
+    keys = set(stationsdata.station_keys())
+    network = build_network(stations_json, keys, station_aliases(stations_json, keys))
+    profiles = load_profiles()
+
+    start = time.perf_counter()
+    document = build_route_tables(network, profiles)
+    build_seconds = time.perf_counter() - start
+    size = len(json.dumps(document, separators=(",", ":")))
+    table = RouteTable(document)
+
+    rng = random.Random(args.seed)
+    pairs = [tuple(rng.sample(network["nodes"], 2)) for _ in range(args.queries)]
+
+    print(f"{len(network['nodes'])} nodes, {len(network['edges'])} edges; "
+          f"tables built in {build_seconds * 1000:.1f} ms, {size / 1024:.1f} KB minified")
+    print(f"{'profile':<10}{'walk (us)':>11}{'search (us)':>13}{'speedup':>9}")
+    for name, weights in profiles.items():
+        walk = per_query(lambda origin, destination: table.route(origin, destination, name), pairs)
+        search = per_query(lambda origin, destination: search_route(network, weights, origin, destination), pairs)
+        print(f"{name:<10}{walk * 1e6:>11.1f}{search * 1e6:>13.1f}{search / walk:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
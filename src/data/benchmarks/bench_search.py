@@ -0,0 +1,50 @@
+"""Station-name lookup latency: search artifact vs. the linear ``includes()`` scan.
+
+Usage: python src/data/benchmarks/bench_search.py [--scale N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from station_records import fold  # noqa: E402
+from station_search import StationSearch, build_search_artifact  # noqa: E402
+from stationsdata import load_json, stationsData, stationsSchematics  # noqa: E402
+
+QUERIES = ("san pablo", "vicente valdes", "nunoa", "ula", "baq", "heroes l2", "pila de ganso", "estacion")
+
+
+def scaled_keys(scale):
+    keys = list(dict.fromkeys(list(stationsData) + list(stationsSchematics)))
+    return keys + [f"{key} x{copy}" for copy in range(1, scale) for key in keys]
+
+
+def linear_scan(keys, query):
+    # What the JS modules do today: normalize every key, then substring-match.
+    query = fold(query)
+    return [key for key in keys if query in fold(key)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiply the station set by N")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    keys = scaled_keys(args.scale)
+    search = StationSearch(build_search_artifact(keys, load_json("stations.json")))
+
+    print(f"{len(keys)} station keys, {len(search.names)} searchable names")
+    print(f"{'query':<16}{'linear (us)':>14}{'prefix (us)':>14}{'search (us)':>14}")
+    for query in QUERIES:
+        row = []
+        for call in (lambda: linear_scan(keys, query), lambda: search.prefix(query), lambda: search.search(query)):
+            row.append(timeit.timeit(call, number=args.repeat) / args.repeat * 1e6)
+        print(f"{query:<16}{row[0]:>14.1f}{row[1]:>14.1f}{row[2]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Load test for station_server.py: throughput and latency percentiles on one machine.
+
+Generates the station data into a temporary directory and starts the server
+in its own process, unless ``--url`` points at a running one. It then opens
+``--connections`` keep-alive clients that request a mix of per-station,
+per-category, search and catalogue paths for ``--duration`` seconds. A
+``--revalidate`` share of the requests send If-None-Match with the ETag seen
+earlier, as a client with a warm cache would, so they should come back 304.
+
+Usage: python src/data/benchmarks/bench_server.py [--connections N] [--duration S] [--revalidate F] [--url HOST:PORT]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DATA_DIR)
+
+import stationsdata  # noqa: E402
+
+SEARCHES = ("san pablo", "baq", "nunoa", "heroes", "vicente valdes")
+
+
+def paths(records):
+    keys = sorted(records)
+    mix = [f"/stations/{quote(key)}" for key in keys]
+    for category in ("commerce", "culture", "communes"):
+        mix += [f"/categories/{category}/{quote(term)}" for term in stationsdata.category(category)]
+    mix += [f"/search?q={quote(query)}" for query in SEARCHES]
+    mix += ["/stations", "/categories", "/health"]
+    return mix
+
+
+async def request(reader, writer, host, path, etag=None):
+    """Send one GET over a keep-alive connection; returns ``(status, headers, body bytes)``."""
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}", "Accept-Encoding: gzip, br"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ")[1])
+    headers = {}
+    for line in head[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers, body
+
+
+async def client(host, port, mix, deadline, revalidate, rng, latencies, statuses, sizes):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    try:
+        while time.perf_counter() < deadline:
+            path = rng.choice(mix)
+            etag = etags.get(path) if rng.random() < revalidate else None
+            start = time.perf_counter()
+            status, headers, body = await request(reader, writer, host, path, etag)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            sizes.append(len(body))
+            if "etag" in headers:
+                etags[path] = headers["etag"]
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, mix, connections, duration, revalidate, seed):
+    latencies, statuses, sizes = [], {}, []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, mix, deadline, revalidate, random.Random(seed + index), latencies, statuses, sizes)
+        for index in range(connections)
+    ))
+    return time.perf_counter() - started, latencies, statuses, sizes
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def _wait_until_up(host, port, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+            continue
+        await request(reader, writer, host, "/health")
+        writer.close()
+        return
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--revalidate", type=float, default=0.5, help="share of requests sent with If-None-Match")
+    parser.add_argument("--url", help="HOST:PORT of a running server (default: start one)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    mix = paths(stationsdata.records())
+    with contextlib.ExitStack() as stack:
+        if args.url:
+            host, _, port = args.url.rpartition(":")
+            port = int(port)
+        else:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+            with contextlib.redirect_stdout(io.StringIO()):
+                stationsdata.generate_json_file(fmt="min", output_dir=workdir)
+            host, port = "127.0.0.1", _free_port()
+            server = subprocess.Popen(
+                [sys.executable, os.path.join(DATA_DIR, "station_server.py"), "--data", workdir, "--port", str(port)],
+                stdout=subprocess.DEVNULL,
+            )
+            stack.callback(server.wait)
+            stack.callback(server.terminate)
+        asyncio.run(_wait_until_up(host, port))
+        elapsed, latencies, statuses, sizes = asyncio.run(
+            load_test(host, port, mix, args.connections, args.duration, args.revalidate, args.seed)
+        )
+
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.1f} s, {len(mix)} distinct paths")
+    print(f"throughput   {len(latencies) / elapsed:10.0f} req/s")
+    print(f"latency p50  {percentile(latencies, 0.50) * 1000:10.2f} ms")
+    print(f"latency p90  {percentile(latencies, 0.90) * 1000:10.2f} ms")
+    print(f"latency p99  {percentile(latencies, 0.99) * 1000:10.2f} ms")
+    print(f"mean body    {statistics.mean(sizes):10.0f} bytes")
+    print("statuses     " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Import and first-access cost of the stationsdata module.
+
+Each measurement runs in a fresh interpreter so module caches start empty:
+importing the module, then the first access of one station, of every
+compiled record, of one category index and of the raw ``data`` dict.
+
+Usage: python src/data/benchmarks/bench_startup.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = f"import sys, time; sys.path.insert(0, {DATA_DIR!r}); start = time.perf_counter()\n"
+
+CASES = {
+    "import": "import stationsdata",
+    "import + station()": "import stationsdata; stationsdata.station('neptuno')",
+    "import + records()": "import stationsdata; stationsdata.records()",
+    "import + category()": "import stationsdata; stationsdata.category('commerce')",
+    "import + data": "import stationsdata; stationsdata.data",
+}
+
+
+def run_case(statement):
+    code = SETUP + statement + "\nprint(time.perf_counter() - start)"
+    # Measure a normal start, with bytecode caching enabled even if the caller disabled it.
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE"}
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, env=env).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    run_case("import stationsdata")  # make sure the bytecode cache is warm
+    print(f"{'case':<24}{'median (ms)':>13}{'min (ms)':>11}")
+    for name, statement in CASES.items():
+        timings = [run_case(statement) * 1000 for _ in range(args.runs)]
+        print(f"{name:<24}{statistics.median(timings):>13.2f}{min(timings):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
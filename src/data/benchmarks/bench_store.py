@@ -0,0 +1,103 @@
+"""Per-process memory of the mmap station store versus parsed station views.
+
+Starts N reader processes at once, like the bot frontends api.js forks. Each
+one either parses stationviews.json and keeps it, or maps stationviews.store
+and looks up every station. With all readers alive, each reports how much its
+resident (RSS) and proportional (PSS, shared pages split between the
+processes that map them) memory grew, and how long loading plus one lookup
+took. PSS needs Linux's /proc/self/smaps_rollup.
+
+Usage: python src/data/benchmarks/bench_store.py [--processes N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READER = f"""
+import json, sys, time
+sys.path.insert(0, {DATA_DIR!r})
+from station_store import StationStore
+
+def memory():
+    fields = {{}}
+    try:
+        with open("/proc/self/smaps_rollup") as rollup:
+            for line in rollup:
+                name, _, rest = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    fields[name] = int(rest.split()[0])
+    except OSError:
+        pass
+    return fields.get("Rss", 0), fields.get("Pss", 0)
+
+mode, path = sys.argv[1:]
+base = memory()
+start = time.perf_counter()
+if mode == "json":
+    with open(path, encoding="utf-8") as views_file:
+        views = json.load(views_file)["stations"]
+    views["neptuno"]
+    keys = list(views)
+    first = time.perf_counter() - start
+    for key in keys:
+        views[key]
+else:
+    store = StationStore(path)
+    store.get("neptuno")
+    first = time.perf_counter() - start
+    for key in store.keys():
+        store.get(key)
+print("ready", flush=True)
+sys.stdin.readline()
+rss, pss = memory()
+print(rss - base[0], pss - base[1], first)
+"""
+
+
+def run_readers(mode, path, processes):
+    readers = [
+        subprocess.Popen([sys.executable, "-c", READER, mode, path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(processes)
+    ]
+    for reader in readers:
+        reader.stdout.readline()
+    results = []
+    for reader in readers:
+        output, _ = reader.communicate("go\n")
+        rss, pss, first = output.split()
+        results.append((int(rss), int(pss), float(first)))
+    return results
+
+
+def main():
+    sys.path.insert(0, DATA_DIR)
+    import stationsdata
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stationsdata.generate_json_file(fmt="min", output_dir=workdir)
+        files = {"json": "stationviews.json", "store": "stationviews.store"}
+
+        print(f"{'reader':<8}{'file (KB)':>11}{'RSS +KB/proc':>14}{'PSS +KB/proc':>14}{'load+get (ms)':>15}")
+        for mode, name in files.items():
+            path = os.path.join(workdir, name)
+            results = run_readers(mode, path, args.processes)
+            rss = sum(row[0] for row in results) / len(results)
+            pss = sum(row[1] for row in results) / len(results)
+            first = sum(row[2] for row in results) / len(results)
+            print(f"{mode:<8}{os.path.getsize(path) / 1024:>11.1f}{rss:>14.0f}{pss:>14.0f}{first * 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Station data pipeline benchmark suite with machine-readable, comparable results.
+
+Runs at the real station count and at synthetic scale-ups (every
+``stationsData`` entry copied as "<key> x<n>"):
+
+- generation: compiling records, building the category indexes/vocabulary and the name search artifact
+- serialization: encode time and size of the station document in every available format
+- cold load: best-of-N load time and tracemalloc peak per format
+- lookups: the bot's commerce, culture and commune filters, autocomplete and station-name search
+- peak memory of the whole generation stage
+
+At scale 1 it also times a full ``generate_json_file`` run (every artifact,
+per format) on the real data. Results go to a JSON file as flat
+``{"scale", "metric", "value", "unit"}`` rows. ``--compare`` prints the
+ratio of each metric to a previous results file.
+
+Usage: python src/data/benchmarks/bench_suite.py [--scales 1,10,100] [--repeat N] [--output PATH] [--compare PATH]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DATA_DIR)
+
+import station_formats  # noqa: E402
+import stationsdata  # noqa: E402
+from station_indexes import build_indexes, build_vocabulary, complete, lookup  # noqa: E402
+from station_records import build_records  # noqa: E402
+from station_search import StationSearch, build_search_artifact  # noqa: E402
+
+SCALES = (1, 10, 100)
+
+# The filters the bot runs ("/buscar comercio", "/buscar cultura", stations by commune).
+FILTER_CATEGORIES = ("commerce", "culture", "communes")
+
+NAME_QUERIES = ("san pablo", "vicente valdes", "nunoa", "baq", "heroes l2", "estacion")
+
+UNITS = {"s": "seconds", "b": "bytes", "us": "microseconds"}
+
+
+def scaled(mapping, scale):
+    """``mapping`` plus ``scale - 1`` suffixed copies of each entry."""
+    result = dict(mapping)
+    for copy in range(1, scale):
+        result.update((f"{key} x{copy}", value) for key, value in mapping.items())
+    return result
+
+
+def best(function, repeat):
+    """Best-of-``repeat`` wall time of ``function()`` and its last result."""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def per_call(function, arguments, repeat):
+    """Median over ``repeat`` rounds of the mean time of one ``function(argument)`` call."""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(argument)
+        rounds.append((time.perf_counter() - start) / len(arguments))
+    return statistics.median(rounds)
+
+
+def peak_memory(function):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def generate(stations_data, schematics, stations_json):
+    records = build_records(stations_data, schematics)
+    document = {
+        "stationsSchematics": schematics,
+        "stationsData": stations_data,
+        "stations": {key: record.to_dict() for key, record in records.items()},
+        "indexes": build_indexes(records),
+        "vocabulary": build_vocabulary(records),
+    }
+    return records, document, build_search_artifact(list(records), stations_json)
+
+
+def _busiest_terms(indexes, category, count=5):
+    """The terms matching the most stations: what users filter by most."""
+    terms = sorted(indexes[category].items(), key=lambda item: (-len(item[1]), item[0]))
+    return [term for term, _keys in terms[:count]]
+
+
+def bench_scale(scale, repeat, formats, workdir):
+    stations_data = scaled(stationsdata.stationsData, scale)
+    schematics = scaled(stationsdata.stationsSchematics, scale)
+    stations_json = stationsdata.load_json("stations.json")
+    rows = {}
+
+    rows["generate.records.s"], records = best(lambda: build_records(stations_data, schematics), repeat)
+    rows["generate.indexes.s"], indexes = best(lambda: build_indexes(records), repeat)
+    rows["generate.vocabulary.s"], vocabulary = best(lambda: build_vocabulary(records), repeat)
+    rows["generate.search.s"], search = best(lambda: build_search_artifact(list(records), stations_json), repeat)
+    rows["generate.total.s"], (_records, document, _search) = best(
+        lambda: generate(stations_data, schematics, stations_json), repeat
+    )
+    rows["generate.peak_memory.b"] = peak_memory(lambda: generate(stations_data, schematics, stations_json))
+
+    for fmt in formats:
+        rows[f"serialize.{fmt}.s"], payload = best(lambda: station_formats.dumps(document, fmt), repeat)
+        path = os.path.join(workdir, station_formats.file_name(f"stationsdata-{scale}", fmt))
+        with open(path, "wb") as output:
+            output.write(payload if isinstance(payload, bytes) else payload.encode("utf-8"))
+        rows[f"size.{fmt}.b"] = os.path.getsize(path)
+        rows[f"load.{fmt}.s"], _loaded = best(lambda: station_formats.load(path, fmt), repeat)
+        rows[f"load.{fmt}.peak_memory.b"] = peak_memory(lambda: station_formats.load(path, fmt))
+        os.remove(path)
+
+    for category in FILTER_CATEGORIES:
+        terms = _busiest_terms(indexes, category)
+        rows[f"lookup.{category}.us"] = per_call(lambda term: lookup(indexes, category, term), terms, repeat) * 1e6
+        prefixes = [term[:3] for term in terms]
+        rows[f"complete.{category}.us"] = per_call(lambda prefix: complete(vocabulary, category, prefix), prefixes, repeat) * 1e6
+
+    station_search = StationSearch(search)
+    rows["lookup.name.us"] = per_call(station_search.search, NAME_QUERIES, repeat) * 1e6
+    rows["lookup.station.us"] = per_call(records.get, list(records)[::max(1, len(records) // 50)], repeat) * 1e6
+    rows["stations.count"] = len(records)
+    return rows
+
+
+def bench_generate_json_file(repeat, formats, workdir):
+    """Full generator runs on the real data, every artifact written."""
+    rows = {}
+    for fmt in formats:
+        output_dir = os.path.join(workdir, f"generate-{fmt}")
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                stationsdata.generate_json_file(fmt=fmt, output_dir=output_dir)
+
+        rows[f"generate_json_file.{fmt}.s"], _result = best(run, repeat)
+        rows[f"generate_json_file.{fmt}.size.b"] = sum(
+            os.path.getsize(os.path.join(output_dir, name)) for name in os.listdir(output_dir)
+        )
+    return rows
+
+
+def _unit(metric):
+    suffix = metric.rsplit(".", 1)[-1]
+    return UNITS.get(suffix, suffix)
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=DATA_DIR, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, repeat):
+    formats = [fmt for fmt in station_formats.FORMATS if fmt != "msgpack" or station_formats.msgpack]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            rows = bench_scale(scale, repeat, formats, workdir)
+            if scale == 1:
+                rows.update(bench_generate_json_file(repeat, formats, workdir))
+            results.extend(
+                {"scale": scale, "metric": metric, "value": value, "unit": _unit(metric)} for metric, value in rows.items()
+            )
+    return {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "formats": formats,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline):
+    """``[(scale, metric, baseline value, current value, ratio)]`` for metrics present in both runs."""
+    previous = {(row["scale"], row["metric"]): row["value"] for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        before = previous.get((row["scale"], row["metric"]))
+        if before is None:
+            continue
+        rows.append((row["scale"], row["metric"], before, row["value"], row["value"] / before if before else None))
+    return rows
+
+
+def _format(value, unit):
+    if unit == "seconds":
+        return f"{value * 1000:.2f} ms"
+    if unit == "bytes":
+        return f"{value / 1024:.1f} KB"
+    if unit == "microseconds":
+        return f"{value:.1f} us"
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)), help="comma-separated station multipliers")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--compare", help="a previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run([int(scale) for scale in args.scales.split(",")], args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=4)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"{'scale':>6}  {'metric':<36}{'before':>14}{'after':>14}{'ratio':>8}")
+        for scale, metric, before, after, ratio in compare(results, baseline):
+            unit = _unit(metric)
+            change = f"{ratio:.2f}x" if ratio is not None else "-"
+            print(f"{scale:>6}  {metric:<36}{_format(before, unit):>14}{_format(after, unit):>14}{change:>8}")
+        return
+
+    print(f"{'scale':>6}  {'metric':<36}{'value':>14}")
+    for row in results["results"]:
+        print(f"{row['scale']:>6}  {row['metric']:<36}{_format(row['value'], row['unit']):>14}")
+
+
+if __name__ == "__main__":
+    main()
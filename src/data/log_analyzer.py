@@ -0,0 +1,359 @@
+"""Streaming timing analysis of the scheduler and data-loader logs.
+
+The logger writes lines like::
+
+    ℹ️ [2025-08-23T09:33:27.008Z] [INFO] [bootstrap.js:9] [initialize] [SCHEDULER] Initializing...
+
+Lines without that prefix (``[DB]`` traces, pretty-printed objects, stack
+traces) are continuations. The only one that carries timing is the
+``Query completed in Nms`` trace. Logs are read line by line. Every
+aggregate is a fixed-size histogram, a bounded heap or a counter keyed by
+function, so memory does not grow with the log size.
+
+Three views come out of a log:
+
+- spans: per-function activations, nested like a call stack. A function's
+  activation runs from its first to its last line. It ends on a completion
+  message ("... complete", "... initialized"), on a line of an enclosing
+  function, or after ``gap`` ms of silence. ``startScheduler > initialize >
+  MetroCore.initialize`` is rebuilt from the log order this way. A
+  single-line activation is an event, not a span. A span is recorded as soon
+  as it closes if every open activation around it is already a span.
+  Otherwise it waits in the innermost one that may still be an event,
+  aggregated by relative path, so what is kept is bounded by the distinct call
+  paths, not by the log size. ``Starting job: X`` / ``Finished job: X`` pairs
+  become exact ``job:X`` spans. Concurrent jobs interleave their lines, so
+  nesting is best-effort there.
+- phases: the time between two consecutive lines, charged to the function of
+  the later one. The top-N slowest are the hot spots. Idle gaps longer than
+  ``gap`` (the scheduler sleeping between ticks) are not phases.
+- stations: phases whose line names a station code ("for station NUO")
+  charged to that station's ``stationsData`` key, i.e. time spent refreshing it.
+
+Usage:
+    python log_analyzer.py LOG [LOG ...] [--top N] [--gap MS] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import math
+import re
+from collections import Counter
+
+from station_history import to_ms
+
+LINE = re.compile(
+    r"\[(?P<time>\d{4}-\d\d-\d\dT[\d:.]+Z?)\] \[(?P<level>[A-Z]+)\] "
+    r"\[(?P<source>[^\]]*)\] \[(?P<function>[^\]]*)\] (?P<message>.*)"
+)
+
+QUERY = re.compile(r"Query completed in (\d+)ms")
+
+JOB = re.compile(r"(Starting|Finished) job: (\S+)")
+
+# Messages that end their function's activation ("Initialization complete.", "Scheduler started successfully").
+END = re.compile(r"\b(complete[d]?|finished|initialized|done|successfully)\b", re.IGNORECASE)
+
+STATION = re.compile(r"\bstation ([A-Z][A-Z0-9]{1,5})\b")
+
+# Functions the logger could not name; they say nothing about where time went.
+UNKNOWN = "unknown"
+
+DEFAULT_GAP = 5000
+
+# Started jobs waiting for their "Finished job" line; past this many the oldest is dropped.
+MAX_OPEN_JOBS = 1000
+
+
+class Histogram:
+    """Power-of-two millisecond buckets (<1, 1-2, 2-4, ... ms), plus count/total/max."""
+
+    BUCKETS = 24
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        bucket = 0 if ms < 1 else min(self.BUCKETS - 1, int(math.log2(ms)) + 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the ``fraction`` quantile."""
+        if not self.count:
+            return None
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= fraction * self.count:
+                return min(self.max, 2 ** bucket)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "max_ms": self.max,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            # "<upper bound ms>": count, for the non-empty buckets
+            "buckets": {str(2 ** bucket): count for bucket, count in enumerate(self.counts) if count},
+        }
+
+
+class _TopN:
+    """The ``n`` largest items seen, by their first element."""
+
+    def __init__(self, n):
+        self.n = n
+        self.heap = []
+        self.sequence = 0
+
+    def add(self, value, item):
+        self.sequence += 1
+        entry = (value, self.sequence, item)
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self):
+        return [item for _value, _sequence, item in sorted(self.heap, reverse=True)]
+
+
+def parse_line(line):
+    """``(ms, level, source, function, message)`` for a structured line, else ``None``."""
+    match = LINE.search(line)
+    if match is None:
+        return None
+    return to_ms(match["time"]), match["level"], match["source"], match["function"], match["message"].rstrip()
+
+
+class LogAnalyzer:
+    """Feed log lines with :meth:`feed` (any number of files), then read :meth:`report`."""
+
+    def __init__(self, top=20, gap=DEFAULT_GAP, station_codes=None):
+        self.gap = gap
+        self.station_codes = station_codes or {}
+        self.lines = 0
+        self.structured = 0
+        self.levels = Counter()
+        self.spans = {}
+        self.phases = {}
+        self.stations = {}
+        self.queries = Histogram()
+        self.slow_spans = _TopN(top)
+        self.slow_phases = _TopN(top)
+        # Open activations: [function, start, last, lines, pending], ``pending`` being the spans closed under
+        # it while it was a single line: ({relative path: Histogram}, _TopN of (relative path, start, ms)).
+        self._stack = []
+        self._jobs = {}
+        self._previous = None
+
+    def _histogram(self, table, name):
+        histogram = table.get(name)
+        if histogram is None:
+            histogram = table[name] = Histogram()
+        return histogram
+
+    def _close(self):
+        """End the innermost activation and hand its span, and what is pending in it, to the activations around it.
+
+        A single line is an event, not a span: what closed under it belongs to its parent.
+        """
+        function, start, last, lines, pending = self._stack.pop()
+        histograms, slowest = pending or ({}, _TopN(self.slow_spans.n))
+        if lines > 1:
+            histograms = {(function, *path): histogram for path, histogram in histograms.items()}
+            own = histograms[(function,)] = Histogram()
+            own.add(last - start)
+            entries = [((function, *path), span_start, ms) for ms, _sequence, (path, span_start, _ms) in slowest.heap]
+            slowest = _TopN(self.slow_spans.n)
+            for path, span_start, ms in entries + [((function,), start, last - start)]:
+                slowest.add(ms, (path, span_start, ms))
+        self._deliver(histograms, slowest)
+
+    def _deliver(self, histograms, slowest):
+        """Record spans given relative to the top of the stack, or park them in an activation that may be an event."""
+        prefix = []
+        for activation in reversed(self._stack):
+            if activation[3] == 1:
+                if activation[4] is None:
+                    activation[4] = ({}, _TopN(self.slow_spans.n))
+                parked, parked_slowest = activation[4]
+                for path, histogram in histograms.items():
+                    self._histogram(parked, (*prefix, *path)).merge(histogram)
+                for ms, _sequence, (path, start, _ms) in slowest.heap:
+                    parked_slowest.add(ms, ((*prefix, *path), start, ms))
+                return
+            prefix.insert(0, activation[0])
+        for path, histogram in histograms.items():
+            self._histogram(self.spans, " > ".join((*prefix, *path))).merge(histogram)
+        for ms, _sequence, (path, start, _ms) in slowest.heap:
+            self.slow_spans.add(ms, {"span": " > ".join((*prefix, *path)), "start": start, "ms": ms})
+
+    def _add_span(self, path, start, duration):
+        self._histogram(self.spans, path).add(duration)
+        self.slow_spans.add(duration, {"span": path, "start": start, "ms": duration})
+
+    def _close_all(self):
+        while self._stack:
+            self._close()
+
+    def _leave(self, function):
+        """``function`` said it finished: close its activation and whatever is nested in it."""
+        while self._stack:
+            done = self._stack[-1][0] == function
+            self._close()
+            if done:
+                return
+
+    def _enter(self, function, ms):
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == function:
+                # Counted first: the activations nested in it are recorded under it, now a span.
+                self._stack[depth][2] = ms
+                self._stack[depth][3] += 1
+                while len(self._stack) > depth + 1:
+                    self._close()
+                return
+        self._stack.append([function, ms, ms, 1, None])
+
+    def feed(self, line):
+        self.lines += 1
+        parsed = parse_line(line)
+        if parsed is None:
+            query = QUERY.search(line)
+            if query:
+                self.queries.add(int(query.group(1)))
+            return
+        ms, level, _source, function, message = parsed
+        self.structured += 1
+        self.levels[level] += 1
+
+        elapsed = ms - self._previous if self._previous is not None else None
+        if elapsed is not None and elapsed > self.gap:
+            self._close_all()
+        if elapsed is not None:
+            if 0 <= elapsed <= self.gap:
+                name = function if function != UNKNOWN else "(unknown)"
+                self._histogram(self.phases, name).add(elapsed)
+                self.slow_phases.add(elapsed, {"function": name, "time": ms, "ms": elapsed, "message": message[:160]})
+                station = STATION.search(message)
+                if station:
+                    key = self.station_codes.get(station.group(1), station.group(1))
+                    self._histogram(self.stations, key).add(elapsed)
+        self._previous = ms
+
+        job = JOB.search(message)
+        if job:
+            action, name = job.groups()
+            if action == "Starting":
+                self._jobs.pop(name, None)
+                self._jobs[name] = ms
+                if len(self._jobs) > MAX_OPEN_JOBS:
+                    # A job that never logged "Finished": forget the oldest rather than grow with the log.
+                    del self._jobs[next(iter(self._jobs))]
+            elif name in self._jobs:
+                start = self._jobs.pop(name)
+                self._add_span(f"job:{name}", start, ms - start)
+
+        if function != UNKNOWN:
+            self._enter(function, ms)
+            if END.search(message):
+                self._leave(function)
+
+    def feed_file(self, path):
+        with open(path, encoding="utf-8", errors="replace") as log:
+            for line in log:
+                self.feed(line)
+        self.finish()
+
+    def finish(self):
+        """Close whatever is still open (end of a file); later input starts fresh spans."""
+        self._close_all()
+        self._jobs.clear()
+        self._previous = None
+
+    def report(self):
+        self.finish()
+
+        def table(histograms):
+            ordered = sorted(histograms.items(), key=lambda item: -item[1].total)
+            return {name: histogram.to_dict() for name, histogram in ordered}
+
+        return {
+            "lines": self.lines,
+            "structured": self.structured,
+            "levels": dict(self.levels.most_common()),
+            "spans": table(self.spans),
+            "phases": table(self.phases),
+            "stations": table(self.stations),
+            "queries": self.queries.to_dict(),
+            "slowest_spans": self.slow_spans.items(),
+            "slowest_phases": self.slow_phases.items(),
+        }
+
+
+def _print_table(title, rows, limit):
+    print(f"\n{title}")
+    print(f"  {'name':<64}{'count':>7}{'total ms':>11}{'p50':>8}{'p99':>8}{'max':>8}")
+    for name, row in list(rows.items())[:limit]:
+        print(
+            f"  {name[-64:]:<64}{row['count']:>7}{row['total_ms']:>11.0f}"
+            f"{row['p50_ms'] or 0:>8.0f}{row['p99_ms'] or 0:>8.0f}{row['max_ms']:>8.0f}"
+        )
+
+
+def main():
+    import stationsdata
+    from station_join import station_codes
+    from station_records import station_aliases
+
+    parser = argparse.ArgumentParser(description="Spans, phases and per-station timing from scheduler logs.")
+    parser.add_argument("logs", nargs="+")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--gap", type=int, default=DEFAULT_GAP, help="ms of silence that ends a span")
+    parser.add_argument("--json", action="store_true", help="print the whole report as JSON")
+    args = parser.parse_args()
+
+    keys = stationsdata.records()
+    aliases = station_aliases(stationsdata.load_json("stations.json"), keys)
+    codes = station_codes(stationsdata.load_json("estadoRed.json"), keys, aliases)
+    codes = {code: key for key, (code, *_rest) in codes.items()}
+    analyzer = LogAnalyzer(top=args.top, gap=args.gap, station_codes=codes)
+    for path in args.logs:
+        analyzer.feed_file(path)
+    report = analyzer.report()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    print(f"{report['lines']} lines, {report['structured']} structured; levels: {report['levels']}")
+    _print_table("Spans (by total time)", report["spans"], args.top)
+    _print_table("Phases: time before a function's line (by total time)", report["phases"], args.top)
+    _print_table("Station refresh time (by station key)", report["stations"], args.top)
+    if report["queries"]["count"]:
+        queries = report["queries"]
+        print(f"\nDB queries: {queries['count']}, p50 {queries['p50_ms']} ms, max {queries['max_ms']} ms")
+    print("\nSlowest phases")
+    for phase in report["slowest_phases"]:
+        print(f"  {phase['ms']:>7.0f} ms  {phase['function']}: {phase['message'][:90]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Bulk loader from stationsdata.py into the ``metro_stations`` table.
+
+Rows are keyed like the table's unique key, ``(line_id, station_code)``, with
+codes and names taken from estadoRed.json and the static columns
+(``transports`` .. ``image_url``, ``commune``) from the compiled station
+records. Every row carries a content hash kept in ``station_data_hashes``;
+only rows whose hash moved are sent, as one multi-row upsert inside a single
+transaction.
+
+MariaDB is reached through the optional ``mariadb`` connector (the same
+``DB_HOST``/``DB_PORT``/``DB_USER``/``DB_PASSWORD``/``METRODB_NAME`` settings
+as the bot); ``--sqlite`` loads into a local SQLite file instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+
+from station_manifest import content_hash
+from station_records import build_records, station_aliases, station_key
+
+try:
+    import mariadb
+except ImportError:  # optional: only needed when loading into MariaDB
+    mariadb = None
+
+# metro_stations column -> StationRecord field ("From stationData[n]" in MetroDB_schema.sql)
+STATIC_COLUMNS = {
+    "transports": "transports",
+    "services": "services",
+    "accessibility": "accessibility",
+    "commerce": "commerce",
+    "amenities": "culture",
+    "image_url": "image",
+    "commune": "communes",
+}
+
+KEY_COLUMNS = ("line_id", "station_code")
+
+COLUMNS = KEY_COLUMNS + ("station_name", "display_name") + tuple(STATIC_COLUMNS)
+
+HASHES_DDL = """
+CREATE TABLE IF NOT EXISTS station_data_hashes (
+    line_id VARCHAR(10) NOT NULL,
+    station_code VARCHAR(255) NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    PRIMARY KEY (line_id, station_code)
+)
+"""
+
+# Local stand-in for metro_stations with just the columns this loader writes.
+SQLITE_STATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS metro_stations (
+    station_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    line_id TEXT NOT NULL,
+    station_code TEXT NOT NULL,
+    station_name TEXT NOT NULL,
+    display_name TEXT,
+    transports TEXT,
+    services TEXT,
+    accessibility TEXT,
+    commerce TEXT,
+    amenities TEXT,
+    image_url TEXT,
+    commune TEXT,
+    UNIQUE (line_id, station_code)
+)
+"""
+
+
+def _column_value(value):
+    if isinstance(value, (list, tuple)):
+        return ", ".join(value) or None
+    return value
+
+
+def build_rows(records, estado_red, stations_json=None):
+    """``metro_stations`` rows (dicts) for every estadoRed.json station with a record.
+
+    estadoRed.json names some stations by an alias ("U.L.A."); pass stations.json
+    so those resolve through its ``aliases``.
+    """
+    aliases = station_aliases(stations_json, records)
+    rows = []
+    for line_id, line in estado_red.items():
+        for station in line.get("estaciones", []):
+            key = station_key(station["nombre"], line_id, records, aliases)
+            if key is None:
+                continue
+            record = records[key]
+            row = {
+                "line_id": line_id.lower(),
+                "station_code": station["codigo"].upper(),
+                "station_name": station["nombre"],
+                "display_name": station["nombre"],
+            }
+            for column, field in STATIC_COLUMNS.items():
+                row[column] = _column_value(getattr(record, field))
+            rows.append(row)
+    return rows
+
+
+def row_hash(row):
+    return content_hash([row[column] for column in COLUMNS])
+
+
+class Dialect:
+    """SQL differences between MariaDB and the SQLite stand-in."""
+
+    def __init__(self, name, placeholder="?"):
+        self.name = name
+        self.placeholder = placeholder
+
+    def upsert(self, table, columns, keys, rows, extra_values=None):
+        """One multi-row upsert statement and its flattened parameters."""
+        extra_values = extra_values or {}
+        row_sql = "(" + ", ".join([self.placeholder] * len(columns) + list(extra_values.values())) + ")"
+        names = ", ".join(list(columns) + list(extra_values))
+        updates = [column for column in columns if column not in keys]
+
+        sql = f"INSERT INTO {table} ({names}) VALUES " + ", ".join([row_sql] * len(rows))
+        if self.name == "sqlite":
+            sql += f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET " + ", ".join(
+                f"{column} = excluded.{column}" for column in updates
+            )
+        else:
+            sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in updates)
+        params = [row[column] for row in rows for column in columns]
+        return sql, params
+
+
+MYSQL = Dialect("mysql")
+SQLITE = Dialect("sqlite")
+
+
+def load_stations(conn, records, estado_red, dialect=MYSQL, batch_size=500, force=False, stations_json=None):
+    """Upsert changed station rows in one transaction; returns ``(changed, unchanged)`` counts."""
+    cursor = conn.cursor()
+    cursor.execute(HASHES_DDL)
+    cursor.execute("SELECT line_id, station_code, content_hash FROM station_data_hashes")
+    known = {(line_id, code): digest for line_id, code, digest in cursor.fetchall()}
+
+    rows = build_rows(records, estado_red, stations_json)
+    for row in rows:
+        row["content_hash"] = row_hash(row)
+    changed = [row for row in rows if force or known.get((row["line_id"], row["station_code"])) != row["content_hash"]]
+    if not changed:
+        return 0, len(rows)
+
+    # metro_stations.location is NOT NULL in MariaDB; new rows get the same placeholder load_data.js uses.
+    extra = {"location": "POINT(0, 0)"} if dialect.name != "sqlite" else {}
+    try:
+        for start in range(0, len(changed), batch_size):
+            batch = changed[start:start + batch_size]
+            cursor.execute(*dialect.upsert("metro_stations", COLUMNS, KEY_COLUMNS, batch, extra))
+            cursor.execute(*dialect.upsert(
+                "station_data_hashes", KEY_COLUMNS + ("content_hash",), KEY_COLUMNS, batch,
+            ))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(changed), len(rows) - len(changed)
+
+
+def connect_mariadb():
+    if mariadb is None:
+        raise RuntimeError("Loading into MariaDB needs the 'mariadb' package (pip install mariadb)")
+    conn = mariadb.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=int(os.environ.get("DB_PORT", 3306)),
+        user=os.environ.get("DB_USER"),
+        password=os.environ.get("DB_PASSWORD"),
+        database=os.environ.get("METRODB_NAME", "MetroDB"),
+    )
+    conn.autocommit = False
+    return conn
+
+
+def main():
+    import stationsdata
+
+    parser = argparse.ArgumentParser(description="Bulk-load stationsdata.py into metro_stations.")
+    parser.add_argument("--sqlite", metavar="PATH", help="load into a local SQLite file instead of MariaDB")
+    parser.add_argument("--force", action="store_true", help="send every row, even if its hash is unchanged")
+    args = parser.parse_args()
+
+    records = build_records(stationsdata.stationsData, stationsdata.stationsSchematics)
+    estado_red = stationsdata.load_json("estadoRed.json")
+    if args.sqlite:
+        conn, dialect = sqlite3.connect(args.sqlite), SQLITE
+        conn.execute(SQLITE_STATIONS_DDL)
+    else:
+        conn, dialect = connect_mariadb(), MYSQL
+
+    try:
+        changed, unchanged = load_stations(
+            conn, records, estado_red, dialect, force=args.force, stations_json=stationsdata.load_json("stations.json"),
+        )
+    finally:
+        conn.close()
+    print(f"metro_stations: {changed} rows upserted, {unchanged} unchanged.")
+
+
+if __name__ == "__main__":
+    main()
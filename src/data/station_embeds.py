@@ -0,0 +1,140 @@
+"""Pre-rendered static parts of the station info embeds, with content versions.
+
+The station card (src/embeds/stationMainEmbed.js) used to be assembled per
+interaction from the positional ``stationsData`` fields. Everything except the
+live status and equipment state only changes with the data. So the generator
+renders it once per station, from the joined views (see :mod:`station_join`),
+into Discord embed JSON. The fields are split to Discord's limits, over more
+than one message when a station has too much to fit in one.
+
+Each station payload carries a ``version``, the hash of its content. At send
+time the bot prepends the live status field to the first embed of the first
+message and can reuse cached messages for as long as the version stays the same.
+"""
+
+from __future__ import annotations
+
+from station_manifest import content_hash
+
+# Discord embed limits.
+TITLE_LIMIT = 256
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+FIELDS_PER_EMBED = 25
+EMBEDS_PER_MESSAGE = 10
+# Shared by every embed of one message.
+EMBED_TOTAL_LIMIT = 6000
+
+# Room left in the first embed for the live fields the bot merges in (estado, accessibility equipment).
+LIVE_FIELDS = 2
+LIVE_RESERVE = LIVE_FIELDS * (FIELD_NAME_LIMIT + FIELD_VALUE_LIMIT)
+
+
+def split_value(value, limit=FIELD_VALUE_LIMIT, separator=", "):
+    """Split ``value`` into chunks of at most ``limit`` characters, preferring ``separator`` boundaries."""
+    chunks, current = [], ""
+    for part in value.split(separator):
+        candidate = f"{current}{separator}{part}" if current else part
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        while len(part) > limit:
+            chunks.append(part[:limit])
+            part = part[limit:]
+        current = part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _fields(name, value, inline=False, separator=", "):
+    """One field per chunk; continuations are marked so the reader can tell the field goes on."""
+    return [
+        {"name": name if index == 0 else f"{name} (cont.)"[:FIELD_NAME_LIMIT], "value": chunk, "inline": inline}
+        for index, chunk in enumerate(split_value(value, separator=separator))
+    ]
+
+
+def _title(view):
+    return (view.get("displayName") or view["name"].title())[:TITLE_LIMIT]
+
+
+def static_fields(view):
+    """The data-only fields of one station card, in display order."""
+    fields = []
+    if view["services"]:
+        fields += _fields("📖 Servicios", ", ".join(view["services"]))
+    if view["accessibility"]:
+        fields += _fields("♿ Accesibilidad", view["accessibility"], separator="\n")
+    if view["commerce"]:
+        fields += _fields("🛍️ Comercio", ", ".join(view["commerce"]))
+    if view["culture"]:
+        fields += _fields("🎭 Cultura", ", ".join(view["culture"]))
+    if view["communes"]:
+        fields += _fields("🏙️ Comuna", ", ".join(view["communes"]), inline=True)
+    if view["transports"]:
+        fields += _fields("🚌 Transporte", ", ".join(view["transports"]), inline=True)
+
+    connections = view.get("connections") or {}
+    summary = []
+    if connections.get("conexiones"):
+        summary.append(", ".join(connections["conexiones"]))
+    if connections.get("bici"):
+        summary.append(f"🚲 {', '.join(connections['bici'])}")
+    if summary:
+        fields += _fields("🔄 Conexiones", "\n".join(summary), separator="\n")
+
+    links = []
+    if view["schematic_image"]:
+        links.append(f"[Plano]({view['schematic_image']})")
+    if view["schematic_pdf"]:
+        links.append(f"[Isométrica (PDF)]({view['schematic_pdf']})")
+    if links:
+        fields += _fields("🗺️ Planos", " · ".join(links), inline=True)
+    return fields
+
+
+def render_station(view):
+    """``{"key", "code", "line", "messages", "version"}`` for one station view.
+
+    ``messages`` is a list of messages, each a list of embeds. Discord's
+    6000-character limit covers all the embeds of one message, so fields are
+    packed into as few embeds and messages as fit the per-field, per-embed and
+    per-message limits. The first message keeps room for the live fields.
+    """
+    first = {"title": _title(view), "fields": []}
+    if view.get("image"):
+        first["image"] = {"url": view["image"]}
+    messages = [[first]]
+    budget = EMBED_TOTAL_LIMIT - LIVE_RESERVE - len(first["title"])
+    slots = FIELDS_PER_EMBED - LIVE_FIELDS
+    for field in static_fields(view):
+        cost = len(field["name"]) + len(field["value"])
+        embed = messages[-1][-1]
+        if cost > budget or len(embed["fields"]) >= slots:
+            embed = {"title": f"{_title(view)} (cont.)"[:TITLE_LIMIT], "fields": []}
+            if cost > budget or len(messages[-1]) >= EMBEDS_PER_MESSAGE:
+                messages.append([])
+                budget = EMBED_TOTAL_LIMIT
+            messages[-1].append(embed)
+            budget -= len(embed["title"])
+            slots = FIELDS_PER_EMBED
+        embed["fields"].append(field)
+        budget -= cost
+
+    payload = {"key": view["key"], "code": view.get("code"), "line": view.get("line"), "messages": messages}
+    return dict(payload, version=content_hash(payload))
+
+
+def build_station_embeds(views):
+    """Pre-render every station of a :func:`station_join.build_station_views` ``stations`` mapping.
+
+    The document ``version`` changes whenever any station's does.
+    """
+    stations = {key: render_station(view) for key, view in sorted(views.items())}
+    return {
+        "version": content_hash({key: payload["version"] for key, payload in stations.items()}),
+        "stations": stations,
+    }
@@ -0,0 +1,138 @@
+"""Express service (ruta roja / ruta verde) stop patterns per line and direction.
+
+On the express lines every station in stations.json has a ``ruta``. At
+"Común" stations every train stops. At "Ruta Roja" or "Ruta Verde" stations
+only trains of that colour stop. express.js used to re-filter a line's
+stations by splitting route strings on every query.
+
+This module computes, once per line:
+
+- the stop sequence of each colour, towards each terminus
+- the previous/next stop of each station on each colour (skip-stop adjacency)
+- the segments between consecutive stops, with the stations skipped
+
+Everything is keyed by the same station keys as ``stationsData``, in the
+line order used by :mod:`station_routes`.
+"""
+
+from __future__ import annotations
+
+from station_records import fold
+from station_routes import line_order
+
+COLORS = ("roja", "verde")
+
+COMMON = "comun"
+
+# Route filters express.js accepts (see resolveRouteCombination).
+FILTERS = ("all", "comun", "roja", "verde", "comun+roja", "comun+verde")
+
+
+def normalize_route(value):
+    """Fold a ``ruta`` value ("Ruta Roja" -> "roja", "Común" -> "comun"); no ``ruta`` means common."""
+    folded = fold(value or "")
+    if folded.startswith("ruta "):
+        folded = folded[len("ruta "):]
+    return folded or COMMON
+
+
+def _serves(route, color):
+    return route == COMMON or route == color
+
+
+def _matches(route, route_filter):
+    return route_filter == "all" or route in route_filter.split("+")
+
+
+def build_express_patterns(stations_json, keys, aliases=None):
+    """Return ``{"lines": {line: pattern}}`` for every line whose stations carry a ``ruta``.
+
+    A pattern holds the line ``stations`` in order, their ``routes`` and
+    ``termini``. It also holds the station list per express.js route
+    ``filters`` and, for each colour:
+
+    ``patterns``  ``{terminus: [stop, ...]}``, the stops a train running towards that terminus makes
+    ``adjacency`` ``{stop: [previous stop, next stop]}`` in line order (``None`` at the ends)
+    ``segments``  ``[{"from", "to", "hops", "skipped"}]`` between consecutive stops, in line order
+    """
+    lines = {}
+    for line, stations in line_order(stations_json, keys, aliases).items():
+        if not any(info.get("ruta") for _key, info in stations):
+            continue
+        order = [key for key, _info in stations]
+        routes = {key: normalize_route(info.get("ruta")) for key, info in stations}
+        position = {key: index for index, key in enumerate(order)}
+
+        patterns, adjacency, segments = {}, {}, {}
+        for color in COLORS:
+            stops = [key for key in order if _serves(routes[key], color)]
+            patterns[color] = {order[-1]: stops, order[0]: stops[::-1]}
+            adjacency[color] = {
+                stop: [stops[index - 1] if index else None, stops[index + 1] if index + 1 < len(stops) else None]
+                for index, stop in enumerate(stops)
+            }
+            segments[color] = [
+                {
+                    "from": a,
+                    "to": b,
+                    "hops": position[b] - position[a],
+                    "skipped": order[position[a] + 1:position[b]],
+                }
+                for a, b in zip(stops, stops[1:])
+            ]
+
+        lines[line] = {
+            "stations": order,
+            "routes": routes,
+            "termini": [order[0], order[-1]],
+            "filters": {name: [key for key in order if _matches(routes[key], name)] for name in FILTERS},
+            "patterns": patterns,
+            "adjacency": adjacency,
+            "segments": segments,
+        }
+    return {"lines": lines}
+
+
+class ExpressPatterns:
+    """Lookups over a :func:`build_express_patterns` document."""
+
+    def __init__(self, document):
+        self.lines = document["lines"]
+        # Position of every stop along each service, towards the second terminus; "todas" stops everywhere.
+        self._positions = {}
+        for line, pattern in self.lines.items():
+            services = {"todas": pattern["stations"]}
+            services.update((color, pattern["patterns"][color][pattern["termini"][1]]) for color in COLORS)
+            self._positions[line] = {
+                service: {stop: index for index, stop in enumerate(stops)} for service, stops in services.items()
+            }
+
+    def is_express(self, line):
+        return line.lower() in self.lines
+
+    def stations(self, line, route_filter="all"):
+        """Stations of ``line`` served under an express.js route filter ("roja", "comun+verde", ...)."""
+        pattern = self.lines.get(line.lower())
+        if pattern is None:
+            return None
+        return pattern["filters"].get("+".join(normalize_route(part) for part in route_filter.split("+")))
+
+    def next_stop(self, line, station, color, towards):
+        """The stop after ``station`` for a ``color`` train heading to the ``towards`` terminus."""
+        pattern = self.lines[line.lower()]
+        previous_stop, next_stop = pattern["adjacency"][color].get(station, (None, None))
+        return next_stop if towards == pattern["termini"][1] else previous_stop
+
+    def stops_between(self, line, origin, destination):
+        """Stops made from ``origin`` to ``destination``: ``{"todas": n, "roja": n, "verde": n}``.
+
+        ``todas`` is the all-stop service. A colour is ``None`` when it does not serve both stations.
+        """
+        services = self._positions.get(line.lower())
+        if services is None or origin not in services["todas"] or destination not in services["todas"]:
+            return None
+        return {
+            service: abs(positions[destination] - positions[origin])
+            if origin in positions and destination in positions else None
+            for service, positions in services.items()
+        }
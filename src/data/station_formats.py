@@ -0,0 +1,179 @@
+"""Serialized formats for the generated station data and their loaders.
+
+``json``      pretty-printed, what the generator always wrote (``indent=4``)
+``min``       minified JSON, UTF-8 kept as-is
+``columnar``  JSON where mappings/lists of same-shaped records become column
+              tables and their strings are interned into one shared table, so
+              values like "Máquinas de carga autoservicio" are stored once
+``msgpack``   MessagePack; needs the optional ``msgpack`` package
+
+Every format round-trips through :func:`dumps`/:func:`loads` to the same
+document, so any of them can back the bot's cold start.
+"""
+
+from __future__ import annotations
+
+import json
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for the msgpack format
+    msgpack = None
+
+FORMATS = ("json", "min", "columnar", "msgpack")
+
+EXTENSIONS = {
+    "json": ".json",
+    "min": ".min.json",
+    "columnar": ".columnar.json",
+    "msgpack": ".msgpack",
+}
+
+TABLE = "$table"
+
+
+def file_name(base, fmt):
+    """``stationsdata`` + ``min`` -> ``stationsdata.min.json``."""
+    return f"{base}{EXTENSIONS[fmt]}"
+
+
+def detect_format(path):
+    for fmt in sorted(FORMATS, key=lambda name: -len(EXTENSIONS[name])):
+        if path.endswith(EXTENSIONS[fmt]):
+            return fmt
+    raise ValueError(f"Cannot tell the station data format of '{path}'")
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise RuntimeError("The msgpack format needs the 'msgpack' package (pip install msgpack)")
+
+
+def dumps(document, fmt="json"):
+    """Serialize ``document``; returns ``str`` for the JSON formats and ``bytes`` for msgpack."""
+    if fmt == "json":
+        return json.dumps(document, indent=4)
+    if fmt == "min":
+        return json.dumps(document, separators=(",", ":"), ensure_ascii=False)
+    if fmt == "columnar":
+        return json.dumps(encode_columnar(document), separators=(",", ":"), ensure_ascii=False)
+    if fmt == "msgpack":
+        _require_msgpack()
+        return msgpack.packb(document, use_bin_type=True)
+    raise ValueError(f"Unknown station data format '{fmt}' (expected one of {', '.join(FORMATS)})")
+
+
+def loads(payload, fmt="json"):
+    if fmt in ("json", "min"):
+        return json.loads(payload)
+    if fmt == "columnar":
+        return decode_columnar(json.loads(payload))
+    if fmt == "msgpack":
+        _require_msgpack()
+        return msgpack.unpackb(payload, raw=False)
+    raise ValueError(f"Unknown station data format '{fmt}' (expected one of {', '.join(FORMATS)})")
+
+
+def dump(document, path, fmt=None):
+    fmt = fmt or detect_format(path)
+    payload = dumps(document, fmt)
+    mode, encoding = ("wb", None) if isinstance(payload, bytes) else ("w", "utf-8")
+    with open(path, mode, encoding=encoding) as output:
+        output.write(payload)
+
+
+def load(path, fmt=None):
+    """Load a station data file written in any of :data:`FORMATS`."""
+    fmt = fmt or detect_format(path)
+    if fmt == "msgpack":
+        with open(path, "rb") as source:
+            return loads(source.read(), fmt)
+    with open(path, encoding="utf-8") as source:
+        return loads(source.read(), fmt)
+
+
+# Columnar layout ----------------------------------------------------------
+
+class _Strings:
+    def __init__(self):
+        self.table = []
+        self._ids = {}
+
+    def intern(self, value):
+        if value not in self._ids:
+            self._ids[value] = len(self.table)
+            self.table.append(value)
+        return self._ids[value]
+
+
+def _is_records(values):
+    """Two or more dicts sharing one key set: worth storing as columns."""
+    if len(values) < 2 or not all(isinstance(value, dict) for value in values):
+        return False
+    fields = values[0].keys()
+    return bool(fields) and all(value.keys() == fields for value in values)
+
+
+def _column(values, strings):
+    if all(value is None or isinstance(value, str) for value in values):
+        return {"kind": "str", "values": [None if value is None else strings.intern(value) for value in values]}
+    if all(isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value) for value in values):
+        return {"kind": "strlist", "values": [[strings.intern(item) for item in value] for value in values]}
+    return {"kind": "raw", "values": [_encode(value, strings) for value in values]}
+
+
+def _table(keys, rows, strings):
+    fields = list(rows[0])
+    return {TABLE: {
+        "keys": None if keys is None else [strings.intern(key) for key in keys],
+        "columns": {field: _column([row[field] for row in rows], strings) for field in fields},
+    }}
+
+
+def _encode(value, strings):
+    if isinstance(value, dict):
+        if _is_records(list(value.values())):
+            return _table(list(value), list(value.values()), strings)
+        return {key: _encode(item, strings) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if _is_records(list(value)):
+            return _table(None, list(value), strings)
+        return [_encode(item, strings) for item in value]
+    return value
+
+
+def encode_columnar(document):
+    strings = _Strings()
+    root = _encode(document, strings)
+    return {"format": "columnar", "version": 1, "strings": strings.table, "root": root}
+
+
+def _decode_column(column, strings):
+    kind, values = column["kind"], column["values"]
+    if kind == "str":
+        return [None if value is None else strings[value] for value in values]
+    if kind == "strlist":
+        return [[strings[item] for item in value] for value in values]
+    return [_decode(value, strings) for value in values]
+
+
+def _decode(value, strings):
+    if isinstance(value, dict):
+        if len(value) == 1 and TABLE in value:
+            table = value[TABLE]
+            columns = {field: _decode_column(column, strings) for field, column in table["columns"].items()}
+            length = len(next(iter(columns.values()))) if columns else 0
+            rows = [{field: values[row] for field, values in columns.items()} for row in range(length)]
+            if table["keys"] is None:
+                return rows
+            return {strings[key]: row for key, row in zip(table["keys"], rows)}
+        return {key: _decode(item, strings) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item, strings) for item in value]
+    return value
+
+
+def decode_columnar(payload):
+    if payload.get("format") != "columnar":
+        raise ValueError("Not a columnar station data document")
+    return _decode(payload["root"], payload["strings"])
@@ -0,0 +1,240 @@
+"""Offline nearest-station and commune indexes built alongside the station data.
+
+Station coordinates live in ``metro_stations.latitude``/``longitude``. The
+``export`` command copies them once into stationCoordinates.json next to this
+script, keyed by ``stationsData`` key. The generator then buckets the points
+into a fixed grid of ``CELL_DEGREES`` cells, so k-nearest and radius queries
+only look at the cells around the query point. Together with the commune ->
+stations index, answering "nearest station" or "stations in commune X" needs
+neither MariaDB nor a scan over every station.
+
+Usage:
+    python station_geo.py export [--output PATH]
+    python station_geo.py nearest LAT LON [-k N] [--radius METERS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import math
+import os
+
+from station_records import fold, station_aliases, station_key
+
+COORDINATES_FILE = "stationCoordinates.json"
+
+# About 1.1 km north-south; a Santiago station has a handful of neighbours per cell.
+CELL_DEGREES = 0.01
+
+EARTH_RADIUS = 6_371_000
+
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters (haversine)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def _cell(lat, lon, size):
+    return math.floor(lat / size), math.floor(lon / size)
+
+
+def build_geo_index(coordinates, records, cell=CELL_DEGREES):
+    """Grid-bucketed points plus the commune index.
+
+    ``coordinates`` maps station keys to ``[lat, lon]``. The document holds
+    ``points`` (``[key, lat, lon]`` sorted by key), ``cells`` (``"row,col"`` ->
+    point indexes), ``communes`` (folded commune -> label and station keys)
+    and ``unlocated``, the stations that have no coordinates yet.
+    """
+    points = [[key, float(lat), float(lon)] for key, (lat, lon) in sorted(coordinates.items()) if key in records]
+    cells = {}
+    for index, (_key, lat, lon) in enumerate(points):
+        row, col = _cell(lat, lon, cell)
+        cells.setdefault(f"{row},{col}", []).append(index)
+
+    communes = {}
+    for key, record in records.items():
+        for name in record.communes:
+            entry = communes.setdefault(fold(name), {"label": name, "stations": []})
+            entry["stations"].append(key)
+
+    return {
+        "cell": cell,
+        "points": points,
+        "cells": dict(sorted(cells.items())),
+        "communes": {term: dict(entry, stations=sorted(entry["stations"])) for term, entry in sorted(communes.items())},
+        "unlocated": sorted(key for key in records if key not in coordinates),
+    }
+
+
+def nearest_brute(points, lat, lon, k=1):
+    """Reference linear scan: the ``k`` closest ``(meters, key)`` pairs."""
+    return heapq.nsmallest(k, ((distance(lat, lon, p_lat, p_lon), key) for key, p_lat, p_lon in points))
+
+
+class StationGeo:
+    """In-memory k-nearest, radius and commune queries over a :func:`build_geo_index` document."""
+
+    def __init__(self, document):
+        self.cell = document["cell"]
+        self.points = document["points"]
+        self.communes = document["communes"]
+        self.cells = {}
+        for name, indexes in document["cells"].items():
+            row, col = name.split(",")
+            self.cells[int(row), int(col)] = indexes
+        if self.cells:
+            rows = [row for row, _col in self.cells]
+            cols = [col for _row, col in self.cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+            # The narrowest a cell gets over the indexed points (east-west, furthest from the equator),
+            # with a little slack for great circles being shorter than parallels: a lower bound on how
+            # far each ring of cells reaches.
+            widest = max(abs(lat) for _key, lat, _lon in self.points) + self.cell
+            self._step = 0.99 * self.cell * METERS_PER_DEGREE * max(math.cos(math.radians(widest)), 1e-6)
+
+    def _inside(self, row, col):
+        low_row, high_row, low_col, high_col = self._bounds
+        return low_row <= row <= high_row and low_col <= col <= high_col
+
+    def _ring(self, row, col, radius):
+        """Cells exactly ``radius`` steps (Chebyshev) away from ``(row, col)``, clipped to the occupied grid."""
+        if radius == 0:
+            yield row, col
+            return
+        low_row, high_row, low_col, high_col = self._bounds
+        cols = range(max(col - radius, low_col), min(col + radius, high_col) + 1)
+        for edge in (row - radius, row + radius):
+            if low_row <= edge <= high_row:
+                for ring_col in cols:
+                    yield edge, ring_col
+        rows = range(max(row - radius + 1, low_row), min(row + radius - 1, high_row) + 1)
+        for edge in (col - radius, col + radius):
+            if low_col <= edge <= high_col:
+                for ring_row in rows:
+                    yield ring_row, edge
+
+    def _max_ring(self, row, col):
+        low_row, high_row, low_col, high_col = self._bounds
+        return max(abs(row - low_row), abs(row - high_row), abs(col - low_col), abs(col - high_col))
+
+    def nearest(self, lat, lon, k=1):
+        """The ``k`` closest stations as ``[(meters, key), ...]``, nearest first."""
+        if not self.cells or k <= 0:
+            return []
+        row, col = _cell(lat, lon, self.cell)
+        if not self._inside(row, col):
+            # Far outside the network (or latitude and longitude swapped): the ring distance bound only
+            # holds near the indexed points, and a linear scan is cheaper than walking empty rings anyway.
+            return nearest_brute(self.points, lat, lon, k)
+        best = []  # max-heap of (-meters, key)
+        for radius in range(self._max_ring(row, col) + 1):
+            # Every point in this ring or beyond is at least (radius - 1) cells away.
+            if len(best) == k and (radius - 1) * self._step > -best[0][0]:
+                break
+            for position in self._ring(row, col, radius):
+                for index in self.cells.get(position, ()):
+                    key, p_lat, p_lon = self.points[index]
+                    item = (-distance(lat, lon, p_lat, p_lon), key)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+        return sorted((-meters, key) for meters, key in best)
+
+    def within(self, lat, lon, meters):
+        """Stations within ``meters`` as ``[(meters, key), ...]``, nearest first."""
+        if not self.cells:
+            return []
+        row, col = _cell(lat, lon, self.cell)
+        if not self._inside(row, col):
+            candidates = range(len(self.points))
+        else:
+            # However large the radius, only the occupied part of the grid is scanned.
+            low_row, high_row, low_col, high_col = self._bounds
+            reach = math.ceil(meters / self._step) + 1
+            candidates = [
+                index
+                for cell_row in range(max(row - reach, low_row), min(row + reach, high_row) + 1)
+                for cell_col in range(max(col - reach, low_col), min(col + reach, high_col) + 1)
+                for index in self.cells.get((cell_row, cell_col), ())
+            ]
+        found = []
+        for index in candidates:
+            key, p_lat, p_lon = self.points[index]
+            meters_away = distance(lat, lon, p_lat, p_lon)
+            if meters_away <= meters:
+                found.append((meters_away, key))
+        return sorted(found)
+
+    def in_commune(self, name):
+        """Station keys in a commune, matched on its folded name ("Ñuñoa", "nunoa")."""
+        entry = self.communes.get(fold(name))
+        return entry["stations"] if entry else []
+
+
+def export_coordinates(conn, keys, aliases=None):
+    """``{station key: [lat, lon]}`` from ``metro_stations`` rows that have coordinates."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT line_id, station_name, latitude, longitude FROM metro_stations "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )
+    coordinates = {}
+    for line, name, lat, lon in cursor.fetchall():
+        key = station_key(name, (line or "").lower(), keys, aliases)
+        if key is not None:
+            coordinates[key] = [float(lat), float(lon)]
+    return dict(sorted(coordinates.items()))
+
+
+def load_coordinates(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as coordinates_file:
+        return json.load(coordinates_file)
+
+
+def main():
+    import stationsdata
+
+    parser = argparse.ArgumentParser(description="Nearest-station and commune indexes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="copy metro_stations coordinates into the coordinates file")
+    export_parser.add_argument("--output", default=os.path.join(stationsdata.DATA_DIR, COORDINATES_FILE))
+    nearest_parser = commands.add_parser("nearest", help="stations closest to a point")
+    nearest_parser.add_argument("lat", type=float)
+    nearest_parser.add_argument("lon", type=float)
+    nearest_parser.add_argument("-k", type=int, default=5)
+    nearest_parser.add_argument("--radius", type=float, help="list every station within this many meters instead")
+    args = parser.parse_args()
+
+    records = stationsdata.records()
+    if args.command == "export":
+        from station_db_loader import connect_mariadb
+
+        conn = connect_mariadb()
+        try:
+            coordinates = export_coordinates(conn, records, station_aliases(stationsdata.load_json("stations.json"), records))
+        finally:
+            conn.close()
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(coordinates, output, indent=4, ensure_ascii=False)
+        print(f"{len(coordinates)} of {len(records)} stations have coordinates; written to {args.output}.")
+        return
+
+    coordinates = load_coordinates(os.path.join(stationsdata.DATA_DIR, COORDINATES_FILE))
+    geo = StationGeo(build_geo_index(coordinates, records))
+    results = geo.within(args.lat, args.lon, args.radius) if args.radius else geo.nearest(args.lat, args.lon, args.k)
+    for meters, key in results:
+        print(f"{meters:8.0f} m  {key}")
+
+
+if __name__ == "__main__":
+    main()
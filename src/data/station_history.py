@@ -0,0 +1,310 @@
+"""Columnar, delta-encoded history of network status snapshots.
+
+apiChanges.json keeps the whole estadoRed.json state (every line, every
+station) for each change, so it grows with snapshots x network size. This
+store keeps one event per *transition* instead. An event is recorded when a
+line or station changes its ``(estado, descripcion, mensaje)``, so history
+grows with the number of changes.
+
+Document layout::
+
+    entities   [[id, line, station key or None], ...]   id is a station code ("SP") or a line ("l1")
+    states     [[estado, descripcion, mensaje], ...]    interned, referenced by index
+    base       {"time": ms, "states": [state index or -1 per entity]}, the state at the start of history
+    segments   [{"start": ms, "time": [delta ms, ...], "entity": [...], "state": [...]}, ...]
+    last       ms of the newest ingested snapshot
+
+Columns are parallel lists. ``time`` holds deltas from the previous event
+(the first from ``start``). Ingesting appends a segment; :func:`compact`
+folds old events into ``base`` and merges the segments back into one.
+
+Usage:
+    python station_history.py ingest SNAPSHOTS.json [--store PATH]
+    python station_history.py status STATION [--since ISO] [--until ISO] [--store PATH]
+    python station_history.py outages LINE [--since ISO] [--until ISO] [--store PATH]
+    python station_history.py compact [--keep-days N] [--store PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import os
+from datetime import datetime, timezone
+
+from station_records import station_key
+
+HISTORY_FILE = "stationhistory.json"
+
+# estadoRed.json reports "1" for a line or station running normally.
+OPERATIONAL = frozenset({"1"})
+
+DAY = 24 * 60 * 60 * 1000
+
+
+def to_ms(timestamp):
+    """ISO 8601 ("2025-08-22T19:31:58.234Z") -> epoch milliseconds."""
+    return round(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+def to_iso(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def empty_history():
+    return {"entities": [], "states": [], "base": {"time": None, "states": []}, "segments": [], "last": None}
+
+
+def _snapshot_states(snapshot):
+    """``{entity id: (line, display name, state)}`` for the lines and stations of one snapshot."""
+    states = {}
+    for line, info in snapshot.items():
+        if not isinstance(info, dict):
+            continue
+        states[line] = (line, None, (info.get("estado"), info.get("mensaje_app"), info.get("mensaje")))
+        for station in info.get("estaciones", []):
+            state = (station.get("estado"), station.get("descripcion"), station.get("mensaje"))
+            states[station["codigo"].upper()] = (line, station["nombre"], state)
+    return states
+
+
+def _replay_current(history):
+    """Latest state index per entity, after every stored event."""
+    current = list(history["base"]["states"])
+    current.extend([-1] * (len(history["entities"]) - len(current)))
+    for segment in history["segments"]:
+        for entity, state in zip(segment["entity"], segment["state"]):
+            current[entity] = state
+    return current
+
+
+def ingest(history, snapshots, keys=None, aliases=None):
+    """Append the transitions in ``snapshots`` (any order) newer than ``history["last"]``; returns the event count.
+
+    ``keys``/``aliases`` resolve station names to ``stationsData`` keys for
+    lookups by key.
+    """
+    entity_index = {entity[0]: position for position, entity in enumerate(history["entities"])}
+    state_index = {tuple(state): position for position, state in enumerate(history["states"])}
+    current = _replay_current(history)
+    times, entities, states = [], [], []
+
+    dated = sorted((to_ms(snapshot["timestamp"]), snapshot) for snapshot in snapshots if snapshot.get("timestamp"))
+    for ms, snapshot in dated:
+        if history["last"] is not None and ms <= history["last"]:
+            continue
+        for entity_id, (line, name, state) in _snapshot_states(snapshot).items():
+            if entity_id not in entity_index:
+                key = station_key(name, line, keys, aliases) if name and keys is not None else None
+                entity_index[entity_id] = len(history["entities"])
+                history["entities"].append([entity_id, line, key])
+                current.append(-1)
+            if state not in state_index:
+                state_index[state] = len(history["states"])
+                history["states"].append(list(state))
+            entity, value = entity_index[entity_id], state_index[state]
+            if current[entity] != value:
+                current[entity] = value
+                times.append(ms)
+                entities.append(entity)
+                states.append(value)
+        history["last"] = ms
+
+    if history["base"]["time"] is None and dated:
+        history["base"]["time"] = dated[0][0]
+    if times:
+        history["segments"].append(_encode_segment(times, entities, states))
+    return len(times)
+
+
+def _encode_segment(times, entities, states):
+    deltas = [0] + [b - a for a, b in zip(times, times[1:])]
+    return {"start": times[0], "time": deltas, "entity": entities, "state": states}
+
+
+def _decode_segment(segment):
+    times, now = [], segment["start"]
+    for delta in segment["time"]:
+        now += delta
+        times.append(now)
+    return times
+
+
+def compact(history, before=None):
+    """Fold events older than ``before`` (ms) into ``base`` and merge all segments into one.
+
+    Events that repeat the state already in effect are dropped. Returns the number of events removed.
+    """
+    size = len(history["entities"])
+    base = list(history["base"]["states"]) + [-1] * (size - len(history["base"]["states"]))
+    kept_times, kept_entities, kept_states = [], [], []
+    current = list(base)
+    removed = 0
+
+    events = []
+    for segment in history["segments"]:
+        events.extend(zip(_decode_segment(segment), segment["entity"], segment["state"]))
+    events.sort(key=lambda event: event[0])
+
+    for ms, entity, state in events:
+        if current[entity] == state:
+            removed += 1
+            continue
+        current[entity] = state
+        if before is not None and ms < before:
+            base[entity] = state
+            removed += 1
+            continue
+        kept_times.append(ms)
+        kept_entities.append(entity)
+        kept_states.append(state)
+
+    history["base"]["states"] = base
+    if before is not None and history["base"]["time"] is not None:
+        history["base"]["time"] = max(history["base"]["time"], before)
+    history["segments"] = [_encode_segment(kept_times, kept_entities, kept_states)] if kept_times else []
+    return removed
+
+
+class StatusHistory:
+    """Range queries over a history document, by station code, line or ``stationsData`` key."""
+
+    def __init__(self, history):
+        self.history = history
+        self.states = [tuple(state) for state in history["states"]]
+        self.lines = {}
+        self._ids = {}
+        for position, (entity_id, line, key) in enumerate(history["entities"]):
+            self._ids[entity_id] = position
+            if key:
+                self._ids[key] = position
+            self.lines.setdefault(line, []).append(position)
+
+        self.base_time = history["base"]["time"]
+        base = history["base"]["states"]
+        self._base = base + [-1] * (len(history["entities"]) - len(base))
+        self._times = [[] for _ in history["entities"]]
+        self._values = [[] for _ in history["entities"]]
+        events = []
+        for segment in history["segments"]:
+            events.extend(zip(_decode_segment(segment), segment["entity"], segment["state"]))
+        for ms, entity, state in sorted(events, key=lambda event: event[0]):
+            self._times[entity].append(ms)
+            self._values[entity].append(state)
+
+    def entity(self, name):
+        position = self._ids.get(name)
+        if position is None:
+            position = self._ids.get(name.upper())
+        return position
+
+    def _state(self, index):
+        if index == -1:
+            return None
+        estado, description, message = self.states[index]
+        return {"estado": estado, "descripcion": description, "mensaje": message}
+
+    def state_at(self, name, ms):
+        position = self.entity(name)
+        if position is None:
+            return None
+        times = self._times[position]
+        index = bisect.bisect_right(times, ms) - 1
+        return self._state(self._values[position][index] if index >= 0 else self._base[position])
+
+    def status(self, name, since=None, until=None):
+        """``[{"from", "to", "estado", ...}]``: the states of a station or line overlapping ``[since, until)``.
+
+        ``to`` is ``None`` for a state still in effect at the end of history.
+        """
+        position = self.entity(name)
+        if position is None:
+            return None
+        times, values = self._times[position], self._values[position]
+        spans = []
+        start = self.base_time
+        state = self._base[position]
+        for ms, value in zip(times, values):
+            spans.append((start, ms, state))
+            start, state = ms, value
+        spans.append((start, None, state))
+
+        result = []
+        for start, end, state in spans:
+            if state == -1 or start == end:
+                continue
+            if since is not None and end is not None and end <= since:
+                continue
+            if until is not None and start is not None and start >= until:
+                continue
+            result.append(dict(self._state(state), **{"from": start, "to": end}))
+        return result
+
+    def outages(self, line, since=None, until=None, operational=OPERATIONAL):
+        """Non-operational spans of ``line`` and its stations overlapping ``[since, until)``."""
+        outages = []
+        for position in self.lines.get(line.lower(), []):
+            entity_id, _line, key = self.history["entities"][position]
+            for span in self.status(entity_id, since, until):
+                if span["estado"] not in operational:
+                    outages.append(dict(span, id=entity_id, key=key))
+        return sorted(outages, key=lambda span: (span["from"] or 0, span["id"]))
+
+    def event_count(self):
+        return sum(len(times) for times in self._times)
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return empty_history()
+    with open(path, encoding="utf-8") as history_file:
+        return json.load(history_file)
+
+
+def main():
+    import stationsdata
+    from station_manifest import write_file
+    from station_records import station_aliases
+
+    parser = argparse.ArgumentParser(description="Columnar network status history.")
+    parser.add_argument("--store", default=os.path.join(stationsdata.DATA_DIR, HISTORY_FILE))
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="append the transitions of a snapshot list (apiChanges.json)")
+    ingest_parser.add_argument("snapshots")
+    for name in ("status", "outages"):
+        query_parser = commands.add_parser(name)
+        query_parser.add_argument("target", help="station key or code" if name == "status" else "line id")
+        query_parser.add_argument("--since")
+        query_parser.add_argument("--until")
+    compact_parser = commands.add_parser("compact", help="fold old events into the base state")
+    compact_parser.add_argument("--keep-days", type=float, default=30)
+    args = parser.parse_args()
+
+    history = load_history(args.store)
+    if args.command in ("ingest", "compact"):
+        if args.command == "ingest":
+            with open(args.snapshots, encoding="utf-8") as snapshots_file:
+                snapshots = json.load(snapshots_file)
+            keys = stationsdata.records()
+            count = ingest(history, snapshots, keys, station_aliases(stationsdata.load_json("stations.json"), keys))
+            print(f"{count} transition(s) from {len(snapshots)} snapshot(s).")
+        else:
+            removed = compact(history, history["last"] - int(args.keep_days * DAY) if history["last"] else None)
+            print(f"Compacted away {removed} event(s).")
+        write_file(args.store, json.dumps(history, separators=(",", ":"), ensure_ascii=False))
+        return
+
+    query = StatusHistory(history)
+    since = to_ms(args.since) if args.since else None
+    until = to_ms(args.until) if args.until else None
+    spans = query.status(args.target, since, until) if args.command == "status" else query.outages(args.target, since, until)
+    for span in spans or []:
+        end = to_iso(span["to"]) if span["to"] is not None else "now"
+        start = to_iso(span["from"]) if span["from"] is not None else "?"
+        label = f"{span['id']} " if "id" in span else ""
+        print(f"{start} -> {end}  {label}estado {span['estado']}: {span['descripcion'] or ''} {span['mensaje'] or ''}".rstrip())
+
+
+if __name__ == "__main__":
+    main()
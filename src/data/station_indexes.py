@@ -0,0 +1,74 @@
+"""Inverted indexes and autocomplete vocabularies over compiled station records.
+
+For every list category of a :class:`station_records.StationRecord` the
+generator emits ``term -> sorted station keys`` plus a sorted vocabulary,
+so commerce/culture searches are a dictionary hit and autocomplete is a
+binary search on a prefix instead of a scan over every station.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from station_records import fold
+
+CATEGORIES = ("transports", "services", "commerce", "culture", "communes")
+
+
+def build_indexes(records, categories=CATEGORIES):
+    """Return ``{category: {folded term: [station keys]}}`` for the given records."""
+    indexes = {category: {} for category in categories}
+    for key, record in records.items():
+        for category in categories:
+            for item in getattr(record, category):
+                term = fold(item)
+                if term:
+                    indexes[category].setdefault(term, set()).add(key)
+
+    return {
+        category: {term: sorted(keys) for term, keys in sorted(index.items())}
+        for category, index in indexes.items()
+    }
+
+
+def build_vocabulary(records, categories=CATEGORIES):
+    """Return ``{category: [{"term", "label"}]}`` sorted by folded term.
+
+    When the data spells a term several ways ("Bibliometro" / "BiblioMetro")
+    the most frequent spelling becomes the label.
+    """
+    spellings = {category: {} for category in categories}
+    for record in records.values():
+        for category in categories:
+            for item in getattr(record, category):
+                term = fold(item)
+                if term:
+                    spellings[category].setdefault(term, Counter())[item] += 1
+
+    return {
+        category: [
+            {"term": term, "label": counts.most_common(1)[0][0]}
+            for term, counts in sorted(terms.items())
+        ]
+        for category, terms in spellings.items()
+    }
+
+
+def lookup(indexes, category, term):
+    """Station keys whose ``category`` contains ``term`` (any spelling)."""
+    return indexes.get(category, {}).get(fold(term), [])
+
+
+def complete(vocabulary, category, prefix, limit=25):
+    """Vocabulary entries of ``category`` whose folded term starts with ``prefix``."""
+    entries = vocabulary.get(category, [])
+    prefix = fold(prefix)
+    start = bisect_left(entries, prefix, key=lambda entry: entry["term"])
+    matches = []
+    for entry in islice(entries, start, None):
+        if not entry["term"].startswith(prefix) or len(matches) >= limit:
+            break
+        matches.append(entry)
+    return matches
@@ -0,0 +1,143 @@
+"""Bidirectional transport/intermodal index joining every source of station connections.
+
+What a station connects to is spread over three places:
+
+- slot 0 of ``stationsData``, a free-text list ("Buses, Aeropuerto", "Lineacero", "tren")
+- stationConnections.json, ``conexiones`` and ``bici`` per line and station
+- intermodalBuses.json, the bus services at the intermodal stations, keyed by bare station name.
+  "Recorrido/Operador" is a route id ("E05") for ``Red`` services and an operator ("Flixbus") otherwise.
+
+The generator parses and joins them once. Each station key maps to its
+modes, connections and bus services. Each mode, route and operator maps back
+to its station keys. Terms are compared without accents, case or spaces, so
+"Lineacero" / "Línea Cero" and "Condor bus" / "Condor Bus" are one term.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+
+from station_records import fold, split_key, station_key
+
+# Service type for route ids in intermodalBuses.json; every other type names an operator.
+ROUTE_SERVICE = "red"
+
+# Spellings of one service type.
+SERVICE_ALIASES = {"otro": "otros"}
+
+INDEXES = ("modes", "routes", "operators")
+
+
+def term(label):
+    """Comparison form of a mode, route or operator ("Línea Cero" -> "lineacero")."""
+    return fold(label).replace(" ", "")
+
+
+def _platforms(keys):
+    """Folded station name -> every key of that station (one per line at transfer stations)."""
+    platforms = {}
+    for key in keys:
+        platforms.setdefault(split_key(key)[0], []).append(key)
+    return platforms
+
+
+def _add(index, label, key):
+    entry = index.setdefault(term(label), {"labels": Counter(), "stations": set()})
+    entry["labels"][label] += 1
+    entry["stations"].add(key)
+
+
+def _finish(index):
+    return {
+        name: {"label": entry["labels"].most_common(1)[0][0], "stations": sorted(entry["stations"])}
+        for name, entry in sorted(index.items()) if name
+    }
+
+
+def build_intermodal_index(records, connections=None, buses=None, aliases=None):
+    """Join slot 0, stationConnections.json and intermodalBuses.json.
+
+    ``stations`` maps each key with any connection to its ``modes`` (slot 0),
+    ``conexiones``, ``bici`` and ``buses`` (``{"route" or "operator", "service",
+    "destination"}``). ``modes`` (every slot 0, ``conexiones`` and ``bici``
+    term), ``routes`` and ``operators`` map a term to its label and station
+    keys. ``unmatched`` lists source names that could not be tied to a station.
+    """
+    stations = {}
+    indexes = {name: {} for name in INDEXES}
+    unmatched = []
+
+    def entry(key):
+        return stations.setdefault(key, {"modes": [], "conexiones": [], "bici": [], "buses": []})
+
+    for key, record in records.items():
+        for mode in record.transports:
+            entry(key)["modes"].append(mode)
+            _add(indexes["modes"], mode, key)
+
+    for line, info in (connections or {}).items():
+        for station in (info or {}).get("estaciones", []):
+            key = station_key(station["nombre"], line, records, aliases)
+            if key is None:
+                unmatched.append(f"{station['nombre']} ({line})")
+                continue
+            for group in ("conexiones", "bici"):
+                for name in station.get(group, []):
+                    entry(key)[group].append(name)
+                    _add(indexes["modes"], name, key)
+
+    platforms = _platforms(records)
+    for name, services in (buses or {}).items():
+        folded = fold(name)
+        keys = platforms.get(folded) or ([aliases[folded]] if folded in (aliases or {}) else [])
+        if not keys:
+            unmatched.append(name)
+            continue
+        for service in services:
+            kind = fold(service.get("Tipo Servicio") or "")
+            kind = SERVICE_ALIASES.get(kind, kind)
+            label = (service.get("Recorrido/Operador") or "").strip()
+            field, index = ("route", "routes") if kind == ROUTE_SERVICE else ("operator", "operators")
+            for key in keys:
+                entry(key)["buses"].append({field: label, "service": kind, "destination": service.get("Destino")})
+                _add(indexes[index], label, key)
+
+    document = {"stations": dict(sorted(stations.items()))}
+    document.update((name, _finish(index)) for name, index in indexes.items())
+    document["unmatched"] = unmatched
+    return document
+
+
+class IntermodalIndex:
+    """Dictionary lookups over a :func:`build_intermodal_index` document, in both directions."""
+
+    def __init__(self, document):
+        self.stations = document["stations"]
+        self.indexes = {name: document[name] for name in INDEXES}
+
+    def connections(self, key):
+        """Modes, connections and bus services of a station key; ``None`` when it has none."""
+        return self.stations.get(key)
+
+    def lookup(self, index, label):
+        """Station keys for a term of one index ("modes", "routes" or "operators")."""
+        entry = self.indexes[index].get(term(label))
+        return entry["stations"] if entry else []
+
+    def route(self, label):
+        return self.lookup("routes", label)
+
+    def operator(self, label):
+        return self.lookup("operators", label)
+
+    def mode(self, label):
+        return self.lookup("modes", label)
+
+    def find(self, label):
+        """Station keys for a term in any index, e.g. "Centro Puerto" is both a connection and an operator."""
+        name = term(label)
+        found = set()
+        for index in self.indexes.values():
+            if name in index:
+                found.update(index[name]["stations"])
+        return sorted(found)
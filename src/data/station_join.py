@@ -0,0 +1,172 @@
+"""Denormalized per-station views joining every static source the station card needs.
+
+The station-info embed used to fan out over ``stationsData``,
+accessibilityCache.json (entries keyed like ``"LEN-05eb02"`` with an
+``estacion`` code), the per-station files in accessDetails/ and
+stationConnections.json on every request. This join stage does it once:
+each station becomes one document, reachable by its ``stationsData`` key or
+by its estadoRed.json code.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import re
+
+from station_records import station_aliases, station_key
+
+ACCESS_GROUPS = ("accesses", "elevators", "escalators")
+
+ACCESSIBILITY_TYPES = {"ascensor": "elevators", "escalera": "escalators"}
+
+# access_baquedano-l1.json, access_baquedano-l1-l1.json, access_union_latinoamericana-l1.json
+ACCESS_FILE = re.compile(r"^access_(?P<name>.+?)(?:-(?P<line>l\d+a?))+\.json$")
+
+
+def load_access_details(directory):
+    """Read every ``access_*.json`` file in ``directory`` (sorted, for stable output)."""
+    details = []
+    for path in sorted(glob.glob(os.path.join(directory, "access_*.json"))):
+        with open(path, encoding="utf-8") as detail_file:
+            detail = json.load(detail_file)
+        detail["file"] = os.path.basename(path)
+        details.append(detail)
+    return details
+
+
+def station_codes(estado_red, keys, aliases=None):
+    """``{station key: (code, line, display name, combinacion)}`` from estadoRed.json."""
+    codes = {}
+    for line, info in estado_red.items():
+        for station in (info or {}).get("estaciones", []):
+            key = station_key(station["nombre"], line, keys, aliases)
+            if key is not None:
+                codes[key] = (station["codigo"].upper(), line, station["nombre"], station.get("combinacion") or None)
+    return codes
+
+
+def _access_file_key(detail, keys, aliases):
+    """Station key of an accessDetails file.
+
+    The file name (``access_<station>-<line>.json``) is authoritative; the
+    ``station`` field inside is hand-edited and sometimes stale, so it is
+    only a fallback.
+    """
+    match = ACCESS_FILE.match(detail["file"])
+    if match:
+        key = station_key(match.group("name"), match.group("line"), keys, aliases)
+        if key is not None:
+            return key
+    return station_key(detail.get("station") or "", detail.get("line"), keys, aliases)
+
+
+def _merge_access_details(details):
+    """Merge several accessDetails files of one station, newest entry per id wins."""
+    merged = {group: {} for group in ACCESS_GROUPS}
+    last_updated = None
+    for detail in sorted(details, key=lambda detail: detail.get("lastUpdated") or ""):
+        last_updated = detail.get("lastUpdated") or last_updated
+        for group in ACCESS_GROUPS:
+            for item in detail.get(group) or []:
+                merged[group][item.get("id") or item.get("name")] = item
+    view = {group: list(items.values()) for group, items in merged.items()}
+    view["lastUpdated"] = last_updated
+    view["files"] = sorted(detail["file"] for detail in details)
+    return view
+
+
+def _accessibility_summary(equipment):
+    summary = {}
+    for group in ACCESSIBILITY_TYPES.values():
+        items = equipment.get(group, [])
+        summary[group] = {"total": len(items), "operational": sum(1 for item in items if item["estado"] == 1)}
+    return summary
+
+
+def build_station_views(records, estado_red, accessibility=None, access_details=None, connections=None, stations_json=None):
+    """Return ``{"stations": {key: view}, "codes": {code: key}, "unmatched": {...}}``.
+
+    ``unmatched`` lists the accessibility codes, accessDetails files and
+    connection names that could not be tied to a station, so gaps are visible
+    in the artifact instead of surfacing as empty embed fields.
+    """
+    aliases = station_aliases(stations_json, records)
+    codes = station_codes(estado_red, records, aliases)
+    by_code = {code: key for key, (code, _line, _name, _transfer) in codes.items()}
+    unmatched = {"accessibility": set(), "accessDetails": [], "connections": []}
+
+    equipment = {}
+    for item_id, item in sorted((accessibility or {}).items()):
+        key = by_code.get((item.get("estacion") or "").upper())
+        if key is None:
+            unmatched["accessibility"].add(item.get("estacion"))
+            continue
+        group = ACCESSIBILITY_TYPES.get(item.get("tipo"), "other")
+        equipment.setdefault(key, {}).setdefault(group, []).append({
+            "id": item_id,
+            "estado": item.get("estado"),
+            "texto": item.get("texto"),
+            "time": item.get("time"),
+        })
+
+    details = {}
+    for detail in access_details or []:
+        key = _access_file_key(detail, records, aliases)
+        if key is None:
+            unmatched["accessDetails"].append(detail["file"])
+            continue
+        details.setdefault(key, []).append(detail)
+
+    station_connections = {}
+    for line, info in (connections or {}).items():
+        for station in (info or {}).get("estaciones", []):
+            key = station_key(station["nombre"], line, records, aliases)
+            if key is None:
+                unmatched["connections"].append(f"{station['nombre']} ({line})")
+                continue
+            station_connections[key] = {
+                "conexiones": station.get("conexiones", []),
+                "bici": station.get("bici", []),
+            }
+
+    views = {}
+    for key, record in records.items():
+        code, line, display_name, transfer = codes.get(key, (None, record.line, None, None))
+        view = record.to_dict()
+        view.update(
+            code=code,
+            line=line,
+            displayName=display_name,
+            transfer=transfer,
+            connections=station_connections.get(key, {"conexiones": [], "bici": []}),
+            equipment=equipment.get(key, {}),
+            equipmentSummary=_accessibility_summary(equipment.get(key, {})),
+            accessDetails=_merge_access_details(details[key]) if key in details else None,
+        )
+        views[key] = view
+
+    return {
+        "stations": views,
+        "codes": dict(sorted(by_code.items())),
+        "unmatched": {
+            "accessibility": sorted(code for code in unmatched["accessibility"] if code),
+            "accessDetails": unmatched["accessDetails"],
+            "connections": unmatched["connections"],
+        },
+    }
+
+
+class StationViews:
+    """In-process access to a joined views document by station key or code."""
+
+    def __init__(self, document):
+        self._views = dict(document["stations"])
+        self._views.update({code: document["stations"][key] for code, key in document["codes"].items()})
+
+    def get(self, key_or_code):
+        return self._views.get(key_or_code) or self._views.get(key_or_code.upper())
+
+    def __contains__(self, key_or_code):
+        return self.get(key_or_code) is not None
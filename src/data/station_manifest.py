@@ -0,0 +1,70 @@
+"""Content hashes and change manifests for incremental station data generation.
+
+Each station record is hashed from its canonical JSON form. Comparing the
+hashes against the previous manifest tells which stations were added, removed
+or modified, so a reader can reload just those; when the serialized output is
+byte-identical the file is not touched at all and keeps its mtime.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+
+def content_hash(value):
+    """SHA-256 of ``value``'s canonical JSON form (sorted keys, no whitespace)."""
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def station_hashes(stations):
+    """``{station key: content hash}`` for a mapping of station key -> record dict."""
+    return {key: content_hash(station) for key, station in stations.items()}
+
+
+def diff_hashes(previous, current):
+    """Return the added, removed and modified station keys between two hash maps."""
+    return {
+        "added": sorted(key for key in current if key not in previous),
+        "removed": sorted(key for key in previous if key not in current),
+        "modified": sorted(key for key in current if key in previous and previous[key] != current[key]),
+    }
+
+
+def build_manifest(stations, previous=None):
+    """Manifest for ``stations`` with the changes relative to a ``previous`` manifest."""
+    hashes = station_hashes(stations)
+    return {
+        "document": content_hash(hashes),
+        "stations": hashes,
+        "changes": diff_hashes((previous or {}).get("stations", {}), hashes),
+    }
+
+
+def read_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as manifest_file:
+        return json.load(manifest_file)
+
+
+def write_if_changed(path, content):
+    """Write ``content`` to ``path`` unless the file already holds exactly that; returns whether it wrote."""
+    encoded = content.encode("utf-8") if isinstance(content, str) else content
+    if os.path.exists(path):
+        with open(path, "rb") as existing:
+            if existing.read() == encoded:
+                return False
+    write_file(path, encoded)
+    return True
+
+
+def write_file(path, content):
+    """Atomically replace ``path`` with ``content`` (``str`` is written as UTF-8)."""
+    encoded = content.encode("utf-8") if isinstance(content, str) else content
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as output:
+        output.write(encoded)
+    os.replace(tmp_path, path)
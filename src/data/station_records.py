@@ -0,0 +1,168 @@
+"""Typed station records compiled from the positional lists in stationsdata.py.
+
+``stationsData`` stores every station as a list of comma-joined strings
+(transporte, servicios, accesibilidad, comercio, cultura, imagen, comuna)
+with the literal ``"None"`` as a placeholder. The bot used to split and trim
+those strings on every lookup; this module does it once, at build time.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import asdict, dataclass
+
+SLOTS = ("transports", "services", "accessibility", "commerce", "culture", "image", "communes")
+
+# Slots that hold comma-separated lists rather than free text.
+LIST_SLOTS = {"transports", "services", "commerce", "culture", "communes"}
+
+LINE_SUFFIX = re.compile(r"\s+(l\d+a?)$")
+
+
+def fold(text):
+    """Lowercase, accent-free form used for keys and comparisons ("Ñuñoa" -> "nunoa")."""
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[-_/]", " ", text.lower())
+    text = re.sub(r"[^a-z0-9 ]", "", text)
+    return " ".join(text.split())
+
+
+def parse_value(value):
+    """Return ``None`` for the ``"None"`` placeholder and empty strings."""
+    if value is None:
+        return None
+    value = value.strip()
+    if not value or value == "None":
+        return None
+    return value
+
+
+def parse_list(value):
+    value = parse_value(value)
+    if value is None:
+        return ()
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def split_key(key):
+    """Split a station key into its display name part and line ("san pablo l1" -> ("san pablo", "l1"))."""
+    match = LINE_SUFFIX.search(key)
+    if not match:
+        return key, None
+    return key[:match.start()], match.group(1)
+
+
+def station_key(name, line, keys, aliases=None):
+    """Resolve a display name from stations.json/estadoRed.json to its ``stationsData`` key.
+
+    Transfer stations are keyed with their line ("Los Héroes" on l1 -> "los heroes l1");
+    ``aliases`` (see :func:`station_aliases`) covers names like "U.L.A.". Returns
+    ``None`` when the station has no entry in ``keys``.
+    """
+    folded = fold(name)
+    for candidate in (folded, f"{folded} {line}" if line else None):
+        if candidate in keys:
+            return candidate
+    return (aliases or {}).get(folded)
+
+
+def station_aliases(stations_json, keys):
+    """Folded alias -> station key for the ``aliases`` listed in stations.json."""
+    aliases = {}
+    for line, stations in (stations_json or {}).items():
+        for name, info in stations.items():
+            key = station_key(name, line, keys)
+            if key is None:
+                continue
+            for alias in (info or {}).get("aliases", []):
+                aliases[fold(alias)] = key
+    return aliases
+
+
+def _is_url(value):
+    return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+
+def pad_slots(raw):
+    """Bring a raw ``stationsData`` entry to exactly seven slots.
+
+    Some entries omit the image slot (six values, ending in the commune) and a
+    few carry a trailing display name; both are coerced to the canonical layout.
+    """
+    slots = list(raw[:len(SLOTS)])
+    if len(slots) == len(SLOTS) - 1 and not _is_url(slots[-1]):
+        slots.insert(SLOTS.index("image"), "None")
+    slots.extend(["None"] * (len(SLOTS) - len(slots)))
+    return slots
+
+
+def _commune_rank(name):
+    # Prefer the spelling that carries accents and capitals ("Ñuñoa" over "nunoa").
+    return (sum(1 for ch in name if ord(ch) > 127), sum(1 for ch in name if ch.isupper()), name)
+
+
+def commune_names(stations_data):
+    """Map every folded commune spelling in ``stationsData`` to its canonical form."""
+    variants = {}
+    for raw in stations_data.values():
+        for name in parse_list(pad_slots(raw)[SLOTS.index("communes")]):
+            variants.setdefault(fold(name), set()).add(name)
+
+    canonical = {}
+    for folded, names in variants.items():
+        best = max(names, key=_commune_rank)
+        canonical[folded] = best if best != best.lower() else best.title()
+    return canonical
+
+
+@dataclass(frozen=True)
+class StationRecord:
+    key: str
+    name: str
+    line: str | None
+    transports: tuple
+    services: tuple
+    accessibility: str | None
+    commerce: tuple
+    culture: tuple
+    image: str | None
+    communes: tuple
+    schematic_image: str | None = None
+    schematic_pdf: str | None = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def build_record(key, raw, schematic=None, communes=None):
+    """Compile one positional ``stationsData`` entry into a :class:`StationRecord`."""
+    slots = dict(zip(SLOTS, pad_slots(raw or [])))
+    fields = {
+        slot: parse_list(value) if slot in LIST_SLOTS else parse_value(value)
+        for slot, value in slots.items()
+    }
+    if communes:
+        fields["communes"] = tuple(communes.get(fold(name), name) for name in fields["communes"])
+
+    schematic = schematic or []
+    name, line = split_key(key)
+    return StationRecord(
+        key=key,
+        name=name,
+        line=line,
+        schematic_image=parse_value(schematic[0]) if len(schematic) > 0 else None,
+        schematic_pdf=parse_value(schematic[1]) if len(schematic) > 1 else None,
+        **fields,
+    )
+
+
+def build_records(stations_data, stations_schematics):
+    """Compile every station in ``stationsData``/``stationsSchematics`` keyed by station key."""
+    communes = commune_names(stations_data)
+    keys = list(stations_data) + [key for key in stations_schematics if key not in stations_data]
+    return {
+        key: build_record(key, stations_data.get(key), stations_schematics.get(key), communes)
+        for key in keys
+    }
@@ -0,0 +1,219 @@
+"""Network graph and precomputed all-pairs route tables for the trip planner.
+
+The graph has one node per station key (transfer stations are keyed per line,
+"baquedano l1" / "baquedano l5"). Consecutive stations in the stations.json
+line order are joined by ride edges, and the per-line keys of one transfer
+station are joined by transfer edges. Stations listed in stations.json
+without ``stationsData`` yet stay in the graph under their folded name so hop
+counts along the line remain right.
+
+For every weight profile in src/config/routeWeights.js (cost = ``stations``
+per ride edge + ``transfers`` per transfer edge) a shortest-path search runs
+from every node. The result is an ``n x n`` next-hop table plus an ``n x n``
+cost table, so a /planificar request walks the table instead of searching.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import re
+
+from station_records import fold, split_key, station_key
+
+ROUTE_WEIGHTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config", "routeWeights.js")
+
+# Weights are stored as integers (0.3 -> 30) so costs add up without float drift.
+WEIGHT_SCALE = 100
+
+DEFAULT_PROFILE = "BALANCED"
+
+_PROFILE = re.compile(r"(\w+)\s*:\s*\{([^}]*)\}")
+_WEIGHT = re.compile(r"(\w+)\s*:\s*([\d.]+)")
+
+
+def load_profiles(path=ROUTE_WEIGHTS):
+    """``{profile: {"stations": int, "transfers": int}}`` read from routeWeights.js, scaled by WEIGHT_SCALE."""
+    with open(path, encoding="utf-8") as weights_file:
+        source = re.sub(r"//[^\n]*", "", weights_file.read())
+    profiles = {}
+    for name, body in _PROFILE.findall(source):
+        weights = {key: round(float(value) * WEIGHT_SCALE) for key, value in _WEIGHT.findall(body)}
+        profiles[name] = {"stations": weights["stations"], "transfers": weights["transfers"]}
+    return profiles
+
+
+def line_order(stations_json, keys, aliases=None):
+    """``{line: [(station key, stations.json info), ...]}`` in line order.
+
+    Stations without ``stationsData`` are keyed by their folded name.
+    """
+    return {
+        line: [(station_key(name, line, keys, aliases) or fold(name), info or {}) for name, info in stations.items()]
+        for line, stations in stations_json.items()
+    }
+
+
+def build_network(stations_json, keys, aliases=None):
+    """Return ``{"nodes": [key, ...], "lines": [line, ...], "edges": [(a, b, kind), ...]}``.
+
+    ``a``/``b`` are node indexes and ``kind`` is ``"ride"`` or ``"transfer"``.
+    """
+    nodes, lines, index, edges = [], [], {}, []
+    for line, stations in line_order(stations_json, keys, aliases).items():
+        previous = None
+        for key, _info in stations:
+            if key not in index:
+                index[key] = len(nodes)
+                nodes.append(key)
+                lines.append(line)
+            if previous is not None:
+                edges.append((previous, index[key], "ride"))
+            previous = index[key]
+
+    platforms = {}
+    for position, key in enumerate(nodes):
+        platforms.setdefault(split_key(key)[0], []).append(position)
+    for group in platforms.values():
+        for i, a in enumerate(group):
+            for b in group[i + 1:]:
+                if lines[a] != lines[b]:
+                    edges.append((a, b, "transfer"))
+
+    return {"nodes": nodes, "lines": lines, "edges": edges}
+
+
+def _adjacency(network, weights):
+    adjacency = [[] for _ in network["nodes"]]
+    for a, b, kind in network["edges"]:
+        cost = weights["stations"] if kind == "ride" else weights["transfers"]
+        adjacency[a].append((b, cost))
+        adjacency[b].append((a, cost))
+    return adjacency
+
+
+def _search(adjacency, source, target=None):
+    """Dijkstra from ``source``; returns ``(cost, first hop, predecessor)`` lists (``-1`` when unreachable)."""
+    size = len(adjacency)
+    cost = [-1] * size
+    first = [-1] * size
+    parent = [-1] * size
+    cost[source], first[source] = 0, source
+    done = [False] * size
+    queue = [(0, source)]
+    while queue:
+        distance, node = heapq.heappop(queue)
+        if done[node]:
+            continue
+        done[node] = True
+        if node == target:
+            break
+        for neighbor, weight in adjacency[node]:
+            candidate = distance + weight
+            if cost[neighbor] == -1 or candidate < cost[neighbor]:
+                cost[neighbor] = candidate
+                first[neighbor] = neighbor if node == source else first[node]
+                parent[neighbor] = node
+                heapq.heappush(queue, (candidate, neighbor))
+    return cost, first, parent
+
+
+def build_route_tables(network, profiles):
+    """All-pairs next-hop and cost tables for every profile.
+
+    ``next[a][b]`` is the node after ``a`` on the cheapest path to ``b`` and
+    ``cost[a][b]`` its scaled cost; both are ``-1`` when ``b`` is unreachable.
+    """
+    tables = {}
+    for name, weights in profiles.items():
+        adjacency = _adjacency(network, weights)
+        next_hops, costs = [], []
+        for source in range(len(adjacency)):
+            cost, first, _parent = _search(adjacency, source)
+            next_hops.append(first)
+            costs.append(cost)
+        tables[name] = {"weights": weights, "next": next_hops, "cost": costs}
+    return {"nodes": network["nodes"], "lines": network["lines"], "scale": WEIGHT_SCALE, "profiles": tables}
+
+
+def _describe(nodes, lines, path, cost, scale):
+    legs = []
+    for a, b in zip(path, path[1:]):
+        if lines[a] != lines[b]:
+            continue
+        if legs and legs[-1]["line"] == lines[a] and legs[-1]["to"] == nodes[a]:
+            legs[-1]["to"] = nodes[b]
+            legs[-1]["stations"] += 1
+        else:
+            legs.append({"line": lines[a], "from": nodes[a], "to": nodes[b], "stations": 1})
+    return {
+        "cost": cost / scale,
+        "stations": sum(leg["stations"] for leg in legs),
+        "transfers": max(len(legs) - 1, 0),
+        "path": [nodes[node] for node in path],
+        "legs": legs,
+    }
+
+
+class _Endpoints:
+    def __init__(self, nodes):
+        self.index = set(nodes)
+        self.platforms = {}
+        for position, key in enumerate(nodes):
+            self.platforms.setdefault(split_key(key)[0], []).append(position)
+
+    def __call__(self, name):
+        """Every platform of a station, given any of its keys or its name without line ("baquedano").
+
+        A trip starting at "baquedano l1" may just as well board at "baquedano l5".
+        """
+        base = split_key(name)[0] if name in self.index else fold(name)
+        return self.platforms.get(base, [])
+
+
+class RouteTable:
+    """Answers route queries by walking a :func:`build_route_tables` document."""
+
+    def __init__(self, document):
+        self.nodes = document["nodes"]
+        self.lines = document["lines"]
+        self.scale = document["scale"]
+        self.profiles = document["profiles"]
+        self.endpoints = _Endpoints(self.nodes)
+
+    def route(self, origin, destination, profile=DEFAULT_PROFILE):
+        """Cheapest route between two stations as cost, stations, transfers, path and per-line legs; ``None`` if unknown."""
+        table = self.profiles[profile]
+        pairs = [
+            (table["cost"][a][b], a, b)
+            for a in self.endpoints(origin) for b in self.endpoints(destination)
+            if table["cost"][a][b] != -1
+        ]
+        if not pairs:
+            return None
+        cost, node, target = min(pairs)
+        path = [node]
+        while node != target:
+            node = table["next"][node][target]
+            path.append(node)
+        return _describe(self.nodes, self.lines, path, cost, self.scale)
+
+
+def search_route(network, weights, origin, destination):
+    """Same answer as :meth:`RouteTable.route`, computed on demand with one search per origin platform."""
+    adjacency = _adjacency(network, weights)
+    endpoints = _Endpoints(network["nodes"])
+    targets = endpoints(destination)
+    best = None
+    for source in endpoints(origin):
+        cost, _first, parent = _search(adjacency, source)
+        for target in targets:
+            if cost[target] != -1 and (best is None or (cost[target], source, target) < best[:3]):
+                best = (cost[target], source, target, parent)
+    if best is None:
+        return None
+    cost, source, target, parent = best
+    path = [target]
+    while path[-1] != source:
+        path.append(parent[path[-1]])
+    return _describe(network["nodes"], network["lines"], path[::-1], cost, WEIGHT_SCALE)
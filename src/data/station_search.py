@@ -0,0 +1,113 @@
+"""Accent-folded prefix/trigram search artifact for station-name autocomplete.
+
+The artifact is built from the ``stationsData``/``stationsSchematics`` keys and
+the display names and aliases in stations.json. Every searchable text is
+folded once; queries then resolve with a bisect (prefix) or a trigram
+posting-list merge (fuzzy) instead of an ``includes()`` over every key.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from station_records import fold, split_key, station_key
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_search_artifact(station_keys, stations_json=None):
+    """Return a JSON-ready search artifact.
+
+    ``names`` is a list of ``[folded text, station key]`` pairs sorted by text,
+    ``trigrams`` maps each trigram to the indexes of the ``names`` containing it.
+    """
+    keys = set(station_keys)
+    texts = {}
+    labels = {}
+    lines = {}
+
+    for key in station_keys:
+        name, line = split_key(key)
+        texts.setdefault(key, set()).update({key, name})
+        if line:
+            lines[key] = line
+
+    for line, stations in (stations_json or {}).items():
+        for display_name, info in stations.items():
+            key = station_key(display_name, line, keys)
+            if key is None:
+                continue
+            labels.setdefault(key, display_name)
+            lines.setdefault(key, line)
+            texts[key].add(fold(display_name))
+            for alias in (info or {}).get("aliases", []):
+                texts[key].add(fold(alias))
+
+    names = sorted({(text, key) for key, folded in texts.items() for text in folded if text})
+    postings = {}
+    for position, (text, _key) in enumerate(names):
+        for gram in trigrams(text):
+            postings.setdefault(gram, []).append(position)
+
+    return {
+        "names": [list(entry) for entry in names],
+        "trigrams": dict(sorted(postings.items())),
+        "labels": dict(sorted(labels.items())),
+        "lines": dict(sorted(lines.items())),
+    }
+
+
+class StationSearch:
+    """Query a search artifact produced by :func:`build_search_artifact`."""
+
+    def __init__(self, artifact):
+        self.names = [tuple(entry) for entry in artifact["names"]]
+        self.trigrams = artifact["trigrams"]
+        self.labels = artifact.get("labels", {})
+        self.lines = artifact.get("lines", {})
+        self._grams = [len(trigrams(text)) for text, _key in self.names]
+
+    def prefix(self, query, limit=25):
+        """Station keys with a searchable text starting with ``query``, shortest text first."""
+        query = fold(query)
+        start = bisect_left(self.names, (query, ""))
+        matches = []
+        for text, key in islice(self.names, start, None):
+            if not text.startswith(query):
+                break
+            matches.append((len(text), text, key))
+        return _unique_keys(key for _length, _text, key in sorted(matches))[:limit]
+
+    def fuzzy(self, query, limit=25, threshold=0.3):
+        """Station keys ranked by trigram (Dice) similarity to ``query``."""
+        query = fold(query)
+        grams = trigrams(query)
+        overlap = Counter()
+        for gram in grams:
+            overlap.update(self.trigrams.get(gram, ()))
+
+        scored = []
+        for position, shared in overlap.items():
+            score = 2 * shared / (len(grams) + self._grams[position])
+            if score >= threshold:
+                text, key = self.names[position]
+                scored.append((-score, text, key))
+        return _unique_keys(key for _score, _text, key in sorted(scored))[:limit]
+
+    def search(self, query, limit=25):
+        """Exact match first, then prefix matches, then fuzzy candidates."""
+        folded = fold(query)
+        if not folded:
+            return []
+        ranked = self.prefix(folded, limit) + self.fuzzy(folded, limit)
+        return _unique_keys(ranked)[:limit]
+
+
+def _unique_keys(keys):
+    seen = set()
+    return [key for key in keys if not (key in seen or seen.add(key))]
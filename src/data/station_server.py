@@ -0,0 +1,379 @@
+"""Read-only HTTP service for the generated station catalogue.
+
+Every frontend (Discord, Telegram, web) used to load and parse the whole
+station data itself. This service loads the generator's output once and
+serves it over plain HTTP/1.1 on asyncio (stdlib only):
+
+    GET /stations                          every compiled station record
+    GET /stations/<key or code>            one joined station view ("san%20pablo%20l1", "SP")
+    GET /categories                        autocomplete vocabularies
+    GET /categories/<category>             folded term -> station keys
+    GET /categories/<category>/<term>      station keys for one term, any spelling
+    GET /search                            the name search artifact
+    GET /search?q=<query>                  ranked station keys for a name query
+    GET /health                            catalogue version
+
+Every body is built and compressed (gzip, and brotli when the optional
+``brotli`` package is installed) at load time. Each coding carries its own
+strong ETag, so a client revalidating unchanged data gets a bodiless 304.
+``--watch-socket`` subscribes to :mod:`station_watch` and reloads on every
+delta. A failed reload keeps the previous catalogue, and a lost watcher is
+reconnected to.
+
+Usage:
+    python station_server.py [--data DIR] [--format FMT] [--host HOST] [--port PORT] [--watch-socket PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import json
+import os
+import sys
+from functools import lru_cache
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import station_formats
+from station_manifest import content_hash
+from station_records import fold
+from station_search import StationSearch
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip bodies are offered
+    brotli = None
+
+DEFAULT_PORT = 3080
+
+# Bodies smaller than this are sent as-is; compressing them saves nothing.
+COMPRESS_MIN = 256
+
+MAX_HEADER_BYTES = 16 * 1024
+
+# Request bodies are read and discarded up to this size (nothing here takes one); a larger one ends the connection.
+MAX_BODY_BYTES = 64 * 1024
+
+# Seconds between attempts to reach the watcher socket again.
+RECONNECT_SECONDS = 5
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class Resource:
+    """One response body with its ETag and pre-compressed variants.
+
+    ``etag`` validates the identity body. Each coding gets its own strong ETag
+    (``"<hash>-gzip"``), as RFC 9110 requires for differently encoded bytes.
+    """
+
+    __slots__ = ("body", "etag", "encodings")
+
+    def __init__(self, value):
+        self.body = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.etag = f'"{content_hash(value)[:32]}"'
+        self.encodings = {}
+        if len(self.body) >= COMPRESS_MIN:
+            self.encodings["gzip"] = gzip.compress(self.body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.encodings["br"] = brotli.compress(self.body)
+
+    def etag_for(self, coding=None):
+        return f'{self.etag[:-1]}-{coding}"' if coding else self.etag
+
+
+def accepted_encodings(header):
+    """Codings of an Accept-Encoding header with a non-zero q, in header order."""
+    codings = []
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            codings.append(coding.strip().lower())
+    return codings
+
+
+def _identity_etag(tag):
+    """``"<hash>-gzip"`` -> ``"<hash>"``: any coding of a body validates the body itself."""
+    for coding in ("gzip", "br"):
+        if tag.endswith(f'-{coding}"'):
+            return f'{tag[:-len(coding) - 2]}"'
+    return tag
+
+
+def etag_matches(header, etag):
+    """If-None-Match against a resource's ETag, with the weak comparison RFC 9110 asks for.
+
+    A tag sent for one coding matches the others too: the client gets a 304
+    carrying the ETag of the coding it would have been sent now.
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    etag = _identity_etag(etag)
+    return any(_identity_etag(candidate.strip().removeprefix("W/")) == etag for candidate in header.split(","))
+
+
+def _data_file(directory, fmt=None):
+    """The stationsdata file in ``directory``: the one in ``fmt``, else the most recently written one.
+
+    A directory can hold more than one format (an old ``--format min`` run, then
+    the watcher writing ``json``); the newest file is the one being kept current.
+    """
+    if fmt is not None:
+        path = os.path.join(directory, station_formats.file_name("stationsdata", fmt))
+        if os.path.exists(path):
+            return path
+        raise FileNotFoundError(f"No {os.path.basename(path)} in '{directory}' (run stationsdata.py --format {fmt})")
+    paths = [os.path.join(directory, station_formats.file_name("stationsdata", name)) for name in station_formats.FORMATS]
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        raise FileNotFoundError(f"No stationsdata file in '{directory}' (run stationsdata.py --output {directory})")
+    return max(paths, key=os.path.getmtime)
+
+
+def _load_optional(directory, name):
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+
+class StationService:
+    """Routes requests to pre-built :class:`Resource` objects over one generated output directory."""
+
+    def __init__(self, directory, fmt=None):
+        self.directory = directory
+        self.fmt = fmt
+        self.load()
+
+    def load(self):
+        """(Re)read the generated files and rebuild every resource.
+
+        Nothing is replaced until everything is built, so a failed reload leaves the previous catalogue serving.
+        """
+        document = station_formats.load(_data_file(self.directory, self.fmt))
+        views = _load_optional(self.directory, "stationviews.json")
+        search = _load_optional(self.directory, "stationsearch.json")
+
+        stations = document["stations"]
+        per_station = dict(stations)
+        if views:
+            per_station.update(views["stations"])
+            per_station.update((code, views["stations"][key]) for code, key in views["codes"].items())
+
+        resources = {
+            "/stations": Resource(stations),
+            "/categories": Resource(document["vocabulary"]),
+        }
+        shared = {}
+        for name, value in per_station.items():
+            # A code and its station key serve the same object.
+            resource = shared.get(id(value)) or shared.setdefault(id(value), Resource(value))
+            resources[f"/stations/{name}"] = resource
+        labels = {
+            category: {entry["term"]: entry["label"] for entry in entries}
+            for category, entries in document["vocabulary"].items()
+        }
+        for category, index in document["indexes"].items():
+            resources[f"/categories/{category}"] = Resource(index)
+            for term, keys in index.items():
+                label = labels.get(category, {}).get(term, term)
+                resources[f"/categories/{category}/{term}"] = Resource({"term": term, "label": label, "stations": keys})
+        if search:
+            resources["/search"] = Resource(search)
+
+        version = content_hash(sorted((path, resource.etag) for path, resource in resources.items()))[:32]
+        resources["/health"] = Resource({"status": "ok", "version": version, "stations": len(stations)})
+        station_search = StationSearch(search) if search else None
+
+        self.version, self.resources, self.search = version, resources, station_search
+        self._query.cache_clear()
+
+    @lru_cache(maxsize=1024)
+    def _query(self, folded):
+        return Resource({"query": folded, "results": self.search.search(folded)})
+
+    def resolve(self, target):
+        """The resource for a request target (path and query string), or ``None``."""
+        parts = urlsplit(target)
+        path = unquote(parts.path).rstrip("/") or "/"
+        if path == "/search" and parts.query:
+            query = parse_qs(parts.query).get("q", [""])[0]
+            return self._query(fold(query)) if self.search is not None else None
+        resource = self.resources.get(path)
+        if resource is None and path.startswith("/categories/") and path.count("/") == 3:
+            _root, _categories, category, term = path.split("/")
+            resource = self.resources.get(f"/categories/{category}/{fold(term)}")
+        return resource
+
+    def respond(self, method, target, headers):
+        """``(status, headers, body)`` for one request; ``headers`` has lowercase names."""
+        if method not in ("GET", "HEAD"):
+            return self._error(405, "method not allowed", {"Allow": "GET, HEAD"})
+        resource = self.resolve(target)
+        if resource is None:
+            return self._error(404, "not found")
+
+        coding = next((coding for coding in accepted_encodings(headers.get("accept-encoding"))
+                       if coding in resource.encodings), None)
+        response_headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "ETag": resource.etag_for(coding),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(headers.get("if-none-match"), resource.etag):
+            return 304, response_headers, b""
+        if coding is None:
+            return 200, response_headers, resource.body
+        response_headers["Content-Encoding"] = coding
+        return 200, response_headers, resource.encodings[coding]
+
+    @staticmethod
+    def _error(status, message, extra=None):
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        headers.update(extra or {})
+        return status, headers, json.dumps({"error": message}).encode("utf-8")
+
+
+def _encode_response(status, headers, body, keep_alive, head=False):
+    """The response bytes; a HEAD response keeps the Content-Length of the body it leaves out."""
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    if status != 304:
+        lines.append(f"Content-Length: {len(body)}")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head else body)
+
+
+async def _read_request(reader):
+    """``(method, target, version, headers, framed)``, or ``None`` when the client closed the connection.
+
+    A request body is read and discarded, so its bytes are not taken for the
+    next request. ``framed`` is false when it could not be (chunked, or over
+    ``MAX_BODY_BYTES``); the connection must then close after the response.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise ValueError("request head too large") from None
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = request_line.split(" ")
+    except ValueError:
+        raise ValueError("malformed request line") from None
+    headers = {}
+    for line in header_lines:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise ValueError("malformed Content-Length") from None
+    framed = "transfer-encoding" not in headers and 0 <= length <= MAX_BODY_BYTES
+    if framed and length:
+        try:
+            await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return None
+    return method, target, version, headers, framed
+
+
+async def serve(service, host="127.0.0.1", port=DEFAULT_PORT):
+    """Start the HTTP server; returns the ``asyncio.Server``."""
+
+    async def connection(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ValueError as error:
+                    status, headers, body = service._error(400, str(error))
+                    writer.write(_encode_response(status, headers, body, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, framed = request
+                keep_alive = framed and headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                status, response_headers, body = service.respond(method, target, headers)
+                writer.write(_encode_response(status, response_headers, body, keep_alive, head=method == "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    return await asyncio.start_server(connection, host, port, limit=MAX_HEADER_BYTES)
+
+
+def _reload(service):
+    try:
+        service.load()
+    except Exception as error:  # e.g. a file read mid-write: keep serving what was loaded before
+        print(f"Reload failed, still serving {service.version}: {error}", file=sys.stderr)
+        return
+    print(f"Reloaded station catalogue {service.version}.")
+
+
+async def _reload_on_deltas(service, socket_path, retry=RECONNECT_SECONDS):
+    """Reload on every delta; reconnect whenever the watcher goes away, and reload on (re)connecting."""
+    from station_watch import subscribe
+
+    while True:
+        try:
+            async for message in subscribe(socket_path):
+                # A hello after a reconnect may follow deltas that were missed meanwhile.
+                if message.get("type") in ("hello", "delta"):
+                    _reload(service)
+            print(f"Watcher at {socket_path} closed the subscription; reconnecting.", file=sys.stderr)
+        except (OSError, ValueError) as error:
+            print(f"Cannot subscribe to {socket_path} ({error}); retrying in {retry} s.", file=sys.stderr)
+        await asyncio.sleep(retry)
+
+
+async def _main(args):
+    service = StationService(args.data, args.fmt)
+    server = await serve(service, args.host, args.port)
+    print(f"Serving {len(service.resources)} resources from {args.data} on http://{args.host}:{args.port}")
+    async with server:
+        if args.watch_socket:
+            await asyncio.gather(server.serve_forever(), _reload_on_deltas(service, args.watch_socket))
+        else:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only HTTP service for the generated station data.")
+    parser.add_argument("--data", default=".", help="directory written by stationsdata.py --output")
+    parser.add_argument("--format", dest="fmt", choices=station_formats.FORMATS,
+                        help="stationsdata format to serve (default: the most recently written one)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--watch-socket", help="station_watch.py socket to reload from on changes")
+    args = parser.parse_args()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Effective line/station status from live data, manual overrides and scheduled windows.
+
+The effective state of a station is layered, later layers winning:
+
+1. live status, estadoRed.json (or ``station_status``), by line and station code
+2. manual overrides, statusOverrides.json, ``enabled`` entries by line id or station code ("CM")
+3. scheduled overrides, ``scheduled_status_overrides`` rows active over ``[start_at, end_at)``
+
+The scheduler used to re-query and re-merge all three on every tick. This
+engine loads the scheduled windows once into one interval tree per target.
+Resolving every station at a time ``t`` is then a single pass of stabbing
+queries. All window boundaries are sorted up front, so
+:meth:`StatusResolver.next_transition` tells the scheduler how long it can
+sleep before anything changes.
+
+A scheduled override targets a station (code or ``stationsData`` key), a
+line ("l4a") or the whole ``system``. For a station, the most specific active
+window wins: station, then its line, then system. Within one target, the
+window that started last wins.
+
+Usage:
+    python station_status.py at [--time ISO] [--scheduled FILE] [--all]
+    python station_status.py next [--time ISO] [--scheduled FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import os
+import time
+from datetime import datetime
+
+from station_history import OPERATIONAL, to_iso, to_ms
+from station_join import station_codes
+from station_records import station_key
+
+OVERRIDES_FILE = "statusOverrides.json"
+
+SYSTEM = "system"
+
+
+def timestamp(value):
+    """Epoch milliseconds from an ISO string, a ``datetime`` (MariaDB rows) or a number of ms."""
+    if isinstance(value, datetime):
+        return round(value.timestamp() * 1000)
+    if isinstance(value, str):
+        return to_ms(value)
+    return int(value)
+
+
+class IntervalTree:
+    """Static centered interval tree over half-open ``(start, end, item)`` intervals.
+
+    Each node keeps the intervals containing its center twice: sorted by
+    start, and sorted by end descending. A stabbing query only walks one
+    root-to-leaf path and reads each node's list until the first miss.
+    """
+
+    def __init__(self, intervals):
+        self.root = self._build([interval for interval in intervals if interval[0] < interval[1]])
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        # The median start: the interval starting there contains it, so every node holds at least one.
+        center = sorted(start for start, _end, _item in intervals)[len(intervals) // 2]
+        here, left, right = [], [], []
+        for interval in intervals:
+            if interval[1] <= center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return (
+            center,
+            sorted(here, key=lambda interval: interval[0]),
+            sorted(here, key=lambda interval: -interval[1]),
+            self._build(left),
+            self._build(right),
+        )
+
+    def at(self, point):
+        """Intervals containing ``point``."""
+        found = []
+        node = self.root
+        while node is not None:
+            center, by_start, by_end, left, right = node
+            if point < center:
+                for interval in by_start:
+                    if interval[0] > point:
+                        break
+                    found.append(interval)
+                node = left
+            else:
+                for interval in by_end:
+                    if interval[1] <= point:
+                        break
+                    found.append(interval)
+                node = right
+        return found
+
+
+def _manual_line(override):
+    # Same normalization as ApiServiceOverride._normalizeLineOverrides.
+    return {"estado": str(override.get("estado") or "1"), "mensaje": override.get("mensaje") or "",
+            "mensaje_app": override.get("mensaje_app") or ""}
+
+
+def _manual_station(override):
+    return {"estado": str(override.get("estado") or "1"), "descripcion": override.get("descripcion") or "",
+            "descripcion_app": override.get("descripcion_app") or ""}
+
+
+def _apply(state, fields, source):
+    """``state`` with the non-empty ``fields`` layered on top; ``estado`` always replaces."""
+    merged = dict(state or {})
+    merged.update((name, value) for name, value in fields.items() if value or name == "estado")
+    merged["source"] = source
+    return merged
+
+
+def _winner(intervals):
+    """The window that started last (ties: highest id)."""
+    return max(intervals, key=lambda interval: (interval[0], interval[2].get("id") or 0))
+
+
+class StatusResolver:
+    """Effective status of every line and ``stationsData`` station at any time.
+
+    ``estado_red`` is the live estadoRed.json document, ``overrides`` the
+    statusOverrides.json document and ``scheduled`` the
+    ``scheduled_status_overrides`` rows (``start_at``/``end_at`` as ISO
+    strings, datetimes or ms). Live status and manual overrides do not depend
+    on time and are merged once here. Only the scheduled windows are looked
+    up per call.
+    """
+
+    def __init__(self, keys, estado_red, overrides=None, scheduled=(), aliases=None):
+        overrides = overrides or {}
+        codes = station_codes(estado_red, keys, aliases)
+        self._by_code = {code: key for key, (code, _line, _name, _transfer) in codes.items()}
+        live_stations = {
+            station["codigo"].upper(): station
+            for info in estado_red.values() for station in (info or {}).get("estaciones", [])
+        }
+
+        self.lines = {}
+        for line, info in estado_red.items():
+            state = {name: (info or {}).get(name) for name in ("estado", "mensaje", "mensaje_app")}
+            self.lines[line] = dict(state, source="live")
+        for line, override in (overrides.get("lines") or {}).items():
+            if override.get("enabled") and line.lower() in self.lines:
+                self.lines[line.lower()] = _apply(self.lines[line.lower()], _manual_line(override), "override")
+
+        self.stations = {}
+        self.station_lines = {}
+        for key in keys:
+            code, line, _name, _transfer = codes.get(key, (None, getattr(keys[key], "line", None), None, None))
+            self.station_lines[key] = line
+            live = live_stations.get(code)
+            self.stations[key] = _apply(
+                {name: live.get(name) for name in ("estado", "descripcion", "descripcion_app", "mensaje")}, {}, "live"
+            ) if live else None
+        for code, override in (overrides.get("stations") or {}).items():
+            key = self._by_code.get(code.upper())
+            if override.get("enabled") and key is not None:
+                self.stations[key] = _apply(self.stations[key], _manual_station(override), "override")
+
+        windows, self.unmatched = {}, []
+        for row in scheduled:
+            target = self._target(row, keys, aliases)
+            if target is None:
+                self.unmatched.append(row)
+                continue
+            windows.setdefault(target, []).append((timestamp(row["start_at"]), timestamp(row["end_at"]), row))
+        self.trees = {target: IntervalTree(intervals) for target, intervals in windows.items()}
+        self.boundaries = sorted({
+            point for intervals in windows.values() for start, end, _row in intervals for point in (start, end)
+        })
+
+    def _target(self, row, keys, aliases):
+        kind, target_id = row.get("target_type"), str(row.get("target_id") or "")
+        if kind == SYSTEM:
+            return SYSTEM
+        if kind == "line":
+            return ("line", target_id.lower()) if target_id.lower() in self.lines else None
+        if kind == "station":
+            key = self._by_code.get(target_id.upper())
+            if key is None:
+                key = station_key(target_id, None, keys, aliases)
+            return ("station", key) if key is not None else None
+        return None
+
+    def _scheduled(self, targets, ms):
+        """The winning window of the most specific target with one active at ``ms``."""
+        for target in targets:
+            tree = self.trees.get(target)
+            active = tree.at(ms) if tree is not None else None
+            if active:
+                return _winner(active)
+        return None
+
+    @staticmethod
+    def _apply_window(state, window, station):
+        _start, end, row = window
+        message = row.get("message") or ""
+        texts = ("descripcion", "descripcion_app", "mensaje") if station else ("mensaje", "mensaje_app")
+        fields = dict(dict.fromkeys(texts, message), estado=str(row["status"]))
+        merged = _apply(state, fields, "scheduled")
+        merged["override"] = {"id": row.get("id"), "source": row.get("source"), "type": row.get("type"), "until": end}
+        return merged
+
+    def line_at(self, line, ms):
+        window = self._scheduled((("line", line), SYSTEM), ms)
+        state = self.lines.get(line)
+        return self._apply_window(state, window, station=False) if window else state
+
+    def station_at(self, key, ms):
+        window = self._scheduled((("station", key), ("line", self.station_lines.get(key)), SYSTEM), ms)
+        state = self.stations.get(key)
+        return self._apply_window(state, window, station=True) if window else state
+
+    def resolve(self, ms):
+        """``{"time", "lines", "stations", "next"}``: every effective status at ``ms`` and the next transition."""
+        return {
+            "time": ms,
+            "lines": {line: self.line_at(line, ms) for line in self.lines},
+            "stations": {key: self.station_at(key, ms) for key in self.stations},
+            "next": self.next_transition(ms),
+        }
+
+    def next_transition(self, ms):
+        """The first window start or end after ``ms``, or ``None``.
+
+        The effective status cannot change before then, unless the live data or the manual overrides change.
+        A window shadowed by a more specific one still counts, so nothing may visibly change at that time.
+        """
+        index = bisect.bisect_right(self.boundaries, ms)
+        return self.boundaries[index] if index < len(self.boundaries) else None
+
+    def not_operational(self, ms, operational=OPERATIONAL):
+        """Station keys whose effective ``estado`` at ``ms`` is not operational, with their status."""
+        return {
+            key: state for key in self.stations
+            if (state := self.station_at(key, ms)) is not None and state["estado"] not in operational
+        }
+
+
+def load_scheduled(conn):
+    """Every ``scheduled_status_overrides`` row, as dicts."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, target_type, target_id, status, message, source, type, start_at, end_at "
+        "FROM scheduled_status_overrides"
+    )
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def main():
+    import stationsdata
+    from station_records import station_aliases
+
+    parser = argparse.ArgumentParser(description="Effective status with manual and scheduled overrides.")
+    parser.add_argument("command", choices=("at", "next"))
+    parser.add_argument("--time", help="ISO 8601 time (default: now)")
+    parser.add_argument("--scheduled", help="JSON list of scheduled_status_overrides rows (default: read MariaDB)")
+    parser.add_argument("--all", action="store_true", help="list every station, not only the non-operational ones")
+    args = parser.parse_args()
+
+    if args.scheduled:
+        with open(args.scheduled, encoding="utf-8") as scheduled_file:
+            scheduled = json.load(scheduled_file)
+    else:
+        from station_db_loader import connect_mariadb
+
+        conn = connect_mariadb()
+        try:
+            scheduled = load_scheduled(conn)
+        finally:
+            conn.close()
+
+    keys = stationsdata.records()
+    overrides_path = os.path.join(stationsdata.DATA_DIR, OVERRIDES_FILE)
+    overrides = stationsdata.load_json(OVERRIDES_FILE) if os.path.exists(overrides_path) else {}
+    resolver = StatusResolver(
+        keys, stationsdata.load_json("estadoRed.json"), overrides, scheduled,
+        station_aliases(stationsdata.load_json("stations.json"), keys),
+    )
+    ms = to_ms(args.time) if args.time else round(time.time() * 1000)
+
+    if args.command == "at":
+        states = resolver.resolve(ms)["stations"] if args.all else resolver.not_operational(ms)
+        for key, state in sorted(states.items()):
+            if state is None:
+                print(f"{key}: no status")
+                continue
+            print(f"{key}: estado {state['estado']} ({state['source']}) {state.get('descripcion') or ''}".rstrip())
+    following = resolver.next_transition(ms)
+    print(f"Next transition: {to_iso(following) if following is not None else 'none scheduled'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Read-only, offset-indexed station store shared by the bot processes via mmap.
+
+api.js forks the Discord and Telegram bots as separate processes and each one
+used to parse its own copy of the station views. The store is one binary file
+the OS page cache shares between all of them: a process maps it and reads only
+the entries it is asked for, so adding frontends or shards does not add a
+parsed copy of the data per process.
+
+Layout (little-endian)::
+
+    header   magic "MSTS", version u16, reserved u16, entry count u32
+    index    count x (key offset u32, key length u16, value offset u32, value length u32),
+             sorted by key bytes
+    keys     UTF-8 key bytes, back to back
+    values   minified JSON documents, one per station
+
+Station keys and estadoRed.json codes are both index entries; a code points
+at the same value bytes as its station key.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+
+MAGIC = b"MSTS"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHI")
+ENTRY = struct.Struct("<IHII")
+
+
+def build_store(stations, codes=None):
+    """Serialize ``{key: document}`` (plus ``{code: key}`` aliases) into store bytes."""
+    values = bytearray()
+    spans = {}
+    for key in sorted(stations):
+        encoded = json.dumps(stations[key], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        spans[key] = (len(values), len(encoded))
+        values += encoded
+
+    entries = {key.encode("utf-8"): span for key, span in spans.items()}
+    for code, key in (codes or {}).items():
+        entries.setdefault(code.encode("utf-8"), spans[key])
+
+    keys = bytearray()
+    index = []
+    for key in sorted(entries):
+        index.append((len(keys), len(key)) + entries[key])
+        keys += key
+
+    keys_start = HEADER.size + ENTRY.size * len(index)
+    values_start = keys_start + len(keys)
+    parts = [HEADER.pack(MAGIC, VERSION, 0, len(index))]
+    for key_offset, key_length, value_offset, value_length in index:
+        parts.append(ENTRY.pack(keys_start + key_offset, key_length, values_start + value_offset, value_length))
+    parts.append(bytes(keys))
+    parts.append(bytes(values))
+    return b"".join(parts)
+
+
+class StationStore:
+    """Memory-mapped reader; lookups binary-search the index without copying the file.
+
+    :meth:`raw` hands out ``memoryview`` slices of the mapping itself. Release
+    them before :meth:`close` (or leaving the ``with`` block), as ``mmap``
+    cannot be closed while views are exported.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as store_file:
+            self._map = mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version, _reserved, self._count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not a version {VERSION} station store")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._map is None:
+            return
+        self._view.release()
+        self._map.close()
+        self._map = None
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, position):
+        return ENTRY.unpack_from(self._map, HEADER.size + position * ENTRY.size)
+
+    def _key(self, entry):
+        return self._view[entry[0]:entry[0] + entry[1]]
+
+    def _find(self, key):
+        target = key.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            # memoryview only supports equality, so order on a copy of the (short) key
+            candidate = bytes(self._key(entry))
+            if candidate < target:
+                low = middle + 1
+            elif candidate > target:
+                high = middle
+            else:
+                return entry
+        return None
+
+    def _lookup(self, key):
+        # Codes are stored upper-case, like StationViews.get accepts them in any case.
+        return self._find(key) or self._find(key.upper())
+
+    def raw(self, key):
+        """Zero-copy ``memoryview`` of the JSON value for a station key or code, or ``None``."""
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        return self._view[entry[2]:entry[2] + entry[3]]
+
+    def get(self, key, default=None):
+        """Decoded document for a station key or code."""
+        value = self.raw(key)
+        if value is None:
+            return default
+        with value:
+            return json.loads(value.tobytes())
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def keys(self):
+        """Every indexed name (station keys and codes) in store order."""
+        return [bytes(self._key(self._entry(position))).decode("utf-8") for position in range(self._count)]
@@ -0,0 +1,178 @@
+"""Build-time schema and consistency checks for stationsdata.py.
+
+Everything the bot used to paper over with ``|| []`` fallbacks is checked
+once, before anything is written:
+
+- arity: seven slots per ``stationsData`` entry, two per ``stationsSchematics`` entry
+- URL shape: http(s) with a host, PDFs ending in ``.pdf``, flagged signed or malformed query strings
+- duplicate URLs shared by different stations
+- slot contents: transport terms in the transport slot
+- key parity between ``stationsData`` and ``stationsSchematics``
+- parity with the stations listed in stations.json and estadoRed.json
+- the top-level keys of the generated document match what the JS side reads
+
+Errors fail the build; warnings (stations that exist in the network lists but
+have no static data yet, signed attachment links, shared URLs) only fail with
+``strict``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from station_records import SLOTS, fold, parse_list, parse_value, station_aliases, station_key
+
+# Top-level keys src/utils/stationDataUtils.js reads from the generated file.
+OUTPUT_KEYS = ("stationsSchematics", "stationsData")
+
+SCHEMATIC_SLOTS = ("schematic_image", "schematic_pdf")
+
+KNOWN_TRANSPORTS = {"buses", "aeropuerto", "intermodales", "lineacero", "bicimetro", "tren"}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+# Query parameters Discord adds to expiring, signed attachment links.
+SIGNED_PARAMS = ("ex=", "is=", "hm=")
+
+
+@dataclass(frozen=True)
+class Issue:
+    severity: str
+    check: str
+    key: str | None
+    message: str
+
+    def __str__(self):
+        where = f"[{self.key}] " if self.key else ""
+        return f"{self.severity.upper():<7} {self.check:<16} {where}{self.message}"
+
+
+class ValidationError(Exception):
+    """Raised when the station data has errors (or warnings, in strict mode)."""
+
+    def __init__(self, issues):
+        self.issues = issues
+        super().__init__(format_report(issues))
+
+
+def _url_issues(key, slot, url):
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return [Issue("error", "url-shape", key, f"{slot} is not an http(s) URL: {url!r}")]
+
+    issues = []
+    path = parsed.path.lower()
+    if slot == "schematic_pdf" and not path.endswith(".pdf"):
+        issues.append(Issue("error", "url-shape", key, f"{slot} does not point at a PDF: {url}"))
+    elif slot != "schematic_pdf" and not path.endswith(IMAGE_EXTENSIONS):
+        issues.append(Issue("error", "url-shape", key, f"{slot} does not point at an image: {url}"))
+
+    if any(param in parsed.query for param in SIGNED_PARAMS):
+        issues.append(Issue("warning", "url-shape", key, f"{slot} is a signed, expiring attachment link"))
+    elif parsed.query and "=" not in parsed.query:
+        issues.append(Issue("warning", "url-shape", key, f"{slot} has a malformed query string: ?{parsed.query}"))
+    return issues
+
+
+def validate(stations_data, stations_schematics, stations_json=None, estado_red=None, document=None):
+    """Run every check in one pass over the data and return the list of :class:`Issue`."""
+    issues = []
+    urls = {}
+
+    def check_url(key, slot, value):
+        url = parse_value(value)
+        if url is None:
+            return
+        issues.extend(_url_issues(key, slot, url))
+        urls.setdefault(url, []).append(key)
+
+    for key, raw in stations_data.items():
+        if len(raw) != len(SLOTS):
+            issues.append(Issue("error", "arity", key, f"stationsData entry has {len(raw)} slots, expected {len(SLOTS)}"))
+            continue
+        slots = dict(zip(SLOTS, raw))
+        check_url(key, "image", slots["image"])
+        unknown = [item for item in parse_list(slots["transports"]) if fold(item) not in KNOWN_TRANSPORTS]
+        if unknown:
+            issues.append(Issue("error", "slot-contents", key, f"unexpected transport(s) {', '.join(unknown)}; slots shifted?"))
+
+    for key, raw in stations_schematics.items():
+        if len(raw) != len(SCHEMATIC_SLOTS):
+            issues.append(Issue(
+                "error", "arity", key, f"stationsSchematics entry has {len(raw)} slots, expected {len(SCHEMATIC_SLOTS)}",
+            ))
+        for slot, value in zip(SCHEMATIC_SLOTS, raw):
+            check_url(key, slot, value)
+
+    for url, keys in urls.items():
+        stations = sorted(set(keys))
+        if len(stations) > 1:
+            # Usually a copy-paste; a warning, so fixing it never means dropping the only image a station has.
+            issues.append(Issue("warning", "duplicate-url", None, f"{url} is shared by {', '.join(stations)}"))
+
+    for key in stations_data:
+        if key not in stations_schematics:
+            issues.append(Issue("error", "key-parity", key, "missing from stationsSchematics"))
+    for key in stations_schematics:
+        if key not in stations_data:
+            issues.append(Issue("error", "key-parity", key, "missing from stationsData"))
+
+    keys = set(stations_data) | set(stations_schematics)
+    aliases = station_aliases(stations_json, keys)
+    for source, names in (("stations.json", _stations_json_names(stations_json)), ("estadoRed.json", _estado_red_names(estado_red))):
+        if names is None:
+            continue
+        listed = set()
+        for line, name in names:
+            key = station_key(name, line, keys, aliases)
+            if key is None:
+                issues.append(Issue("warning", "network-parity", None, f"{name} ({line}) in {source} has no station data"))
+            else:
+                listed.add(key)
+        for key in sorted(keys - listed):
+            issues.append(Issue("error", "network-parity", key, f"not listed in {source}"))
+
+    if document is not None:
+        missing = [name for name in OUTPUT_KEYS if name not in document]
+        if missing:
+            issues.append(Issue("error", "output-keys", None, f"generated document lacks {', '.join(missing)}"))
+
+    return issues
+
+
+def _stations_json_names(stations_json):
+    if stations_json is None:
+        return None
+    return [(line, name) for line, stations in stations_json.items() for name in stations]
+
+
+def _estado_red_names(estado_red):
+    if estado_red is None:
+        return None
+    return [
+        (line, station["nombre"])
+        for line, info in estado_red.items()
+        for station in (info or {}).get("estaciones", [])
+    ]
+
+
+def failures(issues, strict=False):
+    return [issue for issue in issues if issue.severity == "error" or strict]
+
+
+def check(stations_data, stations_schematics, strict=False, **sources):
+    """Validate and raise :class:`ValidationError` if the build should fail; returns the issues otherwise."""
+    issues = validate(stations_data, stations_schematics, **sources)
+    if failures(issues, strict):
+        raise ValidationError(issues)
+    return issues
+
+
+def format_report(issues):
+    if not issues:
+        return "Station data is valid."
+    errors = sum(1 for issue in issues if issue.severity == "error")
+    lines = [f"Station data validation: {errors} error(s), {len(issues) - errors} warning(s)"]
+    lines.extend(str(issue) for issue in sorted(issues, key=lambda issue: (issue.severity, issue.check, issue.key or "")))
+    return "\n".join(lines)
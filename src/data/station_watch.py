@@ -0,0 +1,260 @@
+"""Watch mode: regenerate station artifacts on source edits and push deltas to running bots.
+
+The watcher polls the station sources (stationsdata.py and the JSON next to
+it, the accessDetails/ folder, routeWeights.js, the coordinates file) and
+waits for a burst of edits to settle. It then regenerates only the artifacts
+that depend on the changed sources, using incremental mode so unchanged
+files keep their bytes. One delta message goes to every bot process
+subscribed on a Unix socket, so the bots can patch their data live instead
+of reloading or restarting.
+
+Messages are newline-delimited JSON:
+
+    {"type": "hello", "version": ...}
+        sent on connect
+    {"type": "delta", "version", "sources", "artifacts", "stations", "records"}
+        ``version`` hashes the content of every artifact, so it moves with any of them;
+        ``stations`` lists the added/removed/modified keys; ``records`` holds the new added/modified records
+    {"type": "error", "sources", "message"}
+        the sources do not validate; the previous artifacts stay in place
+
+Usage:
+    python station_watch.py --output DIR [--socket PATH] [--interval SECONDS] [--format FMT] [--strict]
+    python station_watch.py --listen [--socket PATH]     (print the messages, for debugging)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+
+import stationsdata
+from station_manifest import content_hash
+
+DEFAULT_SOCKET = "/tmp/metro-stations.sock"
+
+MANIFEST_FILE = "stationsdata.manifest.json"
+
+# Source (relative to the data directory) -> artifacts of stationsdata.ARTIFACTS built from it.
+SOURCES = {
+    "stationsdata.py": stationsdata.ARTIFACTS,
+    "stations.json": stationsdata.ARTIFACTS,
+    "estadoRed.json": ("views", "store", "embeds"),
+    "accessibilityCache.json": ("views", "store"),
+    "accessDetails": ("views", "store"),
+    "stationConnections.json": ("views", "store", "embeds", "intermodal"),
+    "intermodalBuses.json": ("intermodal",),
+    os.path.join("..", "config", "routeWeights.js"): ("routes",),
+    "stationCoordinates.json": ("geo",),
+}
+
+
+def affected_artifacts(sources):
+    """Artifacts to rebuild for a set of changed sources, in stationsdata.ARTIFACTS order."""
+    wanted = {artifact for source in sources for artifact in SOURCES.get(source, ())}
+    return [artifact for artifact in stationsdata.ARTIFACTS if artifact in wanted]
+
+
+def _signature(path):
+    """mtime and size of a file, or of every file in a directory; ``None`` if missing."""
+    try:
+        if os.path.isdir(path):
+            return tuple(sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in os.scandir(path) if entry.is_file()
+            ))
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Publisher:
+    """Unix socket server broadcasting newline-delimited JSON messages to every connected subscriber."""
+
+    def __init__(self, path=DEFAULT_SOCKET):
+        self.path = path
+        self.version = None
+        self.subscribers = set()
+        self.server = None
+
+    async def start(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._connected, path=self.path)
+
+    async def _connected(self, reader, writer):
+        self.subscribers.add(writer)
+        await self._send(writer, {"type": "hello", "version": self.version})
+        try:
+            # Subscribers do not talk back; this just waits for them to hang up (or for shutdown).
+            with contextlib.suppress(ConnectionError, asyncio.CancelledError):
+                while await reader.read(1024):
+                    pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def _send(self, writer, message):
+        try:
+            writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+        except (ConnectionError, OSError):
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def publish(self, message):
+        if message.get("version"):
+            self.version = message["version"]
+        await asyncio.gather(*(self._send(writer, message) for writer in list(self.subscribers)))
+
+    async def close(self):
+        for writer in list(self.subscribers):
+            writer.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+
+async def subscribe(path=DEFAULT_SOCKET):
+    """Yield the messages published on ``path``; what a bot process (or a test) runs to receive deltas."""
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        while line := await reader.readline():
+            yield json.loads(line)
+    finally:
+        writer.close()
+
+
+class Watcher:
+    """Polls the sources and regenerates/publishes when they change."""
+
+    def __init__(self, publisher, output_dir, fmt="json", strict=False, interval=1.0, data_dir=None):
+        self.publisher = publisher
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.strict = strict
+        self.interval = interval
+        self.data_dir = data_dir or stationsdata.DATA_DIR
+        # Source signatures as of the last successful regeneration, and of the last failed one
+        self.signatures = self._signatures()
+        self.failed = None
+        # Artifact file name -> content hash; the version hashes them all, so any artifact change bumps it
+        self.artifacts = {}
+        self.version = None
+
+    def _signatures(self):
+        return {source: _signature(os.path.join(self.data_dir, source)) for source in SOURCES}
+
+    def changed_sources(self, signatures=None):
+        """Sources whose signature (now, or in ``signatures``) moved since the last successful regeneration."""
+        current = self._signatures() if signatures is None else signatures
+        return sorted(source for source in SOURCES if current[source] != self.signatures[source])
+
+    def _generate(self, sources):
+        if sources and "stationsdata.py" in sources:
+            # Re-executes the module, which also drops every memoized record and index.
+            importlib.reload(stationsdata)
+        return stationsdata.generate_json_file(
+            incremental=True, fmt=self.fmt, strict=self.strict, output_dir=self.output_dir,
+            only=None if sources is None else affected_artifacts(sources),
+        )
+
+    async def regenerate(self, sources=None, signatures=None):
+        """Rebuild what ``sources`` affect (everything when ``None``) and publish the delta.
+
+        ``signatures`` are the source signatures the rebuild reads. They only
+        become the baseline once it succeeds, so the sources of a failed
+        rebuild are rebuilt again with the next edit. Returns the published
+        message, or ``None`` when no file changed.
+        """
+        signatures = self._signatures() if signatures is None else signatures
+        try:
+            result = await asyncio.to_thread(self._generate, sources)
+        except Exception as error:  # a half-edited stationsdata.py or invalid data must not stop the watcher
+            self.failed = signatures
+            message = {"type": "error", "sources": sources, "message": str(error)}
+            await self.publisher.publish(message)
+            return message
+
+        self.signatures, self.failed = signatures, None
+        self.artifacts.update(result["hashes"])
+        self.version = self.publisher.version = content_hash(self.artifacts)
+        if not [name for name in result["written"] if name != MANIFEST_FILE]:
+            # Nothing but the manifest's "changes" being reset to an empty diff
+            return None
+
+        changes = result["changes"]
+        records = stationsdata.records()
+        message = {
+            "type": "delta",
+            "version": self.version,
+            "sources": sources,
+            "artifacts": result["written"],
+            "stations": changes,
+            "records": {key: records[key].to_dict() for key in changes["added"] + changes["modified"]},
+        }
+        await self.publisher.publish(message)
+        return message
+
+    async def run(self):
+        """Generate once, then poll forever; a change is handled once the sources stop moving for one interval.
+
+        After a failed rebuild nothing is retried until a source moves again. The rebuild then covers every
+        source changed since the last successful one.
+        """
+        await self.regenerate()
+        while True:
+            await asyncio.sleep(self.interval)
+            seen = self._signatures()
+            if seen == self.signatures or seen == self.failed:
+                continue
+            while True:
+                await asyncio.sleep(self.interval)
+                settled = self._signatures()
+                if settled == seen:
+                    break
+                seen = settled
+            # Until one full rebuild has succeeded, every rebuild is a full one.
+            sources = self.changed_sources(seen) if self.version is not None else None
+            await self.regenerate(sources, seen)
+
+
+async def _listen(path):
+    async for message in subscribe(path):
+        print(json.dumps(message, ensure_ascii=False))
+
+
+async def _watch(args):
+    publisher = Publisher(args.socket)
+    await publisher.start()
+    try:
+        await Watcher(publisher, args.output, fmt=args.fmt, strict=args.strict, interval=args.interval).run()
+    finally:
+        await publisher.close()
+
+
+def main():
+    import station_formats
+
+    parser = argparse.ArgumentParser(description="Regenerate station artifacts on edits and publish deltas.")
+    parser.add_argument("--output", "-o", default=".", help="directory the generated files live in")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between polls")
+    parser.add_argument("--format", dest="fmt", choices=station_formats.FORMATS, default="json")
+    parser.add_argument("--strict", action="store_true")
+    parser.add_argument("--listen", action="store_true", help="subscribe and print messages instead of watching")
+    args = parser.parse_args()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_listen(args.socket) if args.listen else _watch(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,37 @@
+"""Static station data: schematics and the positional ``stationsData`` lists.
+
+Importing this module does no I/O and builds nothing; the two dicts are
+materialized on first access (``stationsdata.stationsData`` still works) and
+compiled records are memoized per station and per category. Generation of the
+JSON artifacts lives behind the command line entry point:
+
+    python stationsdata.py --output DIR [--format json|min|columnar|msgpack] [--incremental] [--strict]
+"""
+
+import hashlib
 import json
+import os
 import sys
+from functools import lru_cache
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Everything generate_json_file can write, by short name
+ARTIFACTS = ("data", "search", "views", "store", "routes", "express", "geo", "embeds", "intermodal")
 
 #Transporte, Servicios Generales, Accesibilidd, Comercio, Cultura, "link de imagen"
 
 #estacion : ["transporte", "servicios", "accesibilidad","comercio", "cultura", "link"],
 
-stationsSchematics = {
+@lru_cache(maxsize=None)
+def _stations_schematics():
+    return {
 
   "san pablo l1" : ["https://media.discordapp.net/attachments/792250794296606743/908383616168509490/unknown.png", "https://www.metro.cl/estacion/isometricas/san-pablo-l1.pdf"],
 
   "neptuno" : ["https://cdn.discordapp.com/attachments/792250794296606743/908384059812630538/unknown.png", "https://www.metro.cl/estacion/isometricas/neptuno.pdf"],
 
-  "pajaritos" : ["https://media.discordapp.net/attachments/792250794296606743/908384804297388082/unknown.png", "https://www.metro.cl/estacion/isometricas/neptuno.pdf"],
+  "pajaritos" : ["https://media.discordapp.net/attachments/792250794296606743/908384804297388082/unknown.png", "None"],
 
   "las rejas": ["https://cdn.discordapp.com/attachments/792250794296606743/908419029084020796/unknown.png", "https://www.metro.cl/estacion/isometricas/las-rejas.pdf"],
 
@@ -21,7 +41,7 @@ stationsSchematics = {
 
   "universidad de santiago": ["https://cdn.discordapp.com/attachments/792250794296606743/908421584631504946/unknown.png", "https://www.metro.cl/estacion/isometricas/universidad-de-santiago.pdf"],
 
-  "estacion central": ["https://media.discordapp.net/attachments/792250794296606743/908507324757471242/unknown.png", "https://www.metro.cl/estacion/isometricas/estacion-central.pdf", "Estación Central"],
+  "estacion central": ["https://media.discordapp.net/attachments/792250794296606743/908507324757471242/unknown.png", "https://www.metro.cl/estacion/isometricas/estacion-central.pdf"],
 
   "union latinoamericana": ["https://media.discordapp.net/attachments/792250794296606743/908511398819147786/unknown.png", "https://www.metro.cl/estacion/isometricas/union-latinoamericana.pdf"],
 
@@ -99,11 +119,11 @@ stationsSchematics = {
 
   "ciudad del nino" : ["https://media.discordapp.net/attachments/792250794296606743/908858969353760808/unknown.png", "https://www.metro.cl/estacion/isometricas/ciudad-del-nino.pdf"],
 
-  "lo ovalle" : ["https://cdn.discordapp.com/attachments/792250794296606743/908862070928322580/unknown.png", "https://www.metro.cl/estacion/isometricas/lo-ovalle.pdf", "La Cisterna"],
+  "lo ovalle" : ["https://cdn.discordapp.com/attachments/792250794296606743/908862070928322580/unknown.png", "https://www.metro.cl/estacion/isometricas/lo-ovalle.pdf"],
 
-  "el parron" : ["https://cdn.discordapp.com/attachments/792250794296606743/908863331413159936/unknown.png", "https://www.metro.cl/estacion/isometricas/el-parron.pdf", "La Cisterna"],
+  "el parron" : ["https://cdn.discordapp.com/attachments/792250794296606743/908863331413159936/unknown.png", "https://www.metro.cl/estacion/isometricas/el-parron.pdf"],
 
-  "la cisterna l2" : ["https://cdn.discordapp.com/attachments/792250794296606743/908865345111097454/unknown.png", "https://www.metro.cl/estacion/isometricas/la-cisterna-l2.pdf", "La Cisterna"],
+  "la cisterna l2" : ["https://cdn.discordapp.com/attachments/792250794296606743/908865345111097454/unknown.png", "https://www.metro.cl/estacion/isometricas/la-cisterna-l2.pdf"],
 
   "los libertadores" : ["https://media.discordapp.net/attachments/792250794296606743/908849419187814470/unknown.png", "https://www.metro.cl/estacion/isometricas/los-libertadores.pdf"],
 
@@ -159,6 +179,8 @@ stationsSchematics = {
 
   "los presidentes" : ["https://media.discordapp.net/attachments/792250794296606743/908862376680489011/unknown.png", "https://www.metro.cl/estacion/isometricas/los-presidentes.pdf"],
 
+  "quilin" : ["None", "https://www.metro.cl/el-viaje/estaciones/isometricas/quilin.pdf"],
+
   "las torres" : ["https://cdn.discordapp.com/attachments/792250794296606743/908864139210936350/unknown.png", "https://www.metro.cl/estacion/isometricas/las-torres.pdf"],
 
   "macul" : ["https://cdn.discordapp.com/attachments/792250794296606743/908865928895295518/unknown.png", "https://www.metro.cl/estacion/isometricas/macul.pdf"],
@@ -203,7 +225,7 @@ stationsSchematics = {
 
   "del sol" : ["https://cdn.discordapp.com/attachments/792250794296606743/908703807314210886/unknown.png", "https://www.metro.cl/estacion/isometricas/del-sol.pdf"],
 
-  "monte tabor" : ["https://media.discordapp.net/attachments/792250794296606743/908703129879580672/unknown.png", "https://www.metro.cl/estacion/isometricas/las-parcelas.pdf"],
+  "monte tabor" : ["https://media.discordapp.net/attachments/792250794296606743/908703129879580672/unknown.png", "None"],
 
   "las parcelas" : ["https://media.discordapp.net/attachments/792250794296606743/908703129879580672/unknown.png", "https://www.metro.cl/estacion/isometricas/las-parcelas.pdf"],
 
@@ -241,7 +263,7 @@ stationsSchematics = {
 
   "nuble l5" : ["https://media.discordapp.net/attachments/792250794296606743/908733520833310870/unknown.png", "https://www.metro.cl/estacion/isometricas/nuble.pdf"],
 
-  "rodrigo de araya": ["https://media.discordapp.net/attachments/792250794296606743/908841753069649930/unknown.png", "https://www.metro.cl/estacion/isometricas/rodrigo-de-araya.pdf", "San Joaquín"],
+  "rodrigo de araya": ["https://media.discordapp.net/attachments/792250794296606743/908841753069649930/unknown.png", "https://www.metro.cl/estacion/isometricas/rodrigo-de-araya.pdf"],
 
   "carlos valdovinos" : ["https://media.discordapp.net/attachments/792250794296606743/908850391691694170/unknown.png", "https://www.metro.cl/estacion/isometricas/carlos-valdovinos.pdf"],
 
@@ -280,7 +302,9 @@ stationsSchematics = {
   }
 
 
-stationsData = {
+@lru_cache(maxsize=None)
+def _stations_data():
+    return {
 
   "san pablo l1" : ["None", "Máquinas de carga autoservicio, Redbanc, Teléfonos", "Todos los Ascensores Disponibles","San Camilo", "MetroArte, Bibliometro, Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/900527520393363526/unknown.png?width:312&height:468", "Lo Prado"],
 
@@ -352,7 +376,7 @@ stationsData = {
 
   "el llano" : ["None", "Máquinas de carga autoservicio, Redbanc, Teléfonos", "Ascensor de acceso ubicado en Gran Avenida José Miguel Carrera (vereda oriente).", "Maxi-K", "Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/901096616990216223/unknown.png", "San Miguel"],
 
-  "franklin l2" : ["None", "Redbanc, Teléfonos", "- Ascensor de acceso ubicado en Placer con Nataniel Cox por Intermodal y Línea 2.\n- Ascensor de acceso ubicado en Centenario con San Diego (detrás del acceso) por Línea 6.", "Xs Market", "MetroArte, Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/901654504854945802/unknown.png", "Santiago Centro", "Santiago Centro"],
+  "franklin l2" : ["None", "Redbanc, Teléfonos", "- Ascensor de acceso ubicado en Placer con Nataniel Cox por Intermodal y Línea 2.\n- Ascensor de acceso ubicado en Centenario con San Diego (detrás del acceso) por Línea 6.", "Xs Market", "MetroArte, Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/901654504854945802/unknown.png", "Santiago Centro"],
 
   "rondizzoni" : ["None", "Redbanc, Teléfonos", "Rampa de acceso ubicada en General Rondizonni (vereda sur) con Av. Viel.", "None", "Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/901831110848282634/unknown.png", "Santiago Centro"],
 
@@ -446,7 +470,7 @@ stationsData = {
 
   "rojas magallanes" : ["None", "Máquinas de carga autoservicio, Redbanc, Teléfonos", "Ascensor de acceso ubicado en Rojas Magallanes con Av. Vicuña Mackenna.", "None", "Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/902284496420884580/unknown.png", "La Florida"],
 
-  "trinidad" : ["Redbanc, Teléfonos", "None", "Ascensor de acceso ubicado en Av. Trinidad con Av. Vicuña Mackenna.", "None", "Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/902284817931075634/unknown.png", "La Florida"],
+  "trinidad" : ["None", "Redbanc, Teléfonos", "Ascensor de acceso ubicado en Av. Trinidad con Av. Vicuña Mackenna.", "None", "Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/902284817931075634/unknown.png", "La Florida"],
 
   "san jose de la estrella" : ["None", "Redbanc, Teléfonos", "Ascensor de acceso ubicado en Av. San José de la Estrella con Av. Vicuña Mackenna.", "None", "Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/902285053684510750/unknown.png", "La Florida"],
 
@@ -490,7 +514,7 @@ stationsData = {
 
   "pudahuel" : ["Bicimetro", "Máquinas de carga autoservicio, Redbanc, Teléfonos", "Acceso a nivel de calle en Av. San Pablo (vereda sur).", "San Camilo", "MetroArte, Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/902353638532452352/unknown.png", "Pudahuel"],
 
-  "san pablo l5" : ["None", "Máquinas de carga autoservicio, Redbanc, Teléfonos", "None","None", "MetroArte, Metroinforma", "Lo Prado"],
+  "san pablo l5" : ["None", "Máquinas de carga autoservicio, Redbanc, Teléfonos", "None","None", "MetroArte, Metroinforma", "None", "Lo Prado"],
 
   "lo prado" : ["None", "Máquinas de carga autoservicio, Redbanc, Teléfonos", "Ascensor de acceso ubicado en Av. San Pablo (vereda norte).", "None", "Metroinforma", "https://media.discordapp.net/attachments/792250794296606743/902354164514947092/unknown.png", "Lo Prado"],
 
@@ -560,31 +584,285 @@ stationsData = {
 
 
 
-# Combine all data into a single dictionary
-data = {
-    "schematics": stationsSchematics,
-    "staticData": stationsData
+# Combine all data into a single dictionary, keyed the way stationDataUtils.js reads it
+
+@lru_cache(maxsize=None)
+def _data():
+
+    return {
+        "stationsSchematics": _stations_schematics(),
+        "stationsData": _stations_data()
+    }
+
+
+_LAZY = {
+    "stationsSchematics": _stations_schematics,
+    "stationsData": _stations_data,
+    "data": _data,
 }
 
 
+def __getattr__(name):
+    # Keeps `stationsdata.stationsData` / `from stationsdata import data` working without eager construction.
+    if name in _LAZY:
+        return _LAZY[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+
+# Memoized, typed access for in-process consumers
+
+@lru_cache(maxsize=None)
+def _communes():
+
+    from station_records import commune_names
+
+    return commune_names(_stations_data())
+
+
+@lru_cache(maxsize=None)
+def station(key):
+
+    """Compiled :class:`station_records.StationRecord` for one station key, or ``None``."""
+
+    from station_records import build_record
+
+    if key not in _stations_data() and key not in _stations_schematics():
+        return None
+
+    return build_record(key, _stations_data().get(key), _stations_schematics().get(key), _communes())
+
+
+def station_keys():
+
+    return list(_stations_data()) + [key for key in _stations_schematics() if key not in _stations_data()]
+
+
+@lru_cache(maxsize=None)
+def records():
+
+    """All compiled records keyed by station key (built once, sharing the per-station cache)."""
+
+    return {key: station(key) for key in station_keys()}
+
+
+@lru_cache(maxsize=None)
+def category(name):
+
+    """Inverted index ``{folded term: [station keys]}`` for one record category (e.g. "commerce")."""
+
+    from station_indexes import build_indexes
+
+    return build_indexes(records(), (name,))[name]
+
+
+
+# Read one of the JSON files that live next to this script
+
+def load_json(name):
+
+    with open(os.path.join(DATA_DIR, name), encoding="utf-8") as json_file:
+
+        return json.load(json_file)
+
+
+
+# Function to generate the JSON files (``only`` limits it to some of ARTIFACTS).
+# Returns the files written, the station changes (incremental mode) and each built artifact's content hash.
+
+def generate_json_file(incremental=False, fmt="json", strict=False, output_dir=".", only=None):
+
+    import station_formats
+    import station_validator
+    from station_embeds import build_station_embeds
+    from station_express import build_express_patterns
+    from station_geo import COORDINATES_FILE, build_geo_index, load_coordinates
+    from station_indexes import build_indexes, build_vocabulary
+    from station_intermodal import build_intermodal_index
+    from station_join import build_station_views, load_access_details
+    from station_manifest import build_manifest, read_manifest, write_file, write_if_changed
+    from station_records import station_aliases
+    from station_routes import build_network, build_route_tables, load_profiles
+    from station_search import build_search_artifact
+    from station_store import build_store
+
+    def output_path(name):
+
+        return os.path.join(output_dir, name)
+
+    # Define the output file name for the chosen format (stationsdata.json, stationsdata.min.json, ...)
+
+    file_name = station_formats.file_name("stationsdata", fmt)
+
+    manifest_file_name = "stationsdata.manifest.json"
+
+    # Parse the positional lists once so consumers get typed records
+
+    compiled = records()
+
+    stations = {key: record.to_dict() for key, record in compiled.items()}
+
+    output = dict(
+        _data(),
+        stations=stations,
+        indexes=build_indexes(compiled),
+        vocabulary=build_vocabulary(compiled),
+    )
+
+    stations_json = load_json("stations.json")
+
+    estado_red = load_json("estadoRed.json")
+
+    # Fail before writing anything if the data has defects (raises ValidationError with the report)
+
+    issues = station_validator.check(
+        _stations_data(),
+        _stations_schematics(),
+        strict=strict,
+        stations_json=stations_json,
+        estado_red=estado_red,
+        document=output,
+    )
+
+    if issues:
+
+        print(station_validator.format_report(issues))
+
+    # Derived artifacts, each built only if requested (watch mode asks for the ones whose sources changed)
+
+    @lru_cache(maxsize=None)
+    def aliases():
+
+        return station_aliases(stations_json, compiled)
+
+    # The station-name search index and the joined per-station views
+
+    @lru_cache(maxsize=None)
+    def views():
+
+        return build_station_views(
+            compiled,
+            estado_red,
+            accessibility=load_json("accessibilityCache.json"),
+            access_details=load_access_details(os.path.join(DATA_DIR, "accessDetails")),
+            connections=load_json("stationConnections.json"),
+            stations_json=stations_json,
+        )
+
+    def search():
+
+        return build_search_artifact(compiled, stations_json)
+
+    # Route planner tables: the line graph, walked per weight profile of src/config/routeWeights.js
+
+    def routes():
+
+        return build_route_tables(build_network(stations_json, compiled, aliases()), load_profiles())
+
+    # Express (ruta roja/verde) stop patterns per line, colour and direction
+
+    def express():
+
+        return build_express_patterns(stations_json, compiled, aliases())
+
+    # Nearest-station grid (from coordinates exported out of metro_stations, see station_geo.py) and communes
+
+    def geo():
+
+        return build_geo_index(load_coordinates(os.path.join(DATA_DIR, COORDINATES_FILE)), compiled)
+
+    # Station <-> mode/route/operator, from slot 0, stationConnections.json and intermodalBuses.json
+
+    def intermodal():
+
+        return build_intermodal_index(
+            compiled,
+            connections=load_json("stationConnections.json"),
+            buses=load_json("intermodalBuses.json"),
+            aliases=aliases(),
+        )
+
+    builders = {
+        "data": (file_name, lambda: station_formats.dumps(output, fmt)),
+        "search": ("stationsearch.json", lambda: station_formats.dumps(search(), "min")),
+        "views": ("stationviews.json", lambda: station_formats.dumps(views(), "min")),
+        # The same views, offset-indexed for processes that mmap them (see station_store.py)
+        "store": ("stationviews.store", lambda: build_store(views()["stations"], views()["codes"])),
+        "routes": ("stationroutes.json", lambda: station_formats.dumps(routes(), "min")),
+        "express": ("stationexpress.json", lambda: station_formats.dumps(express(), "min")),
+        "geo": ("stationgeo.json", lambda: station_formats.dumps(geo(), "min")),
+        # Static parts of the station info embeds, versioned so the bot can cache sent cards
+        "embeds": ("stationembeds.json", lambda: station_formats.dumps(build_station_embeds(views()["stations"]), "min")),
+        "intermodal": ("stationintermodal.json", lambda: station_formats.dumps(intermodal(), "min")),
+    }
+
+    artifacts = [(name, build()) for artifact, (name, build) in builders.items() if only is None or artifact in only]
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Content hash of every artifact built this run, written or not, so callers can version the whole set
+
+    hashes = {name: hashlib.sha256(content.encode("utf-8") if isinstance(content, str) else content).hexdigest()
+              for name, content in artifacts}
+
+    if not incremental:
+
+        for name, content in artifacts:
+
+            write_file(output_path(name), content)
+
+            print(f"File '{output_path(name)}' has been generated successfully.")
+
+        return {"written": [name for name, _content in artifacts], "changes": None, "hashes": hashes}
+
+    # Incremental mode: only touch files whose content changed and record which stations did
+
+    previous = read_manifest(output_path(manifest_file_name))
+
+    manifest = build_manifest(stations, previous)
+
+    written = [name for name, content in artifacts if write_if_changed(output_path(name), content)]
+
+    # Rewritten even when no station changed, so "changes" never reports the previous run's diff
+
+    if write_if_changed(output_path(manifest_file_name), json.dumps(manifest, indent=4)):
+
+        written.append(manifest_file_name)
+
+    changes = manifest["changes"]
+
+    print(
+        f"Updated {', '.join(written) or 'nothing'} "
+        f"({len(changes['added'])} added, {len(changes['removed'])} removed, {len(changes['modified'])} modified)."
+    )
 
-# Function to generate a JSON file
+    return {"written": written, "changes": changes, "hashes": hashes}
 
-def generate_json_file():
 
-    # Define the JSON file name
 
-    file_name = "stationsdata.json"
+# Command line entry point
 
-    # Write the data to the JSON file
+def main(argv=None):
 
-    with open(file_name, "w") as json_file:
+    import argparse
 
-        json.dump(data, json_file, indent=4)
+    import station_formats
+    import station_validator
 
-    print(f"JSON file '{file_name}' has been generated successfully.")
+    parser = argparse.ArgumentParser(description="Generate the station data files.")
+    parser.add_argument("--output", "-o", default=".", help="directory to write the generated files to")
+    parser.add_argument("--format", dest="fmt", choices=station_formats.FORMATS, default="json")
+    parser.add_argument("--incremental", action="store_true", help="only write files whose content changed")
+    parser.add_argument("--strict", action="store_true", help="fail on validation warnings too")
+    args = parser.parse_args(argv)
 
-# Call the function to generate the JSON file
+    try:
+        generate_json_file(incremental=args.incremental, fmt=args.fmt, strict=args.strict, output_dir=args.output)
+    except station_validator.ValidationError as error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
 
 
- generate_json_file()
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
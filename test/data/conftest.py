@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The station data pipeline lives next to the JSON it generates, as plain modules.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src", "data"))
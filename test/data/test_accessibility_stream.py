@@ -0,0 +1,46 @@
+import io
+import json
+
+import pytest
+
+from accessibility_stream import AccessibilityDiffer, _iter_object_items, iter_snapshot, replay
+
+SNAPSHOT = {
+    "LEN-1": {"time": "t1", "estado": 1, "tipo": "ascensor", "estacion": "LEN", "texto": "Ascensor Línea 6"},
+    "LEN-2": {"time": "t1", "estado": 1, "tipo": "escalera", "estacion": "LEN", "texto": "Escalera 19-N"},
+    "SP-1": {"time": "t1", "estado": 0, "tipo": "ascensor", "estacion": "SP", "texto": "Ascensor"},
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64 * 1024])
+def test_object_items_survive_any_chunking(chunk_size):
+    text = json.dumps(SNAPSHOT, indent=2, ensure_ascii=False) + "\n"
+    assert dict(_iter_object_items(io.StringIO(text), chunk_size)) == SNAPSHOT
+    assert list(_iter_object_items(io.StringIO('{"a": 12345}'), chunk_size)) == [("a", 12345)]
+    assert list(_iter_object_items(io.StringIO(" {} "), chunk_size)) == []
+
+
+def test_differ_emits_only_changes_grouped_by_station():
+    differ = AccessibilityDiffer({"LEN": "los leones l6", "SP": "san pablo l1"})
+    first = differ.diff(SNAPSHOT.items())
+    assert sorted(first) == ["los leones l6", "san pablo l1"]
+
+    changed = json.loads(json.dumps(SNAPSHOT))
+    changed["LEN-2"]["estado"] = 0
+    del changed["SP-1"]
+    changes = differ.diff(changed.items())
+    assert changes == {
+        "los leones l6": [{"id": "LEN-2", "tipo": "escalera", "texto": "Escalera 19-N", "from": 1, "to": 0, "time": "t1"}],
+        "san pablo l1": [{"id": "SP-1", "tipo": None, "texto": None, "from": 0, "to": None, "time": None}],
+    }
+    assert differ.diff(changed.items()) == {}
+
+
+def test_replay_reports_changes_per_snapshot(tmp_path):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps(SNAPSHOT), encoding="utf-8")
+    new.write_text(json.dumps(dict(SNAPSHOT, **{"SP-1": dict(SNAPSHOT["SP-1"], estado=1)})), encoding="utf-8")
+    assert dict(iter_snapshot(str(old))) == SNAPSHOT
+
+    stats = replay([str(old), str(new), str(new)])
+    assert [(row["entries"], row["changes"], row["stations"]) for row in stats] == [(3, 3, 2), (3, 1, 1), (3, 0, 0)]
@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from asset_manifest import build_asset_manifest, collect_assets
+from station_records import build_records
+
+BODIES = {"/a.png": b"png-a", "/b.pdf": b"%PDF-b", "/copy.png": b"png-a"}
+
+
+class AssetHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        AssetHandler.requests.append(self.path)
+        body = BODIES.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), AssetHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    AssetHandler.requests = []
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _assets(base):
+    stations_data = {
+        "neptuno": ["None", "None", "None", "None", "None", f"{base}/a.png", "Lo Prado"],
+        "pajaritos": ["None", "None", "None", "None", "None", f"{base}/copy.png", "Lo Prado"],
+    }
+    schematics = {
+        "neptuno": [f"{base}/a.png", f"{base}/b.pdf"],
+        "pajaritos": ["None", f"{base}/missing.pdf"],
+    }
+    return collect_assets(build_records(stations_data, schematics))
+
+
+def test_collect_assets_dedupes_urls(server):
+    assets = _assets(server)
+    assert len(assets) == 4
+    assert assets[f"{server}/a.png"] == [["neptuno", "image"], ["neptuno", "schematic_image"]]
+
+
+def test_manifest_records_hashes_and_broken_links(server):
+    manifest = asyncio.run(build_asset_manifest(_assets(server), concurrency=2, now=1000))
+    entry = manifest["assets"][f"{server}/b.pdf"]
+    assert entry["ok"] and entry["size"] == 6
+    assert entry["sha256"] == hashlib.sha256(b"%PDF-b").hexdigest()
+    assert manifest["broken"] == [f"{server}/missing.pdf"]
+    assert manifest["sameContent"] == [[f"{server}/a.png", f"{server}/copy.png"]]
+    assert manifest["checked"] == 4
+
+
+def test_only_stale_entries_are_revalidated(server):
+    assets = _assets(server)
+    first = asyncio.run(build_asset_manifest(assets, now=1000, ttl=100, error_ttl=10))
+
+    AssetHandler.requests = []
+    second = asyncio.run(build_asset_manifest(assets, first, now=1050, ttl=100, error_ttl=10))
+    assert AssetHandler.requests == ["/missing.pdf"]
+    assert second["checked"] == 1
+
+    third = asyncio.run(build_asset_manifest(assets, second, now=1200, ttl=100, error_ttl=10))
+    assert third["checked"] == 4
+    assert third["assets"][f"{server}/a.png"]["status"] == 304
+    assert third["assets"][f"{server}/a.png"]["sha256"] == first["assets"][f"{server}/a.png"]["sha256"]
+
+
+def test_malformed_urls_are_recorded_as_broken(server):
+    assets = {f"{server}/b.pdf": [["neptuno", "schematic_pdf"]]}
+    assets.update({f"{server}/{name}": [["pajaritos", "image"]] for name in ("with space.png", "estación.png")})
+    manifest = asyncio.run(build_asset_manifest(assets, now=1000))
+    assert manifest["assets"][f"{server}/b.pdf"]["ok"]
+    assert manifest["broken"] == sorted(f"{server}/{name}" for name in ("with space.png", "estación.png"))
+    assert all(manifest["assets"][url]["error"] for url in manifest["broken"])
@@ -0,0 +1,97 @@
+from log_analyzer import MAX_OPEN_JOBS, Histogram, LogAnalyzer, parse_line
+from station_history import to_iso
+
+LOG = """\
+ℹ️ [2025-08-23T09:33:27.000Z] [INFO] [scheduler.js:7] [startScheduler] [SCHEDULER] Starting scheduler...
+ℹ️ [2025-08-23T09:33:27.010Z] [INFO] [bootstrap.js:9] [initialize] [SCHEDULER] Initializing...
+⚠️ [2025-08-23T09:33:27.011Z] [WARN] [MetroCore.js:48] [new MetroCore] A Discord client instance is required.
+[DB] [QID:haeper] Query completed in 11ms, returned 951 rows
+🐛 [2025-08-23T09:33:27.020Z] [INFO] [MetroCore.js:201] [MetroCore.initialize] [MetroCore] Starting initialization...
+ℹ️ [2025-08-23T09:33:27.050Z] [INFO] [DataEngine.js:64] [DataEngine.handleRawData] [DataEngine] Fields for station SP: {
+  "code": "1 item"
+}
+⚠️ [2025-08-23T09:33:27.052Z] [WARN] [DataEngine.js:77] [DataEngine.handleRawData] commerce is null for station ZZ9
+🐛 [2025-08-23T09:33:27.120Z] [INFO] [MetroCore.js:251] [MetroCore.initialize] [MetroCore] Initialization complete.
+ℹ️ [2025-08-23T09:33:27.125Z] [INFO] [bootstrap.js:41] [initialize] [SCHEDULER] MetroCore initialized.
+ℹ️ [2025-08-23T09:33:27.130Z] [INFO] [SchedulerService.js:72] [jobWrapper] [SchedulerService] Starting job: every-minute
+❌ [2025-08-23T09:33:27.330Z] [ERROR] [StatusProcessor.js:263] [StatusProcessor._updateDatabase] Database update failed
+ℹ️ [2025-08-23T09:33:27.340Z] [INFO] [SchedulerService.js:74] [jobWrapper] [SchedulerService] Finished job: every-minute
+ℹ️ [2025-08-23T09:33:27.400Z] [INFO] [scheduler.js:66] [startScheduler] [SCHEDULER] Scheduler started successfully.
+ℹ️ [2025-08-23T09:34:27.400Z] [INFO] [SchedulerService.js:72] [jobWrapper] [SchedulerService] Starting job: every-minute
+ℹ️ [2025-08-23T09:34:27.500Z] [INFO] [SchedulerService.js:74] [jobWrapper] [SchedulerService] Finished job: every-minute
+"""
+
+
+def _report(**options):
+    analyzer = LogAnalyzer(station_codes={"SP": "san pablo l1"}, **options)
+    for line in LOG.splitlines(keepends=True):
+        analyzer.feed(line)
+    return analyzer.report()
+
+
+def test_parse_line():
+    ms, level, source, function, message = parse_line(LOG.splitlines()[1])
+    assert (level, source, function, message) == ("INFO", "bootstrap.js:9", "initialize", "[SCHEDULER] Initializing...")
+    assert ms == parse_line(LOG.splitlines()[0])[0] + 10
+    assert parse_line('  "code": "1 item"') is None
+
+
+def test_spans_nest_like_calls():
+    report = _report()
+    spans = report["spans"]
+    assert spans["startScheduler"]["max_ms"] == 400
+    assert spans["startScheduler > initialize"]["max_ms"] == 115
+    # The one-line constructor is an event; MetroCore.initialize nests under initialize, not under it.
+    assert spans["startScheduler > initialize > MetroCore.initialize"]["max_ms"] == 100
+    assert spans["startScheduler > initialize > MetroCore.initialize > DataEngine.handleRawData"]["max_ms"] == 2
+    assert not any("new MetroCore" in path for path in spans)
+    assert spans["job:every-minute"]["count"] == 2
+    assert spans["job:every-minute"]["total_ms"] == 310
+    assert report["slowest_spans"][0] == {"span": "startScheduler", "start": parse_line(LOG)[0], "ms": 400}
+
+
+def test_phases_stations_and_queries():
+    report = _report(top=3)
+    assert report["structured"] == 14 and report["lines"] == 17
+    assert report["levels"] == {"INFO": 11, "WARN": 2, "ERROR": 1}
+    assert [phase["ms"] for phase in report["slowest_phases"]] == [200, 100, 68]
+    # The minute between the two ticks is idle time, not a phase.
+    assert all(phase["ms"] < 60_000 for phase in report["slowest_phases"])
+    assert report["stations"]["san pablo l1"]["total_ms"] == 30
+    assert report["stations"]["ZZ9"]["total_ms"] == 2
+    assert report["queries"]["count"] == 1 and report["queries"]["max_ms"] == 11
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    for ms in (0.5, 3, 3, 900, 10 ** 9):
+        histogram.add(ms)
+    summary = histogram.to_dict()
+    assert summary["count"] == 5
+    assert summary["buckets"]["1"] == 1 and summary["buckets"]["4"] == 2
+    assert summary["p50_ms"] == 4
+    assert summary["max_ms"] == 10 ** 9
+
+
+def test_state_stays_bounded_on_a_busy_log():
+    def line(ms, function, message):
+        return f"ℹ️ [{to_iso(ms)}] [INFO] [x.js:1] [{function}] {message}\n"
+
+    analyzer = LogAnalyzer()
+    # startScheduler stays a single line for the whole run, and the log never goes quiet for a whole gap:
+    # every refresh waits in it, in case it turns out to be an event.
+    analyzer.feed(line(0, "startScheduler", "Starting scheduler..."))
+    for tick in range(3000):
+        ms = 10 + tick * 10
+        analyzer.feed(line(ms, "refresh", "Refreshing stations..."))
+        analyzer.feed(line(ms + 4, "refresh", "Refresh complete."))
+        analyzer.feed(line(ms + 5, "unknown", f"Starting job: once-{tick}"))
+    parked, slowest = analyzer._stack[0][4]
+    assert len(analyzer._stack) == 1 and list(parked) == [("refresh",)] and len(slowest.heap) <= 20
+    assert len(analyzer._jobs) == MAX_OPEN_JOBS
+
+    analyzer.feed(line(30_010, "startScheduler", "Scheduler stopped."))
+    report = analyzer.report()
+    assert report["spans"]["startScheduler"]["max_ms"] == 30_010
+    assert report["spans"]["startScheduler > refresh"]["count"] == 3000
+    assert report["slowest_spans"][1]["span"] == "startScheduler > refresh"
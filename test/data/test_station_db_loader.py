@@ -0,0 +1,78 @@
+import sqlite3
+
+from station_db_loader import MYSQL, SQLITE, SQLITE_STATIONS_DDL, build_rows, load_stations
+from station_records import build_records
+
+STATIONS_DATA = {
+    "san pablo l1": ["None", "Redbanc, Teléfonos", "None", "San Camilo", "MetroArte", "None", "Lo Prado"],
+    "neptuno": ["None", "Redbanc", "Rampa", "None", "Metroinforma", "https://x/n.png", "nunoa"],
+}
+ESTADO_RED = {
+    "l1": {"estaciones": [
+        {"nombre": "San Pablo L1", "codigo": "sp"},
+        {"nombre": "Neptuno", "codigo": "NP"},
+        {"nombre": "Estación Nueva", "codigo": "EN"},
+    ]},
+}
+
+
+class CountingConnection:
+    """Wraps a sqlite3 connection and counts executed statements."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+
+    def cursor(self):
+        cursor = self.conn.cursor()
+        outer = self
+
+        class Cursor:
+            def execute(self, sql, params=()):
+                outer.statements.append(sql)
+                return cursor.execute(sql, params)
+
+            def fetchall(self):
+                return cursor.fetchall()
+
+        return Cursor()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+
+def _connection():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(SQLITE_STATIONS_DDL)
+    return conn
+
+
+def test_build_rows_joins_estado_red_codes():
+    rows = build_rows(build_records(STATIONS_DATA, {}), ESTADO_RED)
+    assert [(row["line_id"], row["station_code"]) for row in rows] == [("l1", "SP"), ("l1", "NP")]
+    assert rows[0]["services"] == "Redbanc, Teléfonos"
+    assert rows[0]["accessibility"] is None
+    assert rows[1]["commune"] == "Nunoa"
+
+
+def test_mysql_upsert_is_one_multi_row_statement():
+    sql, params = MYSQL.upsert("t", ("a", "b"), ("a",), [{"a": 1, "b": 2}, {"a": 3, "b": 4}])
+    assert sql == "INSERT INTO t (a, b) VALUES (?, ?), (?, ?) ON DUPLICATE KEY UPDATE b = VALUES(b)"
+    assert params == [1, 2, 3, 4]
+
+
+def test_load_skips_unchanged_rows():
+    conn = CountingConnection(_connection())
+    assert load_stations(conn, build_records(STATIONS_DATA, {}), ESTADO_RED, SQLITE) == (2, 0)
+    inserts = [sql for sql in conn.statements if sql.startswith("INSERT INTO metro_stations")]
+    assert len(inserts) == 1
+
+    assert load_stations(conn, build_records(STATIONS_DATA, {}), ESTADO_RED, SQLITE) == (0, 2)
+
+    changed = dict(STATIONS_DATA, neptuno=["None", "Redbanc", "Rampa", "Oxxo", "Metroinforma", "None", "nunoa"])
+    assert load_stations(conn, build_records(changed, {}), ESTADO_RED, SQLITE) == (1, 1)
+    assert conn.conn.execute("SELECT commerce FROM metro_stations WHERE station_code = 'NP'").fetchone() == ("Oxxo",)
+    assert conn.conn.execute("SELECT COUNT(*) FROM metro_stations").fetchone() == (2,)
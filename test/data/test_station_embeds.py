@@ -0,0 +1,65 @@
+from station_embeds import (
+    EMBED_TOTAL_LIMIT,
+    EMBEDS_PER_MESSAGE,
+    FIELD_VALUE_LIMIT,
+    FIELDS_PER_EMBED,
+    LIVE_RESERVE,
+    build_station_embeds,
+    render_station,
+    split_value,
+)
+
+
+def _view(**overrides):
+    view = {
+        "key": "pajaritos", "name": "pajaritos", "displayName": "Pajaritos", "code": "PJ", "line": "l1",
+        "transports": ["Buses"], "services": ["Redbanc", "Teléfonos"], "accessibility": "Ascensor\nRampa",
+        "commerce": ["Xs Market"], "culture": ["Bibliometro"], "communes": ["Lo Prado"],
+        "image": "https://x/p.png", "schematic_image": None, "schematic_pdf": "https://x/p.pdf",
+        "connections": {"conexiones": ["EIM"], "bici": []},
+    }
+    view.update(overrides)
+    return view
+
+
+def test_split_value_prefers_separators():
+    assert split_value("aaa, bbb, ccc", limit=8) == ["aaa, bbb", "ccc"]
+    assert split_value("x" * 10, limit=4) == ["xxxx", "xxxx", "xx"]
+
+
+def test_render_station():
+    payload = render_station(_view())
+    (embed,), = payload["messages"]
+    assert embed["title"] == "Pajaritos" and embed["image"] == {"url": "https://x/p.png"}
+    assert [field["name"] for field in embed["fields"]] == [
+        "📖 Servicios", "♿ Accesibilidad", "🛍️ Comercio", "🎭 Cultura", "🏙️ Comuna", "🚌 Transporte",
+        "🔄 Conexiones", "🗺️ Planos",
+    ]
+    assert embed["fields"][0]["value"] == "Redbanc, Teléfonos"
+
+
+def test_long_content_is_chunked_to_discord_limits():
+    shops = [f"Tienda número {index}" for index in range(1500)]
+    payload = render_station(_view(commerce=shops))
+    assert len(payload["messages"]) > 1
+    for number, embeds in enumerate(payload["messages"]):
+        assert 1 <= len(embeds) <= EMBEDS_PER_MESSAGE
+        for embed in embeds:
+            assert len(embed["fields"]) <= FIELDS_PER_EMBED
+            assert all(len(field["value"]) <= FIELD_VALUE_LIMIT for field in embed["fields"])
+        # The limit covers the whole message; the first one also leaves room for the live fields.
+        total = sum(len(embed["title"]) + sum(len(f["name"]) + len(f["value"]) for f in embed["fields"]) for embed in embeds)
+        assert total <= EMBED_TOTAL_LIMIT - (LIVE_RESERVE if number == 0 else 0)
+    values = [
+        field["value"]
+        for embeds in payload["messages"] for embed in embeds for field in embed["fields"] if "Comercio" in field["name"]
+    ]
+    assert ", ".join(values).split(", ") == shops
+
+
+def test_versions_follow_content():
+    first = build_station_embeds({"pajaritos": _view()})
+    assert build_station_embeds({"pajaritos": _view()}) == first
+    changed = build_station_embeds({"pajaritos": _view(services=["Redbanc"])})
+    assert changed["version"] != first["version"]
+    assert changed["stations"]["pajaritos"]["version"] != first["stations"]["pajaritos"]["version"]
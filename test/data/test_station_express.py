@@ -0,0 +1,49 @@
+from station_express import ExpressPatterns, build_express_patterns, normalize_route
+
+STATIONS_JSON = {
+    "l1": {"Norte": {}, "Sur": {}},
+    "l4": {
+        "Tobalaba L4": {"ruta": "Común"},
+        "Colón": {"ruta": "Ruta Verde"},
+        "Bilbao": {"ruta": "Común"},
+        "Gales": {"ruta": "Ruta Roja"},
+        "Egaña": {"ruta": "Común"},
+    },
+}
+KEYS = {"norte", "sur", "tobalaba l4", "colon", "bilbao", "gales", "egana"}
+
+
+def _patterns():
+    return build_express_patterns(STATIONS_JSON, KEYS)
+
+
+def test_normalize_route():
+    assert normalize_route("Ruta Roja") == "roja"
+    assert normalize_route("Común") == "comun"
+    assert normalize_route(None) == "comun"
+
+
+def test_only_lines_with_routes_are_express():
+    express = ExpressPatterns(_patterns())
+    assert express.is_express("L4") and not express.is_express("l1")
+
+
+def test_patterns_per_color_and_direction():
+    line = _patterns()["lines"]["l4"]
+    assert line["patterns"]["roja"] == {
+        "egana": ["tobalaba l4", "bilbao", "gales", "egana"],
+        "tobalaba l4": ["egana", "gales", "bilbao", "tobalaba l4"],
+    }
+    assert line["segments"]["roja"][0] == {"from": "tobalaba l4", "to": "bilbao", "hops": 2, "skipped": ["colon"]}
+    assert line["adjacency"]["verde"]["bilbao"] == ["colon", "egana"]
+
+
+def test_lookups():
+    express = ExpressPatterns(_patterns())
+    assert express.stations("l4", "Ruta Verde") == ["colon"]
+    assert express.stations("l4", "comun+roja") == ["tobalaba l4", "bilbao", "gales", "egana"]
+    assert express.stations("l1") is None
+    assert express.next_stop("l4", "bilbao", "verde", towards="tobalaba l4") == "colon"
+    assert express.next_stop("l4", "bilbao", "roja", towards="egana") == "gales"
+    assert express.stops_between("l4", "tobalaba l4", "egana") == {"todas": 4, "roja": 3, "verde": 3}
+    assert express.stops_between("l4", "colon", "egana") == {"todas": 3, "roja": None, "verde": 2}
@@ -0,0 +1,54 @@
+import pytest
+
+import station_formats
+
+DOCUMENT = {
+    "stations": {
+        "neptuno": {"services": ("Redbanc", "Teléfonos"), "image": None, "line": None},
+        "pajaritos": {"services": ["Redbanc"], "image": "https://x/p.png", "line": None},
+    },
+    "snapshots": [
+        {"codigo": "SP", "estado": 1, "extra": {"a": [1, 2]}},
+        {"codigo": "NP", "estado": 2, "extra": {"a": []}},
+    ],
+    "empty": [{}, {}],
+    "scalar": 3,
+}
+
+
+def _normalized(value):
+    return station_formats.loads(station_formats.dumps(value, "json"), "json")
+
+
+@pytest.mark.parametrize("fmt", ["json", "min", "columnar"])
+def test_round_trip(tmp_path, fmt):
+    path = str(tmp_path / station_formats.file_name("stationsdata", fmt))
+    station_formats.dump(DOCUMENT, path)
+    assert station_formats.load(path) == _normalized(DOCUMENT)
+
+
+def test_msgpack_round_trip(tmp_path):
+    pytest.importorskip("msgpack")
+    path = str(tmp_path / "stationsdata.msgpack")
+    station_formats.dump(DOCUMENT, path)
+    assert station_formats.load(path) == _normalized(DOCUMENT)
+
+
+def test_columnar_interns_repeated_strings():
+    encoded = station_formats.encode_columnar(DOCUMENT)
+    assert encoded["strings"].count("Redbanc") == 1
+    assert set(encoded["root"]["stations"]) == {station_formats.TABLE}
+    assert encoded["root"]["stations"][station_formats.TABLE]["columns"]["services"]["kind"] == "strlist"
+
+
+def test_detect_format():
+    assert station_formats.detect_format("out/stationsdata.min.json") == "min"
+    assert station_formats.detect_format("stationsdata.columnar.json") == "columnar"
+    assert station_formats.detect_format("stationsdata.json") == "json"
+    with pytest.raises(ValueError):
+        station_formats.detect_format("stationsdata.yaml")
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        station_formats.dumps({}, "xml")
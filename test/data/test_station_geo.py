@@ -0,0 +1,82 @@
+import random
+import sqlite3
+import time
+
+from station_geo import StationGeo, build_geo_index, distance, export_coordinates, nearest_brute
+from station_records import build_records
+
+STATIONS_DATA = {
+    "baquedano l1": ["None", "None", "None", "None", "None", "None", "Providencia, Santiago"],
+    "salvador": ["None", "None", "None", "None", "None", "None", "Providencia"],
+    "nunoa l3": ["None", "None", "None", "None", "None", "None", "Ñuñoa"],
+    "neptuno": ["None", "None", "None", "None", "None", "None", "Lo Prado"],
+}
+COORDINATES = {
+    "baquedano l1": [-33.4372, -70.6345],
+    "salvador": [-33.4325, -70.6266],
+    "nunoa l3": [-33.4553, -70.5985],
+}
+
+
+def _geo():
+    document = build_geo_index(COORDINATES, build_records(STATIONS_DATA, {}))
+    return StationGeo(document), document
+
+
+def test_distance():
+    assert round(distance(-33.4372, -70.6345, -33.4325, -70.6266)) == 900
+
+
+def test_nearest_and_within():
+    geo, document = _geo()
+    assert [key for _meters, key in geo.nearest(-33.436, -70.632, k=2)] == ["baquedano l1", "salvador"]
+    assert [key for _meters, key in geo.within(-33.436, -70.632, 1000)] == ["baquedano l1", "salvador"]
+    assert geo.nearest(-33.436, -70.632, k=10) == nearest_brute(document["points"], -33.436, -70.632, 10)
+    assert document["unlocated"] == ["neptuno"]
+
+
+def test_grid_matches_brute_force():
+    rng = random.Random(7)
+    keys = [f"s{index}" for index in range(300)]
+    coordinates = {key: [rng.uniform(-33.7, -33.3), rng.uniform(-70.9, -70.4)] for key in keys}
+    document = build_geo_index(coordinates, build_records(dict.fromkeys(keys, ["None"] * 7), {}))
+    geo = StationGeo(document)
+    for _ in range(200):
+        lat, lon, k = rng.uniform(-34, -33), rng.uniform(-71.2, -70.1), rng.randint(1, 6)
+        assert geo.nearest(lat, lon, k) == nearest_brute(document["points"], lat, lon, k)
+        everything = nearest_brute(document["points"], lat, lon, len(keys))
+        assert geo.within(lat, lon, 3000) == [item for item in everything if item[0] <= 3000]
+
+
+def test_communes():
+    geo, _document = _geo()
+    assert geo.in_commune("providencia") == ["baquedano l1", "salvador"]
+    assert geo.in_commune("Nunoa") == ["nunoa l3"]
+    assert geo.in_commune("Maipú") == []
+
+
+def test_export_coordinates():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE metro_stations (line_id TEXT, station_name TEXT, latitude REAL, longitude REAL)")
+    conn.executemany("INSERT INTO metro_stations VALUES (?, ?, ?, ?)", [
+        ("L1", "Baquedano", -33.4372, -70.6345),
+        ("l1", "Salvador", None, None),
+        ("l9", "Futura", -33.5, -70.6),
+    ])
+    assert export_coordinates(conn, STATIONS_DATA) == {"baquedano l1": [-33.4372, -70.6345]}
+
+
+def test_far_away_and_huge_radius_queries_stay_cheap():
+    rng = random.Random(11)
+    keys = [f"s{index}" for index in range(136)]
+    coordinates = {key: [rng.uniform(-33.7, -33.3), rng.uniform(-70.9, -70.4)] for key in keys}
+    document = build_geo_index(coordinates, build_records(dict.fromkeys(keys, ["None"] * 7), {}))
+    geo = StationGeo(document)
+    start = time.perf_counter()
+    # Latitude and longitude swapped, and the other side of the world
+    assert geo.nearest(-70.6, -33.5, k=3) == nearest_brute(document["points"], -70.6, -33.5, 3)
+    assert geo.nearest(33.5, 110.6, k=3) == nearest_brute(document["points"], 33.5, 110.6, 3)
+    assert geo.within(-70.6, -33.5, 1000) == []
+    everything = nearest_brute(document["points"], -33.5, -70.6, len(keys))
+    assert geo.within(-33.5, -70.6, 50_000_000) == everything
+    assert time.perf_counter() - start < 1
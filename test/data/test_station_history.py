@@ -0,0 +1,78 @@
+import copy
+
+from station_history import StatusHistory, compact, empty_history, ingest, to_ms
+
+
+def _snapshot(timestamp, line_estado="1", neptuno="1"):
+    return {
+        "timestamp": timestamp,
+        "l1": {"estado": line_estado, "mensaje": "", "mensaje_app": "Línea disponible", "estaciones": [
+            {"nombre": "San Pablo L1", "codigo": "SP", "estado": "1", "descripcion": "Estación Operativa", "mensaje": ""},
+            {"nombre": "Neptuno", "codigo": "np", "estado": neptuno, "descripcion": "Estación Operativa", "mensaje": ""},
+        ]},
+    }
+
+
+SNAPSHOTS = [
+    # newest first, like apiChanges.json
+    _snapshot("2025-08-22T12:00:00Z"),
+    _snapshot("2025-08-22T11:00:00Z", neptuno="5"),
+    _snapshot("2025-08-22T10:30:00Z", line_estado="2", neptuno="5"),
+    _snapshot("2025-08-22T10:00:00Z"),
+]
+
+
+def _history():
+    history = empty_history()
+    ingest(history, SNAPSHOTS, keys={"san pablo l1", "neptuno"})
+    return history
+
+
+def test_ingest_records_transitions_only():
+    history = empty_history()
+    # three entities at first sight, then neptuno 1 -> 5 -> 1 and l1 1 -> 2 -> 1
+    assert ingest(history, SNAPSHOTS, keys={"san pablo l1", "neptuno"}) == 3 + 4
+    assert ingest(history, SNAPSHOTS) == 0
+    assert [entity[0] for entity in history["entities"]] == ["l1", "SP", "NP"]
+    assert history["entities"][2][2] == "neptuno"
+    assert len(history["states"]) == 4
+
+
+def test_status_range_by_key_and_code():
+    query = StatusHistory(_history())
+    spans = query.status("neptuno", to_ms("2025-08-22T10:45:00Z"), to_ms("2025-08-22T11:30:00Z"))
+    assert [(span["estado"], span["from"], span["to"]) for span in spans] == [
+        ("5", to_ms("2025-08-22T10:30:00Z"), to_ms("2025-08-22T12:00:00Z")),
+    ]
+    assert query.status("NP") == query.status("neptuno")
+    assert query.state_at("np", to_ms("2025-08-22T10:40:00Z"))["estado"] == "5"
+    assert query.status("missing") is None
+
+
+def test_outages_on_a_line():
+    outages = StatusHistory(_history()).outages("L1")
+    assert [(span["id"], span["estado"]) for span in outages] == [("NP", "5"), ("l1", "2")]
+    assert outages[0]["key"] == "neptuno"
+    assert StatusHistory(_history()).outages("l1", since=to_ms("2025-08-22T12:00:00Z")) == []
+
+
+def test_compact_folds_old_events_into_base():
+    history = _history()
+    query = StatusHistory(copy.deepcopy(history))
+    cutoff = to_ms("2025-08-22T11:00:00Z")
+    removed = compact(history, cutoff)
+    assert removed == 5
+    compacted = StatusHistory(history)
+    assert compacted.event_count() == 2
+    assert len(history["segments"]) == 1
+    for name in ("l1", "SP", "NP"):
+        for moment in ("2025-08-22T11:00:00Z", "2025-08-22T11:59:00Z", "2025-08-22T13:00:00Z"):
+            assert compacted.state_at(name, to_ms(moment)) == query.state_at(name, to_ms(moment))
+
+
+def test_later_ingest_appends_a_segment():
+    history = empty_history()
+    ingest(history, SNAPSHOTS[2:])
+    ingest(history, SNAPSHOTS[:2])
+    assert len(history["segments"]) == 2
+    assert StatusHistory(history).status("NP") == StatusHistory(_history()).status("NP")
@@ -0,0 +1,38 @@
+from station_indexes import build_indexes, build_vocabulary, complete, lookup
+from station_records import build_records
+
+RAW = {
+    "pajaritos": ["Buses, Aeropuerto", "Redbanc", "None", "Xs Market, KFC", "Bibliometro, Metroinforma", "None", "Lo Prado"],
+    "los leones l6": ["None", "Redbanc, Teléfonos", "None", "Oxxo, KFC", "MetroArte, Metroinforma", "None", "Providencia"],
+    "neptuno": ["None", "Redbanc", "None", "None", "BiblioMetro,Metroinforma", "None", "Lo Prado"],
+}
+
+
+def _records():
+    return build_records(RAW, {})
+
+
+def test_indexes_map_folded_terms_to_sorted_keys():
+    indexes = build_indexes(_records())
+    assert indexes["commerce"]["kfc"] == ["los leones l6", "pajaritos"]
+    assert indexes["culture"]["bibliometro"] == ["neptuno", "pajaritos"]
+    assert indexes["communes"]["lo prado"] == ["neptuno", "pajaritos"]
+
+
+def test_lookup_folds_the_query():
+    indexes = build_indexes(_records())
+    assert lookup(indexes, "services", "TELÉFONOS") == ["los leones l6"]
+    assert lookup(indexes, "commerce", "unknown") == []
+
+
+def test_vocabulary_is_sorted_with_most_common_label():
+    vocabulary = build_vocabulary(_records())
+    assert [entry["term"] for entry in vocabulary["culture"]] == ["bibliometro", "metroarte", "metroinforma"]
+    assert vocabulary["culture"][0]["label"] == "Bibliometro"
+
+
+def test_complete_returns_prefix_matches():
+    vocabulary = build_vocabulary(_records())
+    assert [entry["label"] for entry in complete(vocabulary, "commerce", "o")] == ["Oxxo"]
+    assert [entry["term"] for entry in complete(vocabulary, "culture", "metro", limit=1)] == ["metroarte"]
+    assert complete(vocabulary, "commerce", "zz") == []
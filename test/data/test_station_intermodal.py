@@ -0,0 +1,59 @@
+from station_intermodal import IntermodalIndex, build_intermodal_index, term
+from station_records import build_records
+
+STATIONS_DATA = {
+    "pajaritos": ["Buses, Aeropuerto, Lineacero", "None", "None", "None", "None", "None", "Lo Prado"],
+    "la cisterna l2": ["Intermodales", "None", "None", "None", "None", "None", "La Cisterna"],
+    "la cisterna l4a": ["None", "None", "None", "None", "None", "None", "La Cisterna"],
+    "neptuno": ["None", "None", "None", "None", "None", "None", "Lo Prado"],
+}
+CONNECTIONS = {
+    "l1": {"estaciones": [
+        {"nombre": "Pajaritos", "conexiones": ["Centropuerto", "EIM"], "bici": ["Línea Cero"]},
+        {"nombre": "Neptuno", "conexiones": [], "bici": ["Línea Cero"]},
+    ]},
+    "l2": {"estaciones": [{"nombre": "El Bosque", "conexiones": ["EIM"]}]},
+}
+BUSES = {
+    "Pajaritos": [
+        {"Tipo Servicio": "Interurbano", "Recorrido/Operador": "Condor bus", "Destino": "Valparaíso"},
+        {"Tipo Servicio": "Interurbano", "Recorrido/Operador": "Condor Bus", "Destino": "Villa Alemana"},
+        {"Tipo Servicio": "Otros", "Recorrido/Operador": "Centro Puerto", "Destino": "Aeropuerto"},
+    ],
+    "La Cisterna": [{"Tipo Servicio": "Red", "Recorrido/Operador": "E05", "Destino": "(M) Bellavista"}],
+    "Estación Futura": [{"Tipo Servicio": "Red", "Recorrido/Operador": "E06", "Destino": "Centro"}],
+}
+
+
+def _index():
+    document = build_intermodal_index(build_records(STATIONS_DATA, {}), CONNECTIONS, BUSES)
+    return IntermodalIndex(document), document
+
+
+def test_term():
+    assert term("Lineacero") == term("Línea Cero") == "lineacero"
+
+
+def test_station_to_connections():
+    index, document = _index()
+    assert sorted(document["stations"]) == ["la cisterna l2", "la cisterna l4a", "neptuno", "pajaritos"]
+    pajaritos = index.connections("pajaritos")
+    assert pajaritos["modes"] == ["Buses", "Aeropuerto", "Lineacero"]
+    assert pajaritos["conexiones"] == ["Centropuerto", "EIM"]
+    assert {"operator": "Centro Puerto", "service": "otros", "destination": "Aeropuerto"} in pajaritos["buses"]
+    # Bus services listed under a bare name belong to every line of a transfer station.
+    assert index.connections("la cisterna l4a")["buses"] == [{"route": "E05", "service": "red", "destination": "(M) Bellavista"}]
+    assert index.connections("salvador") is None
+
+
+def test_terms_to_stations():
+    index, document = _index()
+    assert index.route("e05") == ["la cisterna l2", "la cisterna l4a"]
+    assert index.operator("CONDOR BUS") == ["pajaritos"]
+    assert document["operators"]["condorbus"]["label"] in ("Condor bus", "Condor Bus")
+    assert index.mode("Línea Cero") == ["neptuno", "pajaritos"]
+    assert index.mode("lineacero") == index.mode("Línea Cero")
+    assert index.mode("Intermodales") == ["la cisterna l2"]
+    assert index.find("Centro Puerto") == ["pajaritos"]
+    assert index.route("E06") == []
+    assert document["unmatched"] == ["El Bosque (l2)", "Estación Futura"]
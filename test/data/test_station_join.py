@@ -0,0 +1,71 @@
+import json
+
+from station_join import StationViews, build_station_views, load_access_details
+from station_records import build_records
+
+STATIONS_DATA = {
+    "baquedano l1": ["None", "Redbanc", "None", "Maxi-K", "MetroArte", "None", "Providencia"],
+    "union latinoamericana": ["None", "Redbanc", "None", "None", "Metroinforma", "None", "Santiago Centro"],
+}
+ESTADO_RED = {
+    "l1": {"estaciones": [
+        {"nombre": "Baquedano L1", "codigo": "BA", "combinacion": "L5"},
+        {"nombre": "U.L.A.", "codigo": "ul", "combinacion": ""},
+    ]},
+}
+STATIONS_JSON = {"l1": {"Baquedano": {}, "Unión Latinoamericana": {"aliases": ["U.L.A."]}}}
+ACCESSIBILITY = {
+    "BA-1": {"estado": 1, "tipo": "ascensor", "estacion": "BA", "texto": "Ascensor 1", "time": "t"},
+    "BA-2": {"estado": 0, "tipo": "ascensor", "estacion": "BA", "texto": "Ascensor 2", "time": "t"},
+    "XX-1": {"estado": 1, "tipo": "escalera", "estacion": "XX", "texto": "?", "time": "t"},
+}
+CONNECTIONS = {"l1": {"estaciones": [{"nombre": "Unión Latinoamericana", "conexiones": ["EFE"], "bici": []}]}}
+
+
+def _write(directory, name, detail):
+    (directory / name).write_text(json.dumps(detail), encoding="utf-8")
+
+
+def _views(tmp_path):
+    _write(tmp_path, "access_baquedano-l1.json", {
+        "station": "Baquedano", "line": "l1", "lastUpdated": "2025-01-01",
+        "accesses": [{"id": "A", "status": "abierto"}], "elevators": [{"id": "LD", "status": "operativa"}], "escalators": [],
+    })
+    _write(tmp_path, "access_baquedano-l1-l1.json", {
+        "station": "baquedano l1", "line": "l1", "lastUpdated": "2025-02-01",
+        "accesses": [], "elevators": [{"id": "LD", "status": "fuera de servicio"}], "escalators": [],
+    })
+    _write(tmp_path, "access_plaza-armas-l3.json", {"station": "plaza armas", "line": "l3", "accesses": []})
+    return build_station_views(
+        build_records(STATIONS_DATA, {}),
+        ESTADO_RED,
+        accessibility=ACCESSIBILITY,
+        access_details=load_access_details(str(tmp_path)),
+        connections=CONNECTIONS,
+        stations_json=STATIONS_JSON,
+    )
+
+
+def test_views_join_every_source(tmp_path):
+    document = _views(tmp_path)
+    baquedano = document["stations"]["baquedano l1"]
+    assert baquedano["code"] == "BA"
+    assert baquedano["transfer"] == "L5"
+    assert baquedano["commerce"] == ("Maxi-K",)
+    assert baquedano["equipmentSummary"]["elevators"] == {"total": 2, "operational": 1}
+    assert baquedano["accessDetails"]["elevators"] == [{"id": "LD", "status": "fuera de servicio"}]
+    assert baquedano["accessDetails"]["accesses"] == [{"id": "A", "status": "abierto"}]
+    assert document["stations"]["union latinoamericana"]["connections"]["conexiones"] == ["EFE"]
+
+
+def test_unmatched_sources_are_reported(tmp_path):
+    unmatched = _views(tmp_path)["unmatched"]
+    assert unmatched["accessibility"] == ["XX"]
+    assert unmatched["accessDetails"] == ["access_plaza-armas-l3.json"]
+
+
+def test_station_views_lookup_by_key_or_code(tmp_path):
+    views = StationViews(_views(tmp_path))
+    assert views.get("UL") is views.get("union latinoamericana")
+    assert views.get("ba")["key"] == "baquedano l1"
+    assert "nope" not in views
@@ -0,0 +1,49 @@
+import json
+import os
+
+import stationsdata
+from station_manifest import build_manifest, content_hash, diff_hashes, write_if_changed
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_diff_hashes():
+    assert diff_hashes({"a": "1", "b": "2"}, {"b": "3", "c": "4"}) == {
+        "added": ["c"],
+        "removed": ["a"],
+        "modified": ["b"],
+    }
+
+
+def test_build_manifest_against_previous():
+    first = build_manifest({"neptuno": {"services": ["Redbanc"]}})
+    assert first["changes"]["added"] == ["neptuno"]
+    second = build_manifest({"neptuno": {"services": []}}, first)
+    assert second["changes"] == {"added": [], "removed": [], "modified": ["neptuno"]}
+    assert second["document"] != first["document"]
+
+
+def test_write_if_changed_keeps_identical_files(tmp_path):
+    path = str(tmp_path / "out.json")
+    assert write_if_changed(path, "{}")
+    os.utime(path, (0, 0))
+    assert not write_if_changed(path, "{}")
+    assert os.path.getmtime(path) == 0
+    assert write_if_changed(path, "[]")
+
+
+def test_incremental_generation_skips_unchanged_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stationsdata.generate_json_file(incremental=True)
+    os.utime("stationsdata.json", (0, 0))
+    stationsdata.generate_json_file(incremental=True)
+    assert os.path.getmtime("stationsdata.json") == 0
+
+    with open("stationsdata.manifest.json", encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    assert set(manifest["stations"]) == set(stationsdata.stationsData) | set(stationsdata.stationsSchematics)
+    # The second run changed nothing, and the manifest must not keep reporting the first run's additions
+    assert manifest["changes"] == {"added": [], "removed": [], "modified": []}
@@ -0,0 +1,45 @@
+from station_records import build_record, build_records, commune_names, fold, pad_slots, split_key
+
+RAW = {
+    "nunoa l6": ["None", "Redbanc, Teléfonos", "None", "Oxxo, San Camilo , Maxi-K", "Bibliometro,Metroinforma", "None", "nunoa"],
+    "estadio nacional": ["None", "Redbanc", "Ascensor", "Maxi-K", "Metroinforma", "https://x/img.png", "Ñuñoa"],
+    "san pablo l5": ["None", "Redbanc", "None", "None", "MetroArte", "Lo Prado"],
+}
+
+
+def test_fold_strips_accents_and_punctuation():
+    assert fold("Ñuñoa") == "nunoa"
+    assert fold("Parque O'Higgins") == "parque ohiggins"
+
+
+def test_split_key():
+    assert split_key("san pablo l1") == ("san pablo", "l1")
+    assert split_key("vicuna mackenna l4a") == ("vicuna mackenna", "l4a")
+    assert split_key("neptuno") == ("neptuno", None)
+
+
+def test_pad_slots_inserts_missing_image():
+    assert pad_slots(RAW["san pablo l5"])[5:] == ["None", "Lo Prado"]
+
+
+def test_commune_names_prefers_accented_spelling():
+    assert commune_names(RAW)["nunoa"] == "Ñuñoa"
+
+
+def test_build_record_parses_lists_and_none():
+    record = build_record("nunoa l6", RAW["nunoa l6"], ["https://x/s.png", "https://x/s.pdf"], commune_names(RAW))
+    assert record.line == "l6"
+    assert record.transports == ()
+    assert record.commerce == ("Oxxo", "San Camilo", "Maxi-K")
+    assert record.culture == ("Bibliometro", "Metroinforma")
+    assert record.accessibility is None
+    assert record.image is None
+    assert record.communes == ("Ñuñoa",)
+    assert record.schematic_pdf == "https://x/s.pdf"
+
+
+def test_build_records_includes_schematic_only_keys():
+    records = build_records(RAW, {"neptuno": ["https://x/n.png", "https://x/n.pdf"]})
+    assert list(records)[-1] == "neptuno"
+    assert records["neptuno"].services == ()
+    assert records["san pablo l5"].communes == ("Lo Prado",)
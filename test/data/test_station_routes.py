@@ -0,0 +1,53 @@
+import itertools
+
+from station_routes import RouteTable, build_network, build_route_tables, load_profiles, search_route
+
+# Two lines crossing at "centro": a1 - centro - a2 on l1, b1 - centro - b2 - b3 on l2.
+STATIONS_JSON = {
+    "l1": {"A1": {}, "Centro L1": {}, "A2": {}},
+    "l2": {"B1": {}, "Centro L2": {}, "B2": {}, "Nueva": {}},
+}
+KEYS = {"a1", "centro l1", "a2", "b1", "centro l2", "b2"}
+PROFILES = {"FAST": {"stations": 30, "transfers": 70}, "FEW": {"stations": 10, "transfers": 500}}
+
+
+def test_load_profiles_reads_route_weights():
+    profiles = load_profiles()
+    assert profiles["BALANCED"] == {"stations": 50, "transfers": 50}
+    assert set(profiles) == {"FASTEST", "BALANCED", "SCENIC"}
+
+
+def test_network_rides_and_transfers():
+    network = build_network(STATIONS_JSON, KEYS)
+    # stations without data stay in the line order under their folded name
+    assert network["nodes"][-1] == "nueva"
+    kinds = [kind for _a, _b, kind in network["edges"]]
+    assert kinds.count("ride") == 5 and kinds.count("transfer") == 1
+
+
+def test_route_walk():
+    table = RouteTable(build_route_tables(build_network(STATIONS_JSON, KEYS), PROFILES))
+    route = table.route("a1", "nueva", "FAST")
+    assert route["path"] == ["a1", "centro l1", "centro l2", "b2", "nueva"]
+    assert route["legs"] == [
+        {"line": "l1", "from": "a1", "to": "centro l1", "stations": 1},
+        {"line": "l2", "from": "centro l2", "to": "nueva", "stations": 2},
+    ]
+    assert (route["stations"], route["transfers"], route["cost"]) == (3, 1, 1.6)
+
+
+def test_route_from_a_transfer_station_boards_any_platform():
+    table = RouteTable(build_route_tables(build_network(STATIONS_JSON, KEYS), PROFILES))
+    assert table.route("centro l1", "b1", "FAST")["transfers"] == 0
+    assert table.route("Centro", "a2", "FAST")["path"] == ["centro l1", "a2"]
+    assert table.route("a1", "nowhere", "FAST") is None
+
+
+def test_table_matches_search():
+    network = build_network(STATIONS_JSON, KEYS)
+    table = RouteTable(build_route_tables(network, PROFILES))
+    for (origin, destination), (name, weights) in itertools.product(
+        itertools.permutations(network["nodes"], 2), PROFILES.items(),
+    ):
+        expected = search_route(network, weights, origin, destination)
+        assert table.route(origin, destination, name)["cost"] == expected["cost"]
@@ -0,0 +1,38 @@
+from station_search import StationSearch, build_search_artifact, trigrams
+
+KEYS = ["san pablo l1", "san pablo l5", "union latinoamericana", "vicente valdes l4", "vicente valdes l5", "nunoa l6", "nuble l6"]
+STATIONS_JSON = {
+    "l1": {"San Pablo": {}, "Unión Latinoamericana": {"aliases": ["U.L.A."]}},
+    "l5": {"San Pablo L5": {}, "Vicente Valdés L5": {}},
+    "l6": {"Ñuñoa": {}, "Ñuble L6": {}, "Biobío Nuevo": {}},
+}
+
+
+def _search():
+    return StationSearch(build_search_artifact(KEYS, STATIONS_JSON))
+
+
+def test_trigrams_are_padded():
+    assert "  n" in trigrams("nunoa")
+    assert "oa " in trigrams("nunoa")
+
+
+def test_artifact_carries_labels_and_skips_unknown_stations():
+    artifact = build_search_artifact(KEYS, STATIONS_JSON)
+    assert artifact["labels"]["nunoa l6"] == "Ñuñoa"
+    assert artifact["lines"]["union latinoamericana"] == "l1"
+    assert all(key in KEYS for _text, key in artifact["names"])
+
+
+def test_prefix_is_accent_folded():
+    assert _search().prefix("Ñuñ") == ["nunoa l6"]
+    assert _search().prefix("san pablo") == ["san pablo l1", "san pablo l5"]
+
+
+def test_aliases_resolve_to_station():
+    assert _search().search("U.L.A.")[0] == "union latinoamericana"
+
+
+def test_fuzzy_tolerates_typos():
+    assert _search().search("vicente valdez")[:2] == ["vicente valdes l4", "vicente valdes l5"]
+    assert _search().search("") == []
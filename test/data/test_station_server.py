@@ -0,0 +1,144 @@
+import asyncio
+import gzip
+import json
+import os
+import shutil
+
+import pytest
+
+import stationsdata
+from station_server import StationService, _data_file, _reload_on_deltas, accepted_encodings, etag_matches, serve
+from station_watch import Publisher
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("generated")
+    stationsdata.generate_json_file(fmt="min", output_dir=str(directory))
+    return StationService(str(directory))
+
+
+def test_accepted_encodings_and_etags():
+    assert accepted_encodings("gzip;q=0.5, br, identity;q=0") == ["gzip", "br"]
+    assert accepted_encodings(None) == []
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches('"b-gzip"', '"b"') and etag_matches('"b"', '"b-br"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+
+
+def test_routes(service):
+    status, headers, body = service.respond("GET", "/stations/SP", {})
+    assert status == 200 and json.loads(body)["key"] == "san pablo l1"
+    assert service.resolve("/stations/san%20pablo%20l1") is service.resolve("/stations/SP")
+    status, _headers, body = service.respond("GET", "/categories/services/RedBanc", {})
+    assert status == 200 and "neptuno" in json.loads(body)["stations"]
+    status, _headers, body = service.respond("GET", "/search?q=Baquedano", {})
+    assert json.loads(body)["results"][0].startswith("baquedano")
+    assert service.respond("GET", "/stations/nowhere", {})[0] == 404
+    assert service.respond("POST", "/stations", {})[0] == 405
+
+
+def test_conditional_and_compressed(service):
+    status, headers, body = service.respond("GET", "/stations", {"accept-encoding": "gzip"})
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == json.loads(service.resources["/stations"].body)
+    identity = service.respond("GET", "/stations", {})[1]["ETag"]
+    assert headers["ETag"] == identity[:-1] + '-gzip"'
+    status, revalidated, body = service.respond(
+        "GET", "/stations", {"if-none-match": headers["ETag"], "accept-encoding": "gzip"}
+    )
+    assert (status, body) == (304, b"")
+    assert revalidated["ETag"] == headers["ETag"]
+    # A tag for one coding still validates the body; the 304 names the coding that would be sent.
+    status, revalidated, _body = service.respond("GET", "/stations", {"if-none-match": headers["ETag"]})
+    assert (status, revalidated["ETag"]) == (304, identity)
+
+
+def test_http_round_trip(service):
+    async def scenario():
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for extra in ("", "If-None-Match: {etag}\r\n", "Connection: close\r\n"):
+            etag = responses[0][1].get("etag") if responses else None
+            request = f"GET /health HTTP/1.1\r\nHost: test\r\n{extra.format(etag=etag)}\r\n"
+            writer.write(request.encode("latin-1"))
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            headers = dict(line.lower().split(": ", 1) for line in head[1:] if line)
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            responses.append((head[0], headers, body))
+        closed = await reader.read() == b""
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses, closed
+
+    responses, closed = asyncio.run(scenario())
+    assert responses[0][0] == "HTTP/1.1 200 OK"
+    assert json.loads(responses[0][2])["version"] == service.version
+    assert responses[1][0] == "HTTP/1.1 304 Not Modified" and responses[1][2] == b""
+    assert responses[2][1]["connection"] == "close" and closed
+
+
+def test_request_bodies_do_not_leak_into_the_next_request(service):
+    async def scenario():
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = "GET /stations HTTP/1.1\r\n\r\n"
+        writer.write(
+            f"POST /stations HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n{body}"
+            "GET /health HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n".encode("latin-1")
+        )
+        responses = (await reader.read()).split(b"HTTP/1.1 ")[1:]
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return [response.split(b" ", 1)[0] for response in responses]
+
+    assert asyncio.run(scenario()) == [b"405", b"200"]
+
+
+def test_data_file_follows_format_or_newest(tmp_path):
+    for name, mtime in (("stationsdata.min.json", 100), ("stationsdata.json", 200)):
+        (tmp_path / name).write_text("{}", encoding="utf-8")
+        os.utime(tmp_path / name, (mtime, mtime))
+    assert _data_file(str(tmp_path)) == str(tmp_path / "stationsdata.json")
+    assert _data_file(str(tmp_path), "min") == str(tmp_path / "stationsdata.min.json")
+    with pytest.raises(FileNotFoundError):
+        _data_file(str(tmp_path), "columnar")
+
+
+def test_reload_errors_keep_serving_and_reconnect(tmp_path, service, capsys):
+    directory = tmp_path / "generated"
+    shutil.copytree(service.directory, directory)
+    live = StationService(str(directory))
+    socket_path = str(tmp_path / "watch.sock")
+
+    async def scenario():
+        publisher = Publisher(socket_path)
+        await publisher.start()
+        reloading = asyncio.create_task(_reload_on_deltas(live, socket_path, retry=0.05))
+        await asyncio.sleep(0.1)
+        resources = live.resources
+        # A file caught mid-write by the reload
+        (directory / "stationsdata.min.json").write_text('{"stations": ', encoding="utf-8")
+        await publisher.publish({"type": "delta", "version": "b"})
+        await asyncio.sleep(0.1)
+        failed_resources = live.resources
+        # The watcher restarts; the service reconnects and reloads the repaired file.
+        await publisher.close()
+        shutil.copy(os.path.join(service.directory, "stationsdata.min.json"), directory)
+        publisher = Publisher(socket_path)
+        await publisher.start()
+        await asyncio.sleep(0.3)
+        reloading.cancel()
+        await publisher.close()
+        return resources, failed_resources
+
+    resources, failed_resources = asyncio.run(scenario())
+    assert failed_resources is resources
+    assert live.resources is not resources and live.version == service.version
+    assert "Reload failed" in capsys.readouterr().err
@@ -0,0 +1,91 @@
+import random
+
+from station_records import build_records
+from station_status import IntervalTree, StatusResolver, timestamp
+
+STATIONS_DATA = {
+    "san pablo l1": ["None"] * 7,
+    "neptuno": ["None"] * 7,
+    "cal y canto": ["None"] * 7,
+    "vespucio norte": ["None"] * 7,
+}
+ESTADO_RED = {
+    "l1": {"estado": "1", "mensaje": "", "mensaje_app": "Línea disponible", "estaciones": [
+        {"nombre": "San Pablo L1", "codigo": "SP", "estado": "1", "descripcion": "Estación Operativa", "mensaje": ""},
+        {"nombre": "Neptuno", "codigo": "NP", "estado": "1", "descripcion": "Estación Operativa", "mensaje": ""},
+    ]},
+    "l2": {"estado": "1", "mensaje": "", "mensaje_app": "Línea disponible", "estaciones": [
+        {"nombre": "Cal y Canto", "codigo": "CM", "estado": "1", "descripcion": "Estación Operativa", "mensaje": ""},
+    ]},
+}
+OVERRIDES = {
+    "lines": {"l2": {"enabled": True, "estado": "2", "mensaje": "Servicio parcial"}},
+    "stations": {"CM": {"enabled": True, "estado": "4"}, "SP": {"enabled": False, "estado": "4"}},
+}
+HOUR = 60 * 60 * 1000
+T0 = timestamp("2025-06-07T10:00:00Z")
+SCHEDULED = [
+    {"id": 1, "target_type": "line", "target_id": "L1", "status": "3", "message": "Cierre programado",
+     "start_at": "2025-06-07T11:00:00Z", "end_at": "2025-06-07T13:00:00Z"},
+    {"id": 2, "target_type": "station", "target_id": "NP", "status": "5", "message": "Obras",
+     "start_at": "2025-06-07T12:00:00Z", "end_at": "2025-06-07T14:00:00Z"},
+    {"id": 3, "target_type": "system", "target_id": "all", "status": "6", "message": None,
+     "start_at": T0 + 5 * HOUR, "end_at": T0 + 6 * HOUR},
+    {"id": 4, "target_type": "station", "target_id": "XX", "status": "5", "start_at": T0, "end_at": T0 + HOUR},
+]
+
+
+def _resolver():
+    return StatusResolver(build_records(STATIONS_DATA, {}), ESTADO_RED, OVERRIDES, SCHEDULED)
+
+
+def test_interval_tree_matches_scan():
+    rng = random.Random(3)
+    intervals = []
+    for index in range(300):
+        start = rng.randrange(1000)
+        intervals.append((start, start + rng.randrange(1, 200), index))
+    tree = IntervalTree(intervals)
+    for point in range(-5, 1250, 7):
+        expected = sorted(interval for interval in intervals if interval[0] <= point < interval[1])
+        assert sorted(tree.at(point)) == expected
+
+
+def test_live_and_manual_layers():
+    resolver = _resolver()
+    state = resolver.resolve(T0)
+    assert state["lines"]["l1"]["source"] == "live"
+    assert state["lines"]["l2"] == {"estado": "2", "mensaje": "Servicio parcial", "mensaje_app": "Línea disponible",
+                                    "source": "override"}
+    assert state["stations"]["cal y canto"]["estado"] == "4"
+    assert state["stations"]["cal y canto"]["descripcion"] == "Estación Operativa"
+    assert state["stations"]["san pablo l1"]["estado"] == "1"  # disabled override
+    assert state["stations"]["vespucio norte"] is None  # not in estadoRed
+    assert [row["id"] for row in resolver.unmatched] == [4]
+
+
+def test_scheduled_windows_and_specificity():
+    resolver = _resolver()
+    line_closed = resolver.resolve(T0 + HOUR + 1)
+    assert line_closed["lines"]["l1"]["estado"] == "3"
+    assert line_closed["stations"]["neptuno"]["estado"] == "3"
+    assert line_closed["stations"]["neptuno"]["override"]["id"] == 1
+    # The station window is more specific than the line window overlapping it.
+    both = resolver.resolve(T0 + 2 * HOUR)
+    assert both["stations"]["neptuno"]["estado"] == "5"
+    assert both["stations"]["neptuno"]["descripcion"] == "Obras"
+    assert both["stations"]["san pablo l1"]["estado"] == "3"
+    assert resolver.resolve(T0 + 3 * HOUR)["stations"]["san pablo l1"]["estado"] == "1"
+    system = resolver.resolve(T0 + 5 * HOUR)
+    assert {state["estado"] for state in system["lines"].values()} == {"6"}
+    assert system["stations"]["vespucio norte"] == {"estado": "6", "source": "scheduled",
+                                                    "override": {"id": 3, "source": None, "type": None, "until": T0 + 6 * HOUR}}
+    assert sorted(resolver.not_operational(T0 + 2 * HOUR)) == ["cal y canto", "neptuno", "san pablo l1"]
+
+
+def test_next_transition():
+    resolver = _resolver()
+    assert resolver.next_transition(T0) == T0 + HOUR
+    assert resolver.next_transition(T0 + HOUR) == T0 + 2 * HOUR
+    assert resolver.resolve(T0 + 3 * HOUR)["next"] == T0 + 4 * HOUR
+    assert resolver.next_transition(T0 + 6 * HOUR) is None
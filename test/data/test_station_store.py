@@ -0,0 +1,52 @@
+import mmap
+
+import pytest
+
+from station_store import ENTRY, StationStore, build_store
+
+STATIONS = {
+    "baquedano l1": {"name": "Baquedano", "services": ["Redbanc"]},
+    "ñuble": {"name": "Ñuble", "services": []},
+    "neptuno": {"name": "Neptuno", "services": ["Máquinas de carga autoservicio"]},
+}
+CODES = {"BA": "baquedano l1", "NU": "ñuble"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "stationviews.store"
+    path.write_bytes(build_store(STATIONS, CODES))
+    with StationStore(str(path)) as opened:
+        yield opened
+
+
+def test_lookup_by_key_and_code(store):
+    assert store.get("neptuno") == STATIONS["neptuno"]
+    assert store.get("ñuble") == STATIONS["ñuble"]
+    assert store.get("BA") == store.get("ba") == STATIONS["baquedano l1"]
+    assert store.get("missing") is None
+    assert "NU" in store and "missing" not in store
+
+
+def test_raw_is_a_view_of_the_mapping(store):
+    value = store.raw("neptuno")
+    assert isinstance(value.obj, mmap.mmap)
+    assert value.tobytes().decode("utf-8") == '{"name":"Neptuno","services":["Máquinas de carga autoservicio"]}'
+    value.release()
+
+
+def test_codes_share_the_station_bytes(tmp_path):
+    # two index entries and the code bytes, no second copy of the documents
+    assert len(build_store(STATIONS, CODES)) - len(build_store(STATIONS)) == 2 * ENTRY.size + len("BANU")
+    path = tmp_path / "stationviews.store"
+    path.write_bytes(build_store(STATIONS, CODES))
+    with StationStore(str(path)) as store:
+        assert len(store) == 5
+        assert store.keys() == sorted(store.keys(), key=lambda key: key.encode("utf-8"))
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "stationviews.json"
+    path.write_text('{"stations": {}}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        StationStore(str(path))
@@ -0,0 +1,70 @@
+import pytest
+
+import stationsdata
+from station_validator import ValidationError, check, validate
+
+IMAGE = "https://cdn.discordapp.com/attachments/1/{}/unknown.png"
+PDF = "https://www.metro.cl/estacion/isometricas/{}.pdf"
+
+
+def _station(name, transports="None"):
+    return [transports, "Redbanc", "None", "None", "Metroinforma", IMAGE.format(name), "Lo Prado"]
+
+
+def _checks(issues, severity="error"):
+    return sorted({issue.check for issue in issues if issue.severity == severity})
+
+
+def test_clean_data_has_no_issues():
+    data = {"neptuno": _station("neptuno")}
+    schematics = {"neptuno": [IMAGE.format("n-s"), PDF.format("neptuno")]}
+    assert validate(data, schematics, {"l1": {"Neptuno": {}}}, document={"stationsSchematics": {}, "stationsData": {}}) == []
+
+
+def test_reports_arity_urls_and_duplicates():
+    data = {
+        "neptuno": _station("neptuno") + ["Neptuno"],
+        "pajaritos": _station("pajaritos", transports="Redbanc, Teléfonos"),
+    }
+    schematics = {
+        "neptuno": [IMAGE.format("n-s"), PDF.format("neptuno")],
+        "pajaritos": [IMAGE.format("p-s"), PDF.format("neptuno"), "Lo Prado"],
+        "ecuador": ["not a url", "https://www.metro.cl/ecuador.png"],
+    }
+    issues = validate(data, schematics)
+    assert _checks(issues) == ["arity", "key-parity", "slot-contents", "url-shape"]
+    assert _checks(issues, "warning") == ["duplicate-url"]
+    assert any("neptuno.pdf is shared by neptuno, pajaritos" in issue.message for issue in issues)
+
+
+def test_network_parity_resolves_aliases():
+    data = {"union latinoamericana": _station("ula")}
+    schematics = {"union latinoamericana": [IMAGE.format("ula-s"), PDF.format("ula")]}
+    stations_json = {"l1": {"Unión Latinoamericana": {"aliases": ["U.L.A."]}, "Nueva": {}}}
+    estado_red = {"l1": {"estaciones": [{"nombre": "U.L.A."}]}}
+    issues = validate(data, schematics, stations_json, estado_red)
+    assert _checks(issues) == []
+    assert [issue.message for issue in issues] == ["Nueva (l1) in stations.json has no station data"]
+
+
+def test_check_fails_on_errors_and_strict_warnings():
+    data = {"neptuno": _station("neptuno")}
+    with pytest.raises(ValidationError) as error:
+        check(data, {}, document={})
+    assert "output-keys" in str(error.value)
+
+    schematics = {"neptuno": [IMAGE.format("n-s") + "?width:312&height:468", PDF.format("neptuno")]}
+    assert len(check(data, schematics)) == 1
+    with pytest.raises(ValidationError):
+        check(data, schematics, strict=True)
+
+
+def test_repository_data_has_no_errors():
+    issues = validate(
+        stationsdata.stationsData,
+        stationsdata.stationsSchematics,
+        stationsdata.load_json("stations.json"),
+        stationsdata.load_json("estadoRed.json"),
+        document=stationsdata.data,
+    )
+    assert [str(issue) for issue in issues if issue.severity == "error"] == []
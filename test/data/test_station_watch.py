@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import stationsdata
+from station_watch import Publisher, Watcher, affected_artifacts, subscribe
+
+
+@pytest.fixture
+def edited_station():
+    """Change neptuno's services in memory, as an edit of stationsdata.py would."""
+    original = list(stationsdata._stations_data()["neptuno"])
+    stationsdata._stations_data()["neptuno"][1] = "Redbanc, Teléfonos, Cajero"
+    stationsdata.station.cache_clear()
+    stationsdata.records.cache_clear()
+    yield
+    stationsdata._stations_data()["neptuno"][:] = original
+    stationsdata.station.cache_clear()
+    stationsdata.records.cache_clear()
+
+
+def test_affected_artifacts():
+    assert affected_artifacts(["stationConnections.json"]) == ["views", "store", "embeds", "intermodal"]
+    assert affected_artifacts(["intermodalBuses.json"]) == ["intermodal"]
+    assert affected_artifacts(["estadoRed.json", "stationCoordinates.json"]) == ["views", "store", "geo", "embeds"]
+    assert affected_artifacts(["stations.json"]) == list(stationsdata.ARTIFACTS)
+    assert affected_artifacts(["unrelated.txt"]) == []
+
+
+def test_changed_sources(tmp_path):
+    (tmp_path / "stations.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "accessDetails").mkdir()
+    watcher = Watcher(Publisher(str(tmp_path / "watch.sock")), str(tmp_path), data_dir=str(tmp_path))
+    assert watcher.changed_sources() == []
+    (tmp_path / "stations.json").write_text('{"l1": {}}', encoding="utf-8")
+    (tmp_path / "accessDetails" / "access_neptuno-l1.json").write_text("{}", encoding="utf-8")
+    assert watcher.changed_sources() == ["accessDetails", "stations.json"]
+    # Still pending until a regeneration succeeds
+    assert watcher.changed_sources() == ["accessDetails", "stations.json"]
+
+
+def test_failed_regeneration_is_retried(tmp_path):
+    (tmp_path / "stations.json").write_text("{}", encoding="utf-8")
+    watcher = Watcher(Publisher(str(tmp_path / "watch.sock")), str(tmp_path), data_dir=str(tmp_path))
+    (tmp_path / "stations.json").write_text('{"l1": {}}', encoding="utf-8")
+    seen = watcher._signatures()
+
+    def fail(sources):
+        raise ValueError("stations.json: not valid yet")
+
+    watcher._generate = fail
+    message = asyncio.run(watcher.regenerate(watcher.changed_sources(seen), seen))
+    assert message["type"] == "error" and watcher.failed == seen
+    assert watcher.changed_sources() == ["stations.json"]
+
+    watcher._generate = lambda sources: {"written": [], "changes": None, "hashes": {"stationsdata.json": "a"}}
+    assert asyncio.run(watcher.regenerate(["stations.json"], seen)) is None
+    assert watcher.changed_sources() == [] and watcher.failed is None
+    assert watcher.version is not None
+
+
+def test_delta_reaches_subscriber(tmp_path, edited_station):
+    output = tmp_path / "out"
+    socket_path = str(tmp_path / "watch.sock")
+
+    async def scenario():
+        publisher = Publisher(socket_path)
+        await publisher.start()
+        watcher = Watcher(publisher, str(output))
+        try:
+            first = await watcher.regenerate()
+            messages = subscribe(socket_path)
+            hello = await anext(messages)
+            unchanged = await watcher.regenerate(["stationConnections.json"])
+
+            stationsdata._stations_data()["neptuno"][1] = "Redbanc"
+            stationsdata.station.cache_clear()
+            stationsdata.records.cache_clear()
+            delta = await watcher.regenerate(["stations.json"])
+            received = await asyncio.wait_for(anext(messages), timeout=5)
+            await messages.aclose()
+            return first, hello, unchanged, delta, received
+        finally:
+            await publisher.close()
+
+    first, hello, unchanged, delta, received = asyncio.run(scenario())
+    assert first["type"] == "delta" and "stationsdata.json" in first["artifacts"]
+    assert hello == {"type": "hello", "version": first["version"]}
+    assert unchanged is None
+    assert received == json.loads(json.dumps(delta))
+    assert delta["stations"] == {"added": [], "removed": [], "modified": ["neptuno"]}
+    assert list(delta["records"]["neptuno"]["services"]) == ["Redbanc"]
+    assert "stationsdata.json" in delta["artifacts"] and delta["version"] != first["version"]
+    assert not os.path.exists(socket_path)
+
+
+def test_version_follows_every_artifact(tmp_path, monkeypatch):
+    import station_geo
+
+    async def scenario():
+        publisher = Publisher(str(tmp_path / "watch.sock"))
+        await publisher.start()
+        watcher = Watcher(publisher, str(tmp_path / "out"))
+        try:
+            first = await watcher.regenerate()
+            # Coordinates only feed stationgeo.json; no station record changes.
+            monkeypatch.setattr(station_geo, "load_coordinates", lambda path: {"neptuno": [-33.418, -70.705]})
+            moved = await watcher.regenerate(["stationCoordinates.json"])
+            return first, moved
+        finally:
+            await publisher.close()
+
+    first, moved = asyncio.run(scenario())
+    assert moved["stations"] == {"added": [], "removed": [], "modified": []}
+    assert "stationgeo.json" in moved["artifacts"]
+    assert moved["version"] != first["version"]
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import stationsdata
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "src", "data")
+
+
+def test_import_builds_nothing():
+    code = (
+        "import stationsdata, sys; "
+        "assert stationsdata._stations_data.cache_info().currsize == 0; "
+        "assert 'station_records' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=DATA_DIR, check=True)
+
+
+def test_station_is_memoized():
+    record = stationsdata.station("neptuno")
+    assert record.key == "neptuno"
+    assert stationsdata.station("neptuno") is record
+    assert stationsdata.records()["neptuno"] is record
+    assert stationsdata.station("no existe") is None
+
+
+def test_module_attributes_stay_available():
+    assert stationsdata.stationsData is stationsdata._stations_data()
+    assert set(stationsdata.data) == {"stationsSchematics", "stationsData"}
+    assert stationsdata.data is stationsdata.data
+
+
+def test_category_lookup():
+    assert "neptuno" in stationsdata.category("services")["redbanc"]
+
+
+def test_main_writes_into_output_dir(tmp_path):
+    assert stationsdata.main(["--output", str(tmp_path), "--format", "min"]) == 0
+    assert sorted(os.listdir(tmp_path)) == [
+        "stationembeds.json", "stationexpress.json", "stationgeo.json", "stationintermodal.json", "stationroutes.json",
+        "stationsdata.min.json", "stationsearch.json", "stationviews.json", "stationviews.store",
+    ]